@@ -0,0 +1,208 @@
+"""
+Autenticação JWT pelas claims do access token, sem buscar o usuário no banco.
+
+O token emitido no login (ClaimsRefreshToken) leva `type_user`, `is_staff` e
+a versão de permissões do usuário. ClaimsJWTAuthentication monta com essas
+claims um User parcial: as permissões (MarketplaceViewPermission,
+IsOwnerOrAdmin...) e os filtros por usuário usam só id, tipo e is_staff, e
+os demais campos são carregados do banco, todos de uma vez, apenas se a
+view acessar algum deles.
+
+Revogação: User.permissions_version é incrementada quando tipo, is_staff,
+is_superuser, is_active ou senha mudam (ver auth.signals). Cada processo
+guarda a versão atual de cada usuário em um cache pequeno (LRU com TTL,
+TOKEN_CLAIMS_AUTH['VERSION_CACHE_TTL']); um token com versão diferente é
+recusado. No processo que fez a alteração a recusa é imediata; nos demais,
+em até VERSION_CACHE_TTL segundos.
+
+Tokens sem as claims (emitidos antes desta mudança) e TOKEN_CLAIMS_AUTH
+['ENABLED'] = False seguem o caminho padrão do simplejwt, com o usuário
+lido do banco.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import blacklist_filter
+from .models import User
+
+
+TYPE_USER_CLAIM = 'type_user'
+IS_STAFF_CLAIM = 'is_staff'
+PERMISSIONS_VERSION_CLAIM = 'perm_version'
+
+
+def get_claims_settings():
+	options = getattr(settings, 'TOKEN_CLAIMS_AUTH', {})
+	return {
+		'ENABLED': options.get('ENABLED', True),
+		'VERSION_CACHE_TTL': options.get('VERSION_CACHE_TTL', 30),
+		'VERSION_CACHE_SIZE': options.get('VERSION_CACHE_SIZE', 10000),
+	}
+
+
+class ClaimsRefreshToken(RefreshToken):
+	"""
+	Refresh token com as claims usadas pela autenticação sem banco; o access
+	token derivado (refresh.access_token) copia as mesmas claims.
+
+	A verificação da blacklist passa pelo filtro em memória (auth.blacklist).
+	"""
+
+	@classmethod
+	def for_user(cls, user):
+		token = super().for_user(user)
+		token.set_user_claims(user)
+		return token
+
+	def set_user_claims(self, user):
+		self[TYPE_USER_CLAIM] = user.type_user
+		self[IS_STAFF_CLAIM] = user.is_staff
+		self[PERMISSIONS_VERSION_CLAIM] = user.permissions_version
+
+	def check_blacklist(self):
+		if blacklist_filter.contains(self.payload[api_settings.JTI_CLAIM]):
+			raise TokenError('O token está na blacklist')
+
+	def blacklist(self):
+		"""
+		Como o BlacklistMixin.blacklist, sem buscar o usuário quando o token já
+		está em OutstandingToken (o caso dos tokens emitidos por for_user).
+		"""
+		outstanding = OutstandingToken.objects.filter(jti=self.payload[api_settings.JTI_CLAIM]).first()
+		if outstanding is None:
+			return super().blacklist()
+		return BlacklistedToken.objects.get_or_create(token=outstanding)
+
+	def rotate(self, user):
+		"""
+		Renova o token para `user` (já lido do banco), atualizando as claims.
+		Com ROTATE_REFRESH_TOKENS o token atual vai para a blacklist e um novo é
+		emitido; a gravação é atômica, então de duas renovações simultâneas do
+		mesmo token só uma é aceita. Retorna {'access'[, 'refresh']}.
+		"""
+		self.set_user_claims(user)
+		data = {'access': str(self.access_token)}
+		if api_settings.ROTATE_REFRESH_TOKENS:
+			if api_settings.BLACKLIST_AFTER_ROTATION:
+				_, created = self.blacklist()
+				if not created:
+					raise TokenError('O token está na blacklist')
+			self.set_jti()
+			self.set_exp()
+			self.set_iat()
+			OutstandingToken.objects.create(
+				user=user,
+				jti=self.payload[api_settings.JTI_CLAIM],
+				token=str(self),
+				created_at=self.current_time,
+				expires_at=datetime_from_epoch(self.payload['exp']),
+			)
+			data['refresh'] = str(self)
+		return data
+
+
+class PermissionVersionCache:
+	"""
+	Versão de permissões de cada usuário, por processo: LRU limitado a
+	VERSION_CACHE_SIZE entradas, cada uma válida por VERSION_CACHE_TTL
+	segundos. Usuários inativos ou inexistentes ficam guardados como None.
+	"""
+
+	def __init__(self):
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, user_id):
+		key = str(user_id)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry[1] > now:
+				self._entries.move_to_end(key)
+				return entry[0]
+
+		row = (
+			User.objects.filter(pk=user_id)
+			.values_list('permissions_version', 'is_active')
+			.first()
+		)
+		version = row[0] if row is not None and row[1] else None
+
+		options = get_claims_settings()
+		with self._lock:
+			self._entries[key] = (version, now + options['VERSION_CACHE_TTL'])
+			self._entries.move_to_end(key)
+			while len(self._entries) > options['VERSION_CACHE_SIZE']:
+				self._entries.popitem(last=False)
+		return version
+
+	def invalidate(self, user_id):
+		with self._lock:
+			self._entries.pop(str(user_id), None)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+
+permission_versions = PermissionVersionCache()
+
+
+def build_claims_user(validated_token):
+	"""
+	User com id, tipo, is_staff e versão vindos do token; os demais campos
+	ficam adiados e são lidos juntos no primeiro acesso (ver User.refresh_from_db).
+	"""
+	values = {
+		'id': uuid.UUID(str(validated_token[api_settings.USER_ID_CLAIM])),
+		'type_user': validated_token[TYPE_USER_CLAIM],
+		'is_staff': validated_token[IS_STAFF_CLAIM],
+		'is_active': True,
+		'permissions_version': validated_token[PERMISSIONS_VERSION_CLAIM],
+	}
+	fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+	user = User.from_db(router.db_for_read(User), fields, [values[name] for name in fields])
+	user._load_deferred_together = True
+	return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+	"""
+	JWTAuthentication que autentica pelas claims do token (ver o módulo).
+	"""
+
+	def get_user(self, validated_token):
+		if not get_claims_settings()['ENABLED'] or PERMISSIONS_VERSION_CLAIM not in validated_token:
+			return super().get_user(validated_token)
+
+		try:
+			user_id = validated_token[api_settings.USER_ID_CLAIM]
+		except KeyError:
+			raise InvalidToken('O token não identifica o usuário')
+
+		version = permission_versions.get(user_id)
+		if version is None:
+			raise AuthenticationFailed('Usuário não encontrado ou inativo', code='user_not_found')
+		if version != validated_token[PERMISSIONS_VERSION_CLAIM]:
+			raise AuthenticationFailed('Permissões alteradas: faça login novamente', code='token_outdated')
+		return build_claims_user(validated_token)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+	"""
+	Documenta ClaimsJWTAuthentication no OpenAPI como o Bearer JWT padrão.
+	"""
+	target_class = ClaimsJWTAuthentication
@@ -0,0 +1,239 @@
+"""
+Consulta à blacklist de refresh tokens sem ir ao banco a cada verificação.
+
+Com ROTATE_REFRESH_TOKENS e BLACKLIST_AFTER_ROTATION cada renovação coloca o
+token anterior na blacklist, e toda leitura de um refresh token (renovação,
+logout) verificava `BlacklistedToken` com um join em `OutstandingToken`.
+
+BlacklistFilter guarda, por processo, um filtro de Bloom com os JTIs dos
+tokens na blacklist ainda não expirados:
+
+- carregado no primeiro uso do processo (a consulta não é feita no
+  AppConfig.ready, onde o Django desaconselha acessar o banco);
+- sincronizado de forma incremental a cada SYNC_INTERVAL segundos, lendo só
+  as linhas com id acima da última vista (com uma margem de SYNC_OVERLAP ids
+  para transações confirmadas fora de ordem);
+- reconstruído a cada REBUILD_INTERVAL segundos, descartando os expirados, ou
+  quando passa da capacidade;
+- atualizado na hora pelo signal de BlacklistedToken no processo que grava.
+
+Um JTI fora do filtro não está na blacklist (até a última sincronização);
+um JTI dentro do filtro é confirmado no banco, já que o filtro de Bloom admite
+falsos positivos (FALSE_POSITIVE_RATE). Um token colocado na blacklist por
+outro processo pode passar pela verificação por até SYNC_INTERVAL segundos;
+na renovação isso não é problema, porque a gravação na blacklist
+(ClaimsRefreshToken.rotate) é atômica e recusa o token que já estava lá.
+
+prune_expired_tokens remove em lotes os OutstandingToken expirados (e, em
+cascata, os BlacklistedToken deles). Ver o comando prune_token_blacklist.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+def get_blacklist_settings():
+	options = getattr(settings, 'TOKEN_BLACKLIST', {})
+	return {
+		'FILTER_ENABLED': options.get('FILTER_ENABLED', True),
+		'SYNC_INTERVAL': options.get('SYNC_INTERVAL', 5),
+		'SYNC_OVERLAP': options.get('SYNC_OVERLAP', 1000),
+		'REBUILD_INTERVAL': options.get('REBUILD_INTERVAL', 3600),
+		'CAPACITY': options.get('CAPACITY', 100000),
+		'FALSE_POSITIVE_RATE': options.get('FALSE_POSITIVE_RATE', 0.01),
+		'PRUNE_BATCH_SIZE': options.get('PRUNE_BATCH_SIZE', 1000),
+	}
+
+
+def expired_before():
+	"""
+	Tokens com expiração anterior a este instante já são recusados pelo
+	simplejwt (considerando o LEEWAY) e não precisam estar na blacklist.
+	"""
+	leeway = api_settings.LEEWAY
+	if not isinstance(leeway, timedelta):
+		leeway = timedelta(seconds=leeway)
+	return aware_utcnow() - leeway
+
+
+class BloomFilter:
+	"""
+	Filtro de Bloom dimensionado para `capacity` itens com a taxa de falsos
+	positivos informada. As posições vêm de um único BLAKE2b (duplo hashing).
+	"""
+
+	def __init__(self, capacity, false_positive_rate):
+		capacity = max(int(capacity), 1)
+		self.size = max(int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)), 8)
+		self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+		self.capacity = capacity
+		self.count = 0
+		self.bits = bytearray((self.size + 7) // 8)
+
+	def positions(self, value):
+		digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+		first = int.from_bytes(digest[:8], 'little')
+		second = int.from_bytes(digest[8:], 'little') | 1
+		return [(first + index * second) % self.size for index in range(self.hashes)]
+
+	def add(self, value):
+		# Só conta itens novos: a sincronização relê alguns JTIs (SYNC_OVERLAP)
+		added = False
+		for position in self.positions(value):
+			mask = 1 << (position & 7)
+			if not self.bits[position >> 3] & mask:
+				self.bits[position >> 3] |= mask
+				added = True
+		if added:
+			self.count += 1
+
+	def __contains__(self, value):
+		return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class BlacklistFilter:
+	"""
+	Filtro de Bloom dos JTIs na blacklist, compartilhado pelas threads do
+	processo (ver o módulo).
+	"""
+
+	def __init__(self):
+		self._bloom = None
+		self._last_id = 0
+		self._synced_at = 0
+		self._built_at = 0
+		self._lock = threading.Lock()
+
+	def contains(self, jti):
+		"""
+		Indica se o token está na blacklist. Só consulta o banco quando o filtro
+		acusa o JTI (ou com FILTER_ENABLED = False).
+		"""
+		if not get_blacklist_settings()['FILTER_ENABLED']:
+			return BlacklistedToken.objects.filter(token__jti=jti).exists()
+		self.sync()
+		if jti not in self._bloom:
+			return False
+		return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+	def add(self, jti):
+		"""
+		Inclui o JTI no filtro do processo (signal de BlacklistedToken).
+		"""
+		bloom = self._bloom
+		if bloom is not None:
+			with self._lock:
+				bloom.add(jti)
+
+	def sync(self, force=False):
+		"""
+		Carrega o filtro, reconstrói quando venceu REBUILD_INTERVAL ou passou da
+		capacidade, ou apenas lê as linhas novas quando venceu SYNC_INTERVAL.
+		"""
+		options = get_blacklist_settings()
+		now = time.monotonic()
+		if not force and self._bloom is not None and now - self._synced_at < options['SYNC_INTERVAL']:
+			return
+		with self._lock:
+			if not force and self._bloom is not None and now - self._synced_at < options['SYNC_INTERVAL']:
+				return
+			bloom = self._bloom
+			if (
+				force or bloom is None
+				or now - self._built_at >= options['REBUILD_INTERVAL']
+				or bloom.count > bloom.capacity
+			):
+				self.rebuild(options)
+			else:
+				self._last_id = self.load(bloom, self._last_id - options['SYNC_OVERLAP'], self._last_id)
+			self._synced_at = time.monotonic()
+
+	def rebuild(self, options):
+		"""
+		Monta um filtro novo só com os tokens ainda não expirados. Chamado com o
+		lock; o filtro antigo continua respondendo até a troca.
+		"""
+		queryset = BlacklistedToken.objects.filter(token__expires_at__gt=expired_before())
+		capacity = max(options['CAPACITY'], queryset.count() * 2)
+		bloom = BloomFilter(capacity, options['FALSE_POSITIVE_RATE'])
+		last_id = self.load(bloom, 0, 0)
+		self._bloom = bloom
+		self._last_id = last_id
+		self._built_at = time.monotonic()
+
+	def load(self, bloom, after_id, last_id):
+		"""
+		Inclui no filtro os JTIs com id acima de `after_id`; retorna o maior id lido.
+		"""
+		rows = (
+			BlacklistedToken.objects
+			.filter(id__gt=max(after_id, 0), token__expires_at__gt=expired_before())
+			.order_by('id')
+			.values_list('id', 'token__jti')
+		)
+		for row_id, jti in rows.iterator(chunk_size=5000):
+			bloom.add(jti)
+			last_id = max(last_id, row_id)
+		return last_id
+
+	def stats(self):
+		bloom = self._bloom
+		if bloom is None:
+			return {'carregado': False}
+		return {
+			'carregado': True,
+			'tokens': bloom.count,
+			'capacidade': bloom.capacity,
+			'bytes': len(bloom.bits),
+			'hashes': bloom.hashes,
+			'ultimo_id': self._last_id,
+		}
+
+	def reset(self):
+		with self._lock:
+			self._bloom = None
+			self._last_id = 0
+			self._synced_at = 0
+			self._built_at = 0
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def prune_expired_tokens(batch_size=None, max_batches=None, pause=0, stdout=None):
+	"""
+	Remove, em lotes de `batch_size`, os OutstandingToken expirados e os
+	BlacklistedToken ligados a eles. Cada lote é uma transação curta; `pause`
+	segundos entre lotes aliviam o banco. Retorna (outstanding, blacklisted)
+	removidos.
+	"""
+	batch_size = batch_size or get_blacklist_settings()['PRUNE_BATCH_SIZE']
+	limit = expired_before()
+	outstanding = blacklisted = batches = 0
+	while max_batches is None or batches < max_batches:
+		ids = list(
+			OutstandingToken.objects
+			.filter(expires_at__lte=limit)
+			.order_by('id')
+			.values_list('id', flat=True)[:batch_size]
+		)
+		if not ids:
+			break
+		_, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+		outstanding += deleted.get(OutstandingToken._meta.label, 0)
+		blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
+		batches += 1
+		if stdout is not None:
+			stdout.write(f'Lote {batches}: {len(ids)} token(s) expirados removidos.')
+		if len(ids) < batch_size:
+			break
+		if pause:
+			time.sleep(pause)
+	return outstanding, blacklisted
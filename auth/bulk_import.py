@@ -0,0 +1,251 @@
+"""
+Importação de usuários em lote (cedentes de um escritório, por exemplo).
+
+O cadastro comum (UserCreateSerializer) faz um hash de senha e um INSERT por
+usuário e mais um INSERT por endereço; para milhares de usuários isso são
+milhares de idas ao banco e de hashes em série. UserImporter processa as
+linhas em lotes de BATCH_SIZE:
+
+1. valida cada linha com UserImportSerializer e confere a unicidade de email,
+   username, CPF e telefone com uma consulta por campo para o lote todo (e
+   contra as linhas anteriores do próprio arquivo);
+2. calcula os hashes das senhas num ProcessPoolExecutor (HASH_WORKERS
+   processos, HASH_CHUNK senhas por tarefa), fora do processo do servidor;
+3. grava usuários e endereços com bulk_create, numa transação por lote. Se o
+   lote falhar por unicidade (um cadastro simultâneo, por exemplo), ele é
+   refeito linha a linha para isolar as linhas com problema.
+
+Uma linha inválida não interrompe a importação: ela entra no relatório com o
+número da linha e os erros, e as demais seguem.
+
+bulk_create não dispara os signals de User, então os privilégios de
+Administrador (auth.signals) são aplicados aqui antes da gravação.
+
+Formatos de entrada (read_rows):
+
+- CSV com cabeçalho: email, username, password, name, cpf, phone, type_user
+  e, opcionalmente, um endereço nas colunas address, number, complement,
+  city, state e zip_code;
+- JSONL: um objeto por linha no formato do cadastro, com `addresses` em lista.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .hashing import get_hashing_settings, hash_passwords
+from .models import Address, TypeUserChoices, User
+from .serializer import UserImportSerializer
+
+
+ADDRESS_COLUMNS = ('address', 'number', 'complement', 'city', 'state', 'zip_code')
+
+# Campos únicos conferidos por lote (UserImportSerializer não consulta o banco)
+UNIQUE_FIELDS = ('email', 'username', 'cpf', 'phone')
+
+
+def get_import_settings():
+	options = getattr(settings, 'BULK_USER_IMPORT', {})
+	return {
+		'BATCH_SIZE': options.get('BATCH_SIZE', 500),
+		'HASH_WORKERS': options.get('HASH_WORKERS', 2),
+		'HASH_CHUNK': options.get('HASH_CHUNK', 50),
+		'MAX_ROWS': options.get('MAX_ROWS', 5000),
+	}
+
+
+def read_rows(file, name):
+	"""
+	Lê um arquivo CSV ou JSONL (pela extensão de `name`), gerando
+	(número da linha, dados). Linhas de JSONL que não são um objeto JSON
+	geram (número da linha, None).
+	"""
+	text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+	try:
+		if os.path.splitext(name)[1].lower() == '.csv':
+			reader = csv.DictReader(text)
+			for row in reader:
+				# Células vazias viram campos ausentes (CPF e telefone são únicos)
+				data = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+				address = {column: data.pop(column) for column in ADDRESS_COLUMNS if column in data}
+				if address:
+					data['addresses'] = [address]
+				yield reader.line_num, data
+		else:
+			for number, line in enumerate(text, start=1):
+				if not line.strip():
+					continue
+				try:
+					data = json.loads(line)
+				except ValueError:
+					data = None
+				yield number, data if isinstance(data, dict) else None
+	finally:
+		text.detach()
+
+
+class UserImporter:
+	"""
+	Importa usuários em lotes (ver o módulo). `run` recebe um iterável de
+	(número da linha, dados) e retorna o relatório.
+	"""
+
+	def __init__(self, options=None, dry_run=False, stdout=None):
+		self.options = options or get_import_settings()
+		self.dry_run = dry_run
+		self.stdout = stdout
+		self.seen = {field: set() for field in UNIQUE_FIELDS}
+		self.report = {'linhas': 0, 'criados': 0, 'enderecos': 0, 'erros': []}
+		self._executor = None
+
+	def run(self, rows):
+		try:
+			batch = []
+			for row in rows:
+				batch.append(row)
+				if len(batch) >= self.options['BATCH_SIZE']:
+					self.process(batch)
+					batch = []
+			if batch:
+				self.process(batch)
+		finally:
+			if self._executor is not None:
+				self._executor.shutdown(cancel_futures=True)
+				self._executor = None
+		self.report['erros'].sort(key=lambda error: error['linha'])
+		return self.report
+
+	def error(self, number, data, errors):
+		email = data.get('email') if isinstance(data, dict) else None
+		self.report['erros'].append({'linha': number, 'email': email, 'erros': errors})
+
+	def process(self, batch):
+		self.report['linhas'] += len(batch)
+		valid = self.validate(batch)
+		if valid and not self.dry_run:
+			passwords = self.hash([data['password'] for _, data in valid])
+			self.insert([(number, data, password) for (number, data), password in zip(valid, passwords)])
+		elif self.dry_run:
+			self.report['criados'] += len(valid)
+			self.report['enderecos'] += sum(len(data.get('addresses', [])) for _, data in valid)
+		if self.stdout is not None:
+			self.stdout.write(
+				f"{self.report['linhas']} linha(s) processadas, {self.report['criados']} usuário(s) "
+				f"{'válidos' if self.dry_run else 'criados'}, {len(self.report['erros'])} erro(s)."
+			)
+
+	def validate(self, batch):
+		"""
+		Valida as linhas do lote; retorna [(número, dados validados)].
+		"""
+		candidates = []
+		for number, data in batch:
+			if data is None:
+				self.error(number, data, {'linha': ['A linha não é um objeto JSON válido.']})
+				continue
+			serializer = UserImportSerializer(data=data)
+			if not serializer.is_valid():
+				self.error(number, data, serializer.errors)
+				continue
+			validated = serializer.validated_data
+			validated['email'] = User.objects.normalize_email(validated['email'])
+			candidates.append((number, validated))
+
+		existing = {
+			field: set(
+				User.objects.filter(**{
+					f'{field}__in': [data[field] for _, data in candidates if data.get(field)]
+				}).values_list(field, flat=True)
+			)
+			for field in UNIQUE_FIELDS
+		}
+		valid = []
+		for number, data in candidates:
+			errors = {}
+			for field in UNIQUE_FIELDS:
+				value = data.get(field)
+				if not value:
+					continue
+				if value in existing[field]:
+					errors[field] = [f'Já existe um usuário com este {field}.']
+				elif value in self.seen[field]:
+					errors[field] = [f'Valor repetido em outra linha do arquivo ({field}).']
+			if errors:
+				self.error(number, data, errors)
+				continue
+			for field in UNIQUE_FIELDS:
+				if data.get(field):
+					self.seen[field].add(data[field])
+			valid.append((number, data))
+		return valid
+
+	def get_executor(self):
+		if self._executor is None:
+			# forkserver: os processos não herdam threads/conexões do servidor.
+			# Pré-carrega só o módulo de hash, que não depende dos models.
+			context = multiprocessing.get_context('forkserver')
+			context.set_forkserver_preload(['auth.hashing'])
+			self._executor = ProcessPoolExecutor(max_workers=self.options['HASH_WORKERS'], mp_context=context)
+		return self._executor
+
+	def hash(self, passwords):
+		"""
+		Hashes das senhas com o hasher PREFERRED, em blocos de HASH_CHUNK nos
+		processos do pool (ou na própria thread, com HASH_WORKERS = 0).
+		"""
+		hasher = get_hashing_settings()['PREFERRED']
+		if self.options['HASH_WORKERS'] <= 0:
+			return hash_passwords(passwords, hasher)
+		size = max(self.options['HASH_CHUNK'], 1)
+		chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+		return [
+			encoded
+			for result in self.get_executor().map(hash_passwords, chunks, repeat(hasher))
+			for encoded in result
+		]
+
+	@staticmethod
+	def build(data, password):
+		"""
+		Monta o usuário e os endereços sem gravar; aplica os privilégios que os
+		signals de User dariam a um Administrador.
+		"""
+		data = dict(data)
+		addresses = data.pop('addresses', [])
+		data.pop('password')
+		data.setdefault('type_user', TypeUserChoices.CEDENTE)
+		user = User(password=password, is_active=True, **data)
+		if user.type_user == TypeUserChoices.ADMINISTRADOR:
+			user.is_staff = True
+			user.is_superuser = True
+		return user, [Address(user=user, **address) for address in addresses]
+
+	def insert(self, rows):
+		"""
+		Grava o lote numa transação; se falhar por unicidade, refaz linha a linha.
+		"""
+		built = [(number, data, *self.build(data, password)) for number, data, password in rows]
+		try:
+			with transaction.atomic():
+				User.objects.bulk_create([user for _, _, user, _ in built])
+				Address.objects.bulk_create([address for *_, addresses in built for address in addresses])
+		except IntegrityError:
+			for number, data, user, addresses in built:
+				try:
+					with transaction.atomic():
+						User.objects.bulk_create([user])
+						Address.objects.bulk_create(addresses)
+				except IntegrityError:
+					self.error(number, data, {'usuario': ['Email, username, CPF ou telefone já cadastrado.']})
+					continue
+				self.report['criados'] += 1
+				self.report['enderecos'] += len(addresses)
+			return
+		self.report['criados'] += len(built)
+		self.report['enderecos'] += sum(len(addresses) for *_, addresses in built)
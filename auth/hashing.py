@@ -0,0 +1,153 @@
+"""
+Hash de senhas com concorrência limitada.
+
+O PBKDF2 do Django leva centenas de milissegundos de CPU por senha; sem
+limite, uma rajada de logins ocupava todos os núcleos do worker com hashes,
+atrasando os demais endpoints.
+
+PasswordHashLimiter limita quantos hashes rodam ao mesmo tempo no processo e
+devolve 429 em vez de deixar a fila crescer:
+
+- MAX_WORKERS: hashes simultâneos, ou seja, quantos núcleos o login pode
+  ocupar (0 = sem limite);
+- MAX_PENDING: hashes em andamento ou aguardando vaga; acima disso a
+  requisição recebe 429 (HashingUnavailable) na hora;
+- QUEUE_TIMEOUT: quanto uma requisição espera por uma vaga antes do 429.
+
+O hash roda na própria thread da requisição: as views do DRF são síncronas,
+então a thread fica ocupada durante o hash de qualquer forma, e um pool só
+acrescentaria uma fila. O que o limite garante é que o login não toma mais
+que MAX_WORKERS núcleos e que o excesso é recusado logo.
+
+Atualização do hash: quando o hash gravado não é do hasher PREFERRED (ou usa
+outro custo, ex: PBKDF2_ITERATIONS alterado), o login bem-sucedido grava um
+hash novo com update(), sem passar pelo save() - a senha não mudou, então a
+versão de permissões (auth.signals) e os tokens emitidos continuam valendo.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+
+
+def get_hashing_settings():
+	options = getattr(settings, 'PASSWORD_HASHING', {})
+	return {
+		'MAX_WORKERS': options.get('MAX_WORKERS', 2),
+		'MAX_PENDING': options.get('MAX_PENDING', 32),
+		'QUEUE_TIMEOUT': options.get('QUEUE_TIMEOUT', 1),
+		'RETRY_AFTER': options.get('RETRY_AFTER', 1),
+		'PREFERRED': options.get('PREFERRED') or 'default',
+		'PBKDF2_ITERATIONS': options.get('PBKDF2_ITERATIONS'),
+	}
+
+
+def hash_passwords(passwords, hasher='default'):
+	"""
+	Hash de uma lista de senhas. Roda também nos processos do pool da
+	importação em lote (auth.bulk_import), por isso não usa models.
+	"""
+	return [make_password(password, None, hasher) for password in passwords]
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+	"""
+	PBKDF2-SHA256 com o número de iterações de PASSWORD_HASHING
+	['PBKDF2_ITERATIONS'] (padrão do Django quando vazio). Mesmo algoritmo do
+	hasher padrão: os hashes existentes continuam válidos e passam para o
+	custo configurado no próximo login.
+	"""
+
+	@property
+	def iterations(self):
+		return get_hashing_settings()['PBKDF2_ITERATIONS'] or PBKDF2PasswordHasher.iterations
+
+
+class HashingUnavailable(Exception):
+	"""
+	Não há vaga para mais um hash; a view responde 429 com Retry-After.
+	"""
+	def __init__(self, retry_after):
+		super().__init__('Muitas requisições de autenticação no momento. Tente novamente em instantes.')
+		self.retry_after = retry_after
+
+
+class PasswordHashLimiter:
+	"""
+	Limite de hashes de senha simultâneos (ver o módulo).
+	"""
+
+	def __init__(self):
+		self._slots = None
+		self._pending = 0
+		self._lock = threading.Lock()
+
+	def get_slots(self, options):
+		with self._lock:
+			if self._slots is None:
+				self._slots = threading.BoundedSemaphore(options['MAX_WORKERS'])
+			return self._slots
+
+	def reset(self):
+		with self._lock:
+			self._slots = None
+
+	@contextmanager
+	def slot(self):
+		"""
+		Reserva uma vaga para um hash. Levanta HashingUnavailable se já há
+		MAX_PENDING hashes pendentes ou se nenhuma vaga abre em QUEUE_TIMEOUT
+		segundos.
+		"""
+		options = get_hashing_settings()
+		if options['MAX_WORKERS'] <= 0:
+			yield
+			return
+		slots = self.get_slots(options)
+		with self._lock:
+			if self._pending >= options['MAX_PENDING']:
+				raise HashingUnavailable(options['RETRY_AFTER'])
+			self._pending += 1
+		try:
+			if not slots.acquire(timeout=options['QUEUE_TIMEOUT']):
+				raise HashingUnavailable(options['RETRY_AFTER'])
+			try:
+				yield
+			finally:
+				slots.release()
+		finally:
+			with self._lock:
+				self._pending -= 1
+
+	def run(self, function, *args):
+		with self.slot():
+			return function(*args)
+
+	def hash(self, password):
+		"""
+		Hash de uma senha nova com o hasher PREFERRED.
+		"""
+		return self.run(make_password, password, None, get_hashing_settings()['PREFERRED'])
+
+	def check_user_password(self, user, password):
+		"""
+		Confere a senha do usuário e, se correta e o hash estiver desatualizado,
+		grava o hash novo. Retorna se a senha confere.
+		"""
+		preferred = get_hashing_settings()['PREFERRED']
+		encoded = user.password
+		is_correct, must_update = self.run(verify_password, password, encoded, preferred)
+		if is_correct and must_update:
+			try:
+				upgraded = self.run(make_password, password, None, preferred)
+			except HashingUnavailable:
+				# Sem vaga: o login segue e a atualização fica para o próximo
+				return True
+			# Filtra pelo hash antigo para não sobrescrever uma troca de senha simultânea
+			type(user).objects.filter(pk=user.pk, password=encoded).update(password=upgraded)
+			user.password = upgraded
+		return is_correct
+
+
+password_hasher = PasswordHashLimiter()
@@ -0,0 +1,112 @@
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from auth.hashing import get_hashing_settings, password_hasher
+from auth.models import User
+from auth.views import LoginView
+
+
+class Command(BaseCommand):
+	"""
+	Mede a vazão do login (busca do usuário, verificação da senha com o limite
+	de hashes simultâneos e emissão dos tokens) com várias requisições
+	simultâneas, e a vazão por núcleo usado pelo hash
+	(PASSWORD_HASHING['MAX_WORKERS']).
+
+	Cria um usuário temporário, removido no final. Com --workers o limite de
+	hashes simultâneos é trocado só durante o benchmark, para comparar
+	configurações; o custo do hash segue PASSWORD_PBKDF2_ITERATIONS /
+	PASSWORD_HASHER.
+	"""
+	help = 'Benchmark da vazão do login por núcleo com o limite de hashes de senha'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--requests', type=int, default=40, help='Logins por cenário')
+		parser.add_argument('--concurrency', default='1,2,4,8', help='Logins simultâneos por cenário (lista separada por vírgula)')
+		parser.add_argument('--workers', type=int, default=None, help='Hashes simultâneos durante o benchmark')
+
+	def handle(self, *args, **options):
+		from django.conf import settings
+
+		original = getattr(settings, 'PASSWORD_HASHING', None)
+		if options['workers'] is not None:
+			settings.PASSWORD_HASHING = {**(original or {}), 'MAX_WORKERS': options['workers']}
+			password_hasher.reset()
+
+		suffix = uuid.uuid4().hex[:8]
+		password = f'Bench-{suffix}-senha!'
+		user = User.objects.create_user(
+			email=f'bench-login-{suffix}@lexpay.local', username=f'bench-login-{suffix}', password=password,
+		)
+		try:
+			self.run(user.email, password, options)
+		finally:
+			user.delete()
+			if options['workers'] is not None:
+				settings.PASSWORD_HASHING = original
+				password_hasher.reset()
+
+	def run(self, email, password, options):
+		hashing = get_hashing_settings()
+		cores = max(min(hashing['MAX_WORKERS'], os.cpu_count() or 1), 1)
+		self.stdout.write(
+			f"Hash de senhas: {hashing['MAX_WORKERS']} simultâneo(s), {hashing['MAX_PENDING']} pendentes; "
+			f"{os.cpu_count()} núcleo(s) na máquina."
+		)
+		view = LoginView.as_view()
+		factory = RequestFactory()
+		body = json.dumps({'email': email, 'password': password})
+
+		# Aquece a conexão; o primeiro login também atualiza o hash, se preciso
+		view(factory.post('/api/v1/auth/login/', body, content_type='application/json'))
+
+		self.stdout.write(
+			f'\n{"simultâneos":>11} {"logins/s":>10} {"por núcleo":>11} {"p50 (ms)":>10} {"p95 (ms)":>10} {"429":>6}'
+		)
+		for concurrency in [int(value) for value in options['concurrency'].split(',') if value.strip()]:
+			latencies = []
+			statuses = []
+			lock = threading.Lock()
+			remaining = [options['requests']]
+
+			def worker():
+				try:
+					while True:
+						with lock:
+							if remaining[0] <= 0:
+								return
+							remaining[0] -= 1
+						request = factory.post('/api/v1/auth/login/', body, content_type='application/json')
+						start = time.perf_counter()
+						response = view(request)
+						elapsed = (time.perf_counter() - start) * 1000
+						with lock:
+							latencies.append(elapsed)
+							statuses.append(response.status_code)
+				finally:
+					connection.close()
+
+			threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+			start = time.perf_counter()
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			elapsed = time.perf_counter() - start
+
+			succeeded = statuses.count(200)
+			rate = succeeded / elapsed if elapsed else 0
+			latencies.sort()
+			p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0
+			self.stdout.write(
+				f'{concurrency:>11} {rate:>10.1f} {rate / cores:>11.1f} '
+				f'{statistics.median(latencies) if latencies else 0:>10.1f} {p95:>10.1f} {statuses.count(429):>6}'
+			)
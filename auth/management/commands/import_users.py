@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth.bulk_import import UserImporter, get_import_settings, read_rows
+
+
+class Command(BaseCommand):
+	"""
+	Importa usuários e endereços de um arquivo CSV ou JSONL (ver
+	auth.bulk_import para os formatos). Sem limite de linhas: o arquivo é lido
+	em streaming e gravado em lotes de --batch-size, cada um na sua transação.
+
+	Linhas inválidas não interrompem a importação; elas são listadas no final
+	e, com --errors, gravadas em um arquivo JSONL (uma linha por erro).
+	"""
+	help = 'Importa usuários em lote de um arquivo CSV ou JSONL'
+
+	def add_arguments(self, parser):
+		options = get_import_settings()
+		parser.add_argument('path', help='Arquivo .csv ou .jsonl')
+		parser.add_argument('--batch-size', type=int, default=options['BATCH_SIZE'], help='Linhas validadas e gravadas por lote')
+		parser.add_argument('--hash-workers', type=int, default=options['HASH_WORKERS'], help='Processos para o hash das senhas (0 = sem pool)')
+		parser.add_argument('--dry-run', action='store_true', help='Apenas valida, sem criar os usuários')
+		parser.add_argument('--errors', default=None, help='Grava os erros por linha neste arquivo JSONL')
+
+	def handle(self, *args, **options):
+		path = options['path']
+		if not path.lower().endswith(('.csv', '.jsonl')):
+			raise CommandError('Formato não suportado. Use um arquivo .csv ou .jsonl.')
+
+		import_options = {
+			**get_import_settings(),
+			'BATCH_SIZE': max(options['batch_size'], 1),
+			'HASH_WORKERS': options['hash_workers'],
+		}
+		importer = UserImporter(import_options, dry_run=options['dry_run'], stdout=self.stdout)
+		try:
+			with open(path, 'rb') as file:
+				report = importer.run(read_rows(file, path))
+		except OSError as e:
+			raise CommandError(f'Não foi possível ler {path}: {e}')
+
+		errors = report['erros']
+		if options['errors']:
+			with open(options['errors'], 'w', encoding='utf-8') as output:
+				for error in errors:
+					output.write(json.dumps(error, ensure_ascii=False, default=str) + '\n')
+		else:
+			for error in errors[:50]:
+				self.stderr.write(f"Linha {error['linha']} ({error['email'] or '-'}): {json.dumps(error['erros'], ensure_ascii=False, default=str)}")
+			if len(errors) > 50:
+				self.stderr.write(f'... e mais {len(errors) - 50} erro(s); use --errors para gravar todos.')
+
+		verb = 'seriam criados' if options['dry_run'] else 'criados'
+		self.stdout.write(self.style.SUCCESS(
+			f"{report['linhas']} linha(s): {report['criados']} usuário(s) e {report['enderecos']} endereço(s) "
+			f"{verb}, {len(errors)} linha(s) com erro."
+		))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auth.blacklist import get_blacklist_settings, prune_expired_tokens
+
+
+class Command(BaseCommand):
+	"""
+	Remove os refresh tokens expirados das tabelas do token_blacklist
+	(OutstandingToken e, em cascata, BlacklistedToken). Um token expirado já é
+	recusado pelo simplejwt, então a linha não serve mais para nada; sem esta
+	limpeza as tabelas crescem a cada login e a cada renovação.
+
+	A remoção é feita em lotes de --batch-size, cada um em uma transação curta,
+	com --pause segundos entre eles. Com --loop o comando fica rodando e
+	repete a limpeza a cada --interval segundos.
+	"""
+	help = 'Remove em lotes os refresh tokens expirados das tabelas da blacklist'
+
+	def add_arguments(self, parser):
+		options = get_blacklist_settings()
+		parser.add_argument('--batch-size', type=int, default=options['PRUNE_BATCH_SIZE'], help='Tokens removidos por lote')
+		parser.add_argument('--max-batches', type=int, default=None, help='Quantidade máxima de lotes nesta execução')
+		parser.add_argument('--pause', type=float, default=0, help='Segundos de espera entre os lotes')
+		parser.add_argument('--loop', action='store_true', help='Executa continuamente, a cada --interval segundos')
+		parser.add_argument('--interval', type=int, default=3600, help='Intervalo entre as execuções com --loop')
+
+	def handle(self, *args, **options):
+		while True:
+			started = time.monotonic()
+			outstanding, blacklisted = prune_expired_tokens(
+				batch_size=options['batch_size'],
+				max_batches=options['max_batches'],
+				pause=options['pause'],
+				stdout=self.stdout if options['verbosity'] > 1 else None,
+			)
+			self.stdout.write(self.style.SUCCESS(
+				f'{outstanding} token(s) expirados removidos, {blacklisted} deles na blacklist '
+				f'({time.monotonic() - started:.1f}s).'
+			))
+
+			if not options['loop']:
+				break
+			time.sleep(options['interval'])
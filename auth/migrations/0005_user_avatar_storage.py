@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-16 23:12
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0004_alter_user_cpf_alter_user_phone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, default='avatars/default.png', help_text='Avatar do usuário', null=True, storage=core.storage.get_avatar_storage, upload_to='avatars/'),
+        ),
+    ]
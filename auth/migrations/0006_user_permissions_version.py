@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0005_user_avatar_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='permissions_version',
+            field=models.PositiveIntegerField(default=1, help_text='Versão das permissões, incrementada quando tipo, status ou senha mudam; invalida os tokens emitidos antes'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from django.utils import timezone
 import uuid
 
+from core.storage import get_avatar_storage
+
 
 class UserManager(BaseUserManager):
 
@@ -14,12 +16,18 @@ class UserManager(BaseUserManager):
         if not password:
             raise ValueError('A senha é obrigatória')
 
+        # Hash já calculado fora da requisição (auth.hashing)
+        encoded_password = extra_fields.pop('encoded_password', None)
         email = self.normalize_email(email)
         extra_fields.setdefault('type_user', TypeUserChoices.CEDENTE)
         extra_fields.setdefault('is_active', True)
         
         user = self.model(email=email, username=username, **extra_fields)
-        user.set_password(password)
+        if encoded_password:
+            user.password = encoded_password
+            user._password = password
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -111,6 +119,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     avatar = models.ImageField(
         upload_to='avatars/',
+        storage=get_avatar_storage,
         default='avatars/default.png',
         help_text="Avatar do usuário",
         null=True,
@@ -166,6 +175,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         default=False,
         help_text="Designa se o usuário pode acessar o site de administração."
     )
+    permissions_version = models.PositiveIntegerField(
+        default=1,
+        help_text="Versão das permissões, incrementada quando tipo, status ou senha mudam; invalida os tokens emitidos antes"
+    )
     created_at = models.DateTimeField(auto_now_add=True, help_text="Data de criação")
     updated_at = models.DateTimeField(auto_now=True, help_text="Data de atualização")
 
@@ -177,6 +190,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.name or self.username} - {self.cpf}"
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Usuários montados a partir das claims do token (auth.authentication)
+        carregam de uma vez todos os campos que faltam no primeiro acesso a
+        um deles, em vez de uma consulta por campo.
+        """
+        if fields is not None and getattr(self, '_load_deferred_together', False):
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = deferred
+        return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     def has_perm(self, perm, obj=None):
         return self.is_superuser
 
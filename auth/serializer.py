@@ -1,3 +1,5 @@
+import os
+
 from rest_framework import serializers
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
@@ -19,6 +21,56 @@ class LogoutRequestSerializer(serializers.Serializer):
     refresh = serializers.CharField(required=True, help_text="Refresh token para invalidar")
 
 
+class TokenRefreshRequestSerializer(serializers.Serializer):
+    """
+    Serializer para requisição de renovação do access token.
+    """
+    refresh = serializers.CharField(required=True, help_text="Refresh token recebido no login ou na última renovação")
+
+
+AVATAR_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp', '.gif']
+MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5MB
+
+
+class AvatarUploadSerializer(serializers.Serializer):
+    """
+    Pedido de envio direto do avatar ao storage. O SHA-256 entra na
+    assinatura da URL: o storage recusa um arquivo diferente do declarado.
+    """
+    nome_arquivo = serializers.CharField(max_length=255, help_text="Nome original da imagem")
+    tamanho = serializers.IntegerField(help_text="Tamanho da imagem em bytes")
+    checksum = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$',
+        help_text="SHA-256 (hex) da imagem",
+        error_messages={'invalid': "O checksum deve ser o SHA-256 da imagem em hexadecimal."},
+    )
+
+    def validate_nome_arquivo(self, value):
+        value = os.path.basename(value.replace('\\', '/')).strip()
+        if os.path.splitext(value)[1].lower() not in AVATAR_EXTENSIONS:
+            raise serializers.ValidationError(
+                "Formato de imagem não permitido. Use PNG, JPEG, WebP ou GIF."
+            )
+        return value
+
+    def validate_tamanho(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O tamanho da imagem deve ser maior que zero.")
+        if value > MAX_AVATAR_SIZE:
+            raise serializers.ValidationError("A imagem é muito grande. Tamanho máximo permitido: 5MB.")
+        return value
+
+    def validate_checksum(self, value):
+        return value.lower()
+
+
+class AvatarUploadCompleteSerializer(serializers.Serializer):
+    """
+    Conclusão do envio direto do avatar.
+    """
+    token = serializers.CharField(help_text="Token devolvido na abertura do envio")
+
+
 class AddressSerializer(serializers.ModelSerializer):
     """
     Serializer para endereços.
@@ -66,6 +118,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """
         Cria o usuário e seus endereços associados.
+        Com `encoded_password` (passado no save) a senha não é hasheada de novo.
         """
         addresses_data = validated_data.pop('addresses', [])
         validated_data.pop('password_confirm', None)
@@ -82,6 +135,63 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer de uma linha da importação em lote (auth.bulk_import).
+    A unicidade de email, username, CPF e telefone é conferida por lote,
+    fora do serializer, para não fazer uma consulta por linha.
+    """
+    password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
+    addresses = AddressSerializer(many=True, required=False)
+
+    class Meta:
+        model = User
+        fields = ('email', 'username', 'password', 'name', 'cpf', 'phone', 'type_user', 'addresses')
+        extra_kwargs = {
+            'email': {'required': True, 'validators': []},
+            'username': {'required': True, 'validators': []},
+            'cpf': {'validators': []},
+            'phone': {'validators': []},
+            'type_user': {'required': False},
+        }
+
+
+IMPORT_EXTENSIONS = ['.csv', '.jsonl']
+
+
+class UserImportRequestSerializer(serializers.Serializer):
+    """
+    Serializer para requisição de importação de usuários em lote.
+    """
+    arquivo = serializers.FileField(
+        required=False,
+        help_text="Arquivo CSV (uma linha por usuário, com um endereço opcional) ou JSONL (um usuário por linha)"
+    )
+    usuarios = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+        help_text="Usuários no corpo JSON, no mesmo formato das linhas do JSONL"
+    )
+    dry_run = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Apenas valida, sem criar os usuários"
+    )
+
+    def validate_arquivo(self, value):
+        if os.path.splitext(value.name)[1].lower() not in IMPORT_EXTENSIONS:
+            raise serializers.ValidationError("Formato não suportado. Use CSV ou JSONL.")
+        return value
+
+    def validate(self, attrs):
+        """
+        Exige o arquivo ou a lista de usuários, não os dois.
+        """
+        if bool(attrs.get('arquivo')) == bool(attrs.get('usuarios')):
+            raise serializers.ValidationError("Envie o arquivo ou a lista de usuários.")
+        return attrs
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer para ATUALIZAÇÃO de usuário.
@@ -1,8 +1,16 @@
+from django.db.models import F
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .authentication import permission_versions
+from .blacklist import blacklist_filter
 from .models import User, TypeUserChoices
 
 
+# Campos que, quando mudam, invalidam os tokens já emitidos (auth.authentication)
+PERMISSION_FIELDS = ('type_user', 'is_staff', 'is_superuser', 'is_active', 'password')
+
+
 @receiver(pre_save, sender=User)
 def set_administrator_permissions_pre_save(sender, instance, **kwargs):
 	"""
@@ -45,3 +53,54 @@ def verify_administrator_permissions_post_save(sender, instance, created, **kwar
 		
 		if needs_update:
 			User.objects.filter(pk=instance.pk).update(**update_fields)
+
+
+@receiver(pre_save, sender=User)
+def track_permission_changes_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+	"""
+	Signal pré-save que detecta mudança de tipo, privilégios, status ou senha.
+	
+	Registrado depois de set_administrator_permissions_pre_save, então
+	compara os valores finais. Campos adiados ou fora de update_fields não
+	são gravados e por isso não são comparados.
+	"""
+	instance._permissions_changed = False
+	if raw or instance._state.adding:
+		return
+	deferred = instance.get_deferred_fields()
+	fields = [
+		name for name in PERMISSION_FIELDS
+		if name not in deferred and (update_fields is None or name in update_fields)
+	]
+	if not fields:
+		return
+	current = User.objects.filter(pk=instance.pk).values(*fields).first()
+	instance._permissions_changed = current is not None and any(
+		current[name] != getattr(instance, name) for name in fields
+	)
+
+
+@receiver(post_save, sender=User)
+def bump_permissions_version_post_save(sender, instance, created, **kwargs):
+	"""
+	Signal pós-save que incrementa permissions_version quando o pré-save
+	detectou mudança, revogando os access tokens emitidos antes.
+	
+	Usa update() para evitar loop infinito do signal.
+	"""
+	if not getattr(instance, '_permissions_changed', False):
+		return
+	instance._permissions_changed = False
+	User.objects.filter(pk=instance.pk).update(permissions_version=F('permissions_version') + 1)
+	instance.permissions_version += 1
+	permission_versions.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter_post_save(sender, instance, created, raw=False, **kwargs):
+	"""
+	Signal pós-save que inclui o token no filtro da blacklist deste processo,
+	sem esperar a próxima sincronização (auth.blacklist).
+	"""
+	if created and not raw:
+		blacklist_filter.add(instance.token.jti)
@@ -1,3 +1,57 @@
-from django.test import TestCase
+import uuid
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .throttling import get_throttle_settings
+
+
+def throttle_settings(**options):
+	"""
+	LOGIN_THROTTLE com prefixo próprio, para os contadores em memória de um
+	teste não valerem para os outros.
+	"""
+	return {
+		**get_throttle_settings(),
+		'STORE': 'auth.throttling.MemoryCounterStore',
+		'KEY_PREFIX': f'login-teste-{uuid.uuid4().hex}',
+		'EMAIL_LIMIT': 100,
+		**options,
+	}
+
+
+class LoginThrottleIpTests(TestCase):
+	"""
+	O limite por IP não pode ser contornado com um X-Forwarded-For novo a
+	cada tentativa.
+	"""
+
+	def attempt(self, client, number, forwarded_for):
+		return client.post(
+			'/api/v1/auth/login/',
+			{'email': f'ninguem{number}@lexpay.com', 'password': 'senha-errada'},
+			format='json',
+			HTTP_X_FORWARDED_FOR=forwarded_for,
+		)
+
+	@override_settings(LOGIN_THROTTLE=throttle_settings(IP_LIMIT=3))
+	def test_spoofed_forwarded_for_without_proxy_hits_ip_limit(self):
+		client = APIClient()
+		statuses = [self.attempt(client, number, f'10.0.0.{number}').status_code for number in range(5)]
+
+		self.assertNotIn(429, statuses[:3])
+		self.assertEqual(statuses[3:], [429, 429])
+
+	def test_spoofed_forwarded_for_behind_proxy_hits_ip_limit(self):
+		rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+		with override_settings(LOGIN_THROTTLE=throttle_settings(IP_LIMIT=3), REST_FRAMEWORK=rest_framework):
+			client = APIClient()
+			# O proxy acrescenta o IP real no fim; o começo vem do cliente.
+			statuses = [
+				self.attempt(client, number, f'10.0.0.{number}, 203.0.113.7').status_code
+				for number in range(5)
+			]
+
+		self.assertNotIn(429, statuses[:3])
+		self.assertEqual(statuses[3:], [429, 429])
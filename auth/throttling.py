@@ -0,0 +1,306 @@
+"""
+Limite de tentativas de login por email e por IP.
+
+Cada tentativa custa um hash de senha completo (auth.hashing), o caminho mais
+caro da API; sem limite, um ataque de credential stuffing ocupa a CPU com
+hashes de senhas erradas. LoginRateThrottle é um throttle do DRF, então roda
+no initial() da view, antes da busca do usuário e do hash.
+
+Janela deslizante (aproximada por dois contadores fixos): a contagem é a da
+janela atual somada à da anterior, ponderada pela fração dela que ainda cai
+dentro da janela. Acima de EMAIL_LIMIT tentativas do mesmo email em
+EMAIL_WINDOW segundos, ou de IP_LIMIT do mesmo IP em IP_WINDOW, o email (ou IP)
+fica bloqueado por COOLDOWN segundos; cada novo bloqueio dentro de LEVEL_TTL
+dobra o tempo, até MAX_COOLDOWN. Um login bem-sucedido zera o contador e o
+nível do email.
+
+Os contadores ficam num CounterStore plugável (LOGIN_THROTTLE['STORE']):
+
+- MemoryCounterStore: no próprio processo, para um único nó;
+- CacheCounterStore: no cache do Django (CACHE_ALIAS); com Redis ou memcached
+  os limites valem para todos os nós.
+
+As métricas (tentativas, recusas e bloqueios por escopo, sucessos e falhas)
+ficam no mesmo store e são expostas em LoginThrottleMetricsView.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+
+METRICS = (
+	'tentativas', 'sucessos', 'falhas',
+	'recusadas_email', 'recusadas_ip', 'bloqueios_email', 'bloqueios_ip',
+)
+
+
+def get_throttle_settings():
+	options = getattr(settings, 'LOGIN_THROTTLE', {})
+	return {
+		'ENABLED': options.get('ENABLED', True),
+		'STORE': options.get('STORE', 'auth.throttling.MemoryCounterStore'),
+		'CACHE_ALIAS': options.get('CACHE_ALIAS', 'default'),
+		'KEY_PREFIX': options.get('KEY_PREFIX', 'login'),
+		'MAX_KEYS': options.get('MAX_KEYS', 100000),
+		'EMAIL_LIMIT': options.get('EMAIL_LIMIT', 5),
+		'EMAIL_WINDOW': options.get('EMAIL_WINDOW', 300),
+		'IP_LIMIT': options.get('IP_LIMIT', 20),
+		'IP_WINDOW': options.get('IP_WINDOW', 60),
+		'COOLDOWN': options.get('COOLDOWN', 60),
+		'MAX_COOLDOWN': options.get('MAX_COOLDOWN', 3600),
+		'LEVEL_TTL': options.get('LEVEL_TTL', 24 * 3600),
+	}
+
+
+class CounterStore:
+	"""
+	Interface dos stores de contadores: inteiros com expiração em segundos
+	(`ttl` None = sem expiração).
+	"""
+	shared = False
+
+	def incr(self, key, ttl):
+		"""
+		Incrementa o contador (criando com 1) e retorna o novo valor. A expiração
+		é definida na criação e não é renovada pelos incrementos.
+		"""
+		raise NotImplementedError
+
+	def get_many(self, keys):
+		raise NotImplementedError
+
+	def set(self, key, value, ttl):
+		raise NotImplementedError
+
+	def delete_many(self, keys):
+		raise NotImplementedError
+
+
+class MemoryCounterStore(CounterStore):
+	"""
+	Contadores no processo, com no máximo MAX_KEYS chaves (as mais antigas
+	saem primeiro).
+	"""
+
+	def __init__(self, options):
+		self.max_keys = options['MAX_KEYS']
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def _get(self, key, now):
+		entry = self._entries.get(key)
+		if entry is None:
+			return None
+		if entry[1] is not None and entry[1] <= now:
+			del self._entries[key]
+			return None
+		return entry
+
+	def _put(self, key, value, expires):
+		self._entries[key] = (value, expires)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_keys:
+			self._entries.popitem(last=False)
+
+	def incr(self, key, ttl):
+		now = time.monotonic()
+		with self._lock:
+			entry = self._get(key, now)
+			if entry is None:
+				entry = (0, now + ttl if ttl is not None else None)
+			self._put(key, entry[0] + 1, entry[1])
+			return entry[0] + 1
+
+	def get_many(self, keys):
+		now = time.monotonic()
+		with self._lock:
+			return {key: entry[0] for key in keys if (entry := self._get(key, now)) is not None}
+
+	def set(self, key, value, ttl):
+		with self._lock:
+			self._put(key, value, time.monotonic() + ttl if ttl is not None else None)
+
+	def delete_many(self, keys):
+		with self._lock:
+			for key in keys:
+				self._entries.pop(key, None)
+
+
+class CacheCounterStore(CounterStore):
+	"""
+	Contadores no cache do Django. O incr do Redis e do memcached é atômico,
+	então vários nós podem compartilhar os mesmos contadores.
+	"""
+	shared = True
+
+	def __init__(self, options):
+		self.cache = caches[options['CACHE_ALIAS']]
+
+	def incr(self, key, ttl):
+		if self.cache.add(key, 1, timeout=ttl):
+			return 1
+		try:
+			return self.cache.incr(key)
+		except ValueError:
+			# Expirou entre o add e o incr
+			self.cache.add(key, 1, timeout=ttl)
+			return 1
+
+	def get_many(self, keys):
+		return self.cache.get_many(keys)
+
+	def set(self, key, value, ttl):
+		self.cache.set(key, value, timeout=ttl)
+
+	def delete_many(self, keys):
+		self.cache.delete_many(keys)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_counter_store(options=None):
+	options = options or get_throttle_settings()
+	with _stores_lock:
+		store = _stores.get(options['STORE'])
+		if store is None:
+			store = _stores[options['STORE']] = import_string(options['STORE'])(options)
+		return store
+
+
+def email_ident(email):
+	"""
+	Identifica o email nas chaves sem guardá-lo em claro.
+	"""
+	return hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()[:32]
+
+
+class LoginThrottle:
+	"""
+	Janelas deslizantes, bloqueios e métricas do login (ver o módulo).
+	"""
+
+	def __init__(self, options=None):
+		self.options = options or get_throttle_settings()
+		self.store = get_counter_store(self.options)
+		self.prefix = self.options['KEY_PREFIX']
+
+	def key(self, kind, scope, ident, suffix=None):
+		key = f'{self.prefix}:{kind}:{scope}:{ident}'
+		return key if suffix is None else f'{key}:{suffix}'
+
+	def scopes(self, ip, email):
+		"""
+		[(escopo, identificador, limite, janela)], IP antes do email.
+		"""
+		scopes = []
+		if ip:
+			scopes.append(('ip', ip, self.options['IP_LIMIT'], self.options['IP_WINDOW']))
+		if email:
+			scopes.append(('email', email_ident(email), self.options['EMAIL_LIMIT'], self.options['EMAIL_WINDOW']))
+		return scopes
+
+	def record(self, metric):
+		self.store.incr(f'{self.prefix}:metricas:{metric}', None)
+
+	def check(self, ip, email):
+		"""
+		Registra a tentativa. Retorna None se permitida, ou os segundos até o fim
+		do bloqueio.
+		"""
+		now = time.time()
+		scopes = self.scopes(ip, email)
+		locks = self.store.get_many([self.key('bloqueio', scope, ident) for scope, ident, _, _ in scopes])
+		for scope, ident, _, _ in scopes:
+			until = locks.get(self.key('bloqueio', scope, ident))
+			if until is not None and until > now:
+				self.record(f'recusadas_{scope}')
+				return until - now
+
+		for scope, ident, limit, window in scopes:
+			bucket, elapsed = divmod(now, window)
+			current = self.store.incr(self.key('janela', scope, ident, int(bucket)), window * 2)
+			previous = self.store.get_many([self.key('janela', scope, ident, int(bucket) - 1)])
+			count = current + next(iter(previous.values()), 0) * (1 - elapsed / window)
+			if count > limit:
+				self.record(f'recusadas_{scope}')
+				return self.lock(scope, ident, now)
+
+		self.record('tentativas')
+		return None
+
+	def lock(self, scope, ident, now):
+		"""
+		Bloqueia o email/IP, dobrando o tempo a cada bloqueio dentro de LEVEL_TTL.
+		"""
+		level = self.store.incr(self.key('nivel', scope, ident), self.options['LEVEL_TTL'])
+		cooldown = min(self.options['COOLDOWN'] * 2 ** (level - 1), self.options['MAX_COOLDOWN'])
+		self.store.set(self.key('bloqueio', scope, ident), now + cooldown, cooldown)
+		self.record(f'bloqueios_{scope}')
+		return cooldown
+
+	def succeeded(self, email):
+		"""
+		Login correto: zera a janela e o nível do email.
+		"""
+		self.record('sucessos')
+		ident = email_ident(email)
+		bucket = int(time.time() // self.options['EMAIL_WINDOW'])
+		self.store.delete_many([
+			self.key('janela', 'email', ident, bucket),
+			self.key('janela', 'email', ident, bucket - 1),
+			self.key('nivel', 'email', ident),
+		])
+
+	def failed(self):
+		self.record('falhas')
+
+	def metrics(self):
+		values = self.store.get_many([f'{self.prefix}:metricas:{metric}' for metric in METRICS])
+		return {metric: values.get(f'{self.prefix}:metricas:{metric}', 0) for metric in METRICS}
+
+
+class LoginRateThrottle(BaseThrottle):
+	"""
+	Throttle do DRF para o LoginView: recusa (429 com Retry-After) antes de
+	a view buscar o usuário ou calcular o hash.
+
+	O IP vem do get_ident do DRF: o REMOTE_ADDR ou, atrás de proxies, o
+	X-Forwarded-For lido só até REST_FRAMEWORK['NUM_PROXIES'] saltos, para o
+	cliente não escapar do limite trocando o header a cada tentativa.
+	"""
+
+	def allow_request(self, request, view):
+		self.wait_time = None
+		options = get_throttle_settings()
+		if not options['ENABLED']:
+			return True
+		email = request.data.get('email') if hasattr(request.data, 'get') else None
+		self.wait_time = LoginThrottle(options).check(
+			self.get_ident(request), email if isinstance(email, str) else None,
+		)
+		return self.wait_time is None
+
+	def wait(self):
+		return self.wait_time
+
+
+def record_login_result(email, success):
+	"""
+	Chamado pela view depois de conferir a senha.
+	"""
+	options = get_throttle_settings()
+	if not options['ENABLED']:
+		return
+	throttle = LoginThrottle(options)
+	if success:
+		throttle.succeeded(email)
+	else:
+		throttle.failed()
@@ -1,16 +1,25 @@
+from django.db import transaction
 from django.urls import path
 from auth.views import (
-    LoginView, LogoutView, RegisterView, UserView,
-    AddressView, AddressDetailView
+    LoginView, LoginThrottleMetricsView, LogoutView, TokenRefreshView, RegisterView, UserView,
+    AddressView, AddressDetailView, AvatarView,
+    AvatarUploadView, AvatarUploadCompleteView, UserImportView
 )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('login/metricas/', LoginThrottleMetricsView.as_view(), name='login_metrics'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('user/', UserView.as_view(), name='user'),
     path('user/update/', UserView.as_view(), name='user_update'),
     path('user/delete/', UserView.as_view(), name='user_delete'),
+    path('user/avatar/upload/', AvatarUploadView.as_view(), name='user_avatar_upload'),
+    path('user/avatar/upload/complete/', AvatarUploadCompleteView.as_view(), name='user_avatar_upload_complete'),
+    # Sem a transação da requisição: cada lote da importação tem a sua (auth.bulk_import)
+    path('users/import/', transaction.non_atomic_requests(UserImportView.as_view()), name='users_import'),
+    path('users/<uuid:user_id>/avatar/', AvatarView.as_view(), name='user_avatar'),
     path('addresses/', AddressView.as_view(), name='addresses'),
     path('addresses/<uuid:address_id>/', AddressDetailView.as_view(), name='address_detail'),
 ]
\ No newline at end of file
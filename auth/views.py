@@ -1,14 +1,31 @@
-from rest_framework_simplejwt.tokens import RefreshToken
+import io
+import itertools
+import os
+import uuid
+
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.exceptions import NotFound
+from django.core import signing
+from django.http import FileResponse
+from PIL import Image, UnidentifiedImageError
+from auth.authentication import ClaimsRefreshToken
+from auth.bulk_import import UserImporter, get_import_settings, read_rows
+from auth.hashing import HashingUnavailable, password_hasher
+from auth.throttling import LoginRateThrottle, LoginThrottle, get_throttle_settings, record_login_result
 from auth.models import User, Address
+from oficio.conditional import get_not_modified, set_validators
+from oficio.permissions import IsAdministrador
+from oficio.previews import PREVIEW_CONTENT_TYPE, InvalidPreviewSize, PreviewUnavailable, preview_cache
+from core.storage import content_sha256, supports_presigned_upload
 from auth.serializer import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer, AddressSerializer,
-    LoginRequestSerializer, LogoutRequestSerializer
+    LoginRequestSerializer, LogoutRequestSerializer, TokenRefreshRequestSerializer,
+    AvatarUploadSerializer, AvatarUploadCompleteSerializer, UserImportRequestSerializer
 )
 from drf_spectacular.utils import (
     extend_schema,
@@ -94,6 +111,15 @@ from drf_spectacular.types import OpenApiTypes
                 ),
             ],
         ),
+        429: OpenApiResponse(
+            description="Servidor ocupado com outras autenticações; tente novamente após o Retry-After",
+            examples=[
+                OpenApiExample(
+                    name="Ocupado",
+                    value={"message": "Muitas requisições de autenticação no momento. Tente novamente em instantes."},
+                ),
+            ],
+        ),
     },
     examples=[
         OpenApiExample(
@@ -128,11 +154,17 @@ class RegisterView(APIView):
 	Permite criar usuário junto com endereços em uma única requisição.
 	"""
 	permission_classes = [AllowAny]
+	# Um token vencido ou revogado no header não deve impedir o cadastro
+	authentication_classes = []
 	
 	def post(self, request):
 		serializer = UserCreateSerializer(data=request.data)
 		if serializer.is_valid():
-			user = serializer.save()
+			try:
+				encoded_password = password_hasher.hash(serializer.validated_data['password'])
+			except HashingUnavailable as e:
+				return Response({'message': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+			user = serializer.save(encoded_password=encoded_password)
 			user_serializer = UserSerializer(user, context={'request': request})
 			return Response({
 				'message': 'Usuário registrado com sucesso',
@@ -184,6 +216,22 @@ class RegisterView(APIView):
                 ),
             ],
         ),
+        429: OpenApiResponse(
+            description=(
+                "Tentativas demais para o email ou IP (o bloqueio dobra a cada reincidência), "
+                "ou servidor ocupado com outras autenticações; tente novamente após o Retry-After"
+            ),
+            examples=[
+                OpenApiExample(
+                    name="Tentativas demais",
+                    value={"detail": "Pedido foi limitado. Disponível em 60 segundos."},
+                ),
+                OpenApiExample(
+                    name="Ocupado",
+                    value={"error": "Muitas requisições de autenticação no momento. Tente novamente em instantes."},
+                ),
+            ],
+        ),
     },
     examples=[
         OpenApiExample(
@@ -198,16 +246,26 @@ class RegisterView(APIView):
 )
 class LoginView(APIView):
 	permission_classes = [AllowAny]
+	# Um token vencido ou revogado no header não deve impedir o login
+	authentication_classes = []
+	# Recusa o excesso de tentativas antes da busca do usuário e do hash
+	throttle_classes = [LoginRateThrottle]
 	def post(self, request):
 		email = request.data.get('email')
 		password = request.data.get('password')
 		user = User.objects.filter(email=email).first()
 		if user is None:
+			record_login_result(email, False)
 			return Response({'error': 'Usuário não encontrado'}, status=status.HTTP_404_NOT_FOUND)
-		if not user.check_password(password):
+		try:
+			is_correct = password_hasher.check_user_password(user, password)
+		except HashingUnavailable as e:
+			return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+		record_login_result(email, is_correct)
+		if not is_correct:
 			return Response({'error': 'Credenciais inválidas'}, status=status.HTTP_401_UNAUTHORIZED)
 		if user is not None:
-			refresh = RefreshToken.for_user(user)
+			refresh = ClaimsRefreshToken.for_user(user)
 			return Response({
 				'refresh': str(refresh),
 				'access': str(refresh.access_token),
@@ -215,6 +273,62 @@ class LoginView(APIView):
 		return Response({'error': 'Credenciais inválidas'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@extend_schema(
+    tags=["Autenticação"],
+    summary="Renovar tokens",
+    description=(
+        "Emite um novo access token a partir do refresh token, com o tipo e os privilégios atuais do usuário. "
+        "Com a rotação de tokens ativa, retorna também um novo refresh token e o enviado passa para a blacklist: "
+        "cada refresh token só pode ser usado uma vez."
+    ),
+    request=TokenRefreshRequestSerializer,
+    responses={
+        200: OpenApiResponse(
+            description="Tokens renovados",
+            examples=[
+                OpenApiExample(
+                    name="Sucesso",
+                    summary="Resposta com tokens",
+                    value={
+                        "refresh": "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9.eyJ0b2tlbl90eXBlIjoicmVmcmVzaCIsImV4cCI6MTczNDU2Nzg0MCwiaWF0IjoxNzM0NDgxNDQwLCJqdGkiOiIxMjM0NTY3ODkwIiwidXNlcl9pZCI6IjU1MGU4NDAwLWUyOWItNDFkNC1hNzE2LTQ0NjY1NTQ0MDAwMCJ9...",
+                        "access": "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9.eyJ0b2tlbl90eXBlIjoiYWNjZXNzIiwiZXhwIjoxNzM0NTY3ODQwLCJpYXQiOjE3MzQ0ODE0NDAsImp0aSI6IjEyMzQ1Njc4OTAiLCJ1c2VyX2lkIjoiNTUwZTg0MDAtZTI5Yi00MWQ0LWE3MTYtNDQ2NjU1NDQwMDAwIn0...",
+                    },
+                ),
+            ],
+        ),
+        400: OpenApiResponse(description="Refresh token não informado"),
+        401: OpenApiResponse(
+            description="Token inválido, expirado, já utilizado ou usuário inativo",
+            examples=[
+                OpenApiExample(
+                    name="Token inválido",
+                    value={"message": "Token inválido"},
+                ),
+            ],
+        ),
+    },
+)
+class TokenRefreshView(APIView):
+	permission_classes = [AllowAny]
+	# O access token vencido costuma vir junto no header
+	authentication_classes = []
+	def post(self, request):
+		serializer = TokenRefreshRequestSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({
+				'message': 'Erro ao renovar o token',
+				'errors': serializer.errors
+			}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			refresh = ClaimsRefreshToken(serializer.validated_data['refresh'])
+			user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM), is_active=True).first()
+			if user is None:
+				return Response({'message': 'Usuário não encontrado ou inativo'}, status=status.HTTP_401_UNAUTHORIZED)
+			return Response(refresh.rotate(user), status=status.HTTP_200_OK)
+		except TokenError:
+			return Response({'message': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
 @extend_schema(
     tags=["Autenticação"],
     summary="Logout de usuário",
@@ -259,13 +373,71 @@ class LogoutView(APIView):
 	def post(self, request):
 		try:
 			refresh_token = request.data.get('refresh')
-			token = RefreshToken(refresh_token)
+			token = ClaimsRefreshToken(refresh_token)
 			token.blacklist()
 			return Response({'message': 'Logout realizado com sucesso'}, status=status.HTTP_200_OK)
 		except TokenError:
 			return Response({'message': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@extend_schema(
+    tags=["Autenticação"],
+    summary="Métricas do limite de tentativas de login",
+    description=(
+        "Contadores do limite de tentativas de login por email e por IP: tentativas aceitas, sucessos, falhas, "
+        "tentativas recusadas e bloqueios por escopo, além dos limites configurados. "
+        "Com o store em memória os valores são do processo que atendeu; com o store no cache, de todos os nós. "
+        "Restrito a administradores."
+    ),
+    responses={
+        200: OpenApiResponse(
+            description="Métricas",
+            examples=[
+                OpenApiExample(
+                    name="Sucesso",
+                    value={
+                        "message": "Métricas do limite de login",
+                        "result": {
+                            "store": "MemoryCounterStore",
+                            "compartilhado": False,
+                            "metricas": {
+                                "tentativas": 120, "sucessos": 95, "falhas": 25,
+                                "recusadas_email": 14, "recusadas_ip": 3,
+                                "bloqueios_email": 2, "bloqueios_ip": 1,
+                            },
+                            "limites": {
+                                "email": {"tentativas": 5, "janela": 300},
+                                "ip": {"tentativas": 20, "janela": 60},
+                                "bloqueio": {"inicial": 60, "maximo": 3600},
+                            },
+                        },
+                    },
+                ),
+            ],
+        ),
+        403: OpenApiResponse(description="Usuário não é administrador"),
+    },
+)
+class LoginThrottleMetricsView(APIView):
+	permission_classes = [IsAdministrador]
+	def get(self, request):
+		options = get_throttle_settings()
+		throttle = LoginThrottle(options)
+		return Response({
+			'message': 'Métricas do limite de login',
+			'result': {
+				'store': type(throttle.store).__name__,
+				'compartilhado': throttle.store.shared,
+				'metricas': throttle.metrics(),
+				'limites': {
+					'email': {'tentativas': options['EMAIL_LIMIT'], 'janela': options['EMAIL_WINDOW']},
+					'ip': {'tentativas': options['IP_LIMIT'], 'janela': options['IP_WINDOW']},
+					'bloqueio': {'inicial': options['COOLDOWN'], 'maximo': options['MAX_COOLDOWN']},
+				},
+			}
+		}, status=status.HTTP_200_OK)
+
+
 @extend_schema(
     tags=["Usuário"],
     summary="Obter dados do usuário autenticado",
@@ -832,3 +1004,350 @@ class AddressDetailView(APIView):
 		return Response({
 			'message': 'Endereço deletado com sucesso'
 		}, status=status.HTTP_204_NO_CONTENT)
+
+
+class AvatarView(APIView):
+	"""
+	View da miniatura do avatar de um usuário.
+	GET: Retorna o avatar recortado e redimensionado (WebP)
+	"""
+	permission_classes = [IsAuthenticated]
+	
+	@extend_schema(
+		tags=["Usuário"],
+		summary="Obter miniatura do avatar",
+		description=(
+			"Retorna o avatar do usuário recortado em quadrado e redimensionado, em WebP. "
+			"A miniatura é gerada uma vez e servida do cache; o ETag muda quando o avatar muda. "
+			"Requer autenticação via Bearer token no header Authorization."
+		),
+		parameters=[
+			OpenApiParameter(
+				"user_id",
+				OpenApiTypes.UUID,
+				OpenApiParameter.PATH,
+				description="UUID do usuário",
+			),
+			OpenApiParameter(
+				"tamanho",
+				OpenApiTypes.STR,
+				OpenApiParameter.QUERY,
+				description="Tamanho da miniatura: pequeno (padrão), medio ou grande",
+			),
+		],
+		responses={
+			(200, 'image/webp'): OpenApiResponse(response=OpenApiTypes.BINARY, description="Miniatura do avatar"),
+			304: OpenApiResponse(description="Não modificado"),
+			400: OpenApiResponse(description="Tamanho inválido"),
+			404: OpenApiResponse(description="Usuário ou avatar não encontrado"),
+			401: OpenApiTypes.OBJECT,
+		},
+	)
+	def get(self, request, user_id):
+		"""
+		Retorna a miniatura do avatar do usuário.
+		"""
+		try:
+			user = User.objects.only('id', 'avatar').get(id=user_id, is_active=True)
+			path, etag = preview_cache.avatar(user, request.query_params.get('tamanho', 'pequeno'))
+		except (User.DoesNotExist, PreviewUnavailable):
+			return Response({
+				'message': 'Avatar não encontrado'
+			}, status=status.HTTP_404_NOT_FOUND)
+		except InvalidPreviewSize as e:
+			return Response({
+				'message': 'Erro ao obter avatar',
+				'error': str(e)
+			}, status=status.HTTP_400_BAD_REQUEST)
+		
+		not_modified = get_not_modified(request, etag)
+		if not_modified is not None:
+			return not_modified
+		return set_validators(FileResponse(open(path, 'rb'), content_type=PREVIEW_CONTENT_TYPE), etag)
+
+
+AVATAR_UPLOAD_SALT = 'auth.avatar-upload'
+AVATAR_UPLOAD_MAX_AGE = 24 * 3600
+AVATAR_FORMATS = {'PNG', 'JPEG', 'WEBP', 'GIF'}
+AVATAR_HEADER_SIZE = 4096
+
+
+def get_avatar_storage():
+	"""
+	Storage de User.avatar, ou None se ele não gera URLs pré-assinadas.
+	"""
+	storage = User._meta.get_field('avatar').storage
+	return storage if supports_presigned_upload(storage) else None
+
+
+class AvatarUploadView(APIView):
+	"""
+	View para enviar o avatar direto ao storage.
+	POST: Retorna a URL pré-assinada de envio e o token para concluir
+	"""
+	permission_classes = [IsAuthenticated]
+	
+	@extend_schema(
+		tags=["Usuário"],
+		summary="Abrir envio direto do avatar",
+		description=(
+			"Gera uma URL pré-assinada para enviar o avatar direto ao storage (S3 ou compatível), "
+			"sem passar pela API. Informe nome, tamanho (máximo 5MB) e SHA-256 da imagem; envie a "
+			"imagem com o método e os headers de `result.envio` e conclua em `user/avatar/upload/complete/` "
+			"com o `result.token`. Retorna 501 se o storage de avatares não gera URLs pré-assinadas. "
+			"Requer autenticação via Bearer token no header Authorization."
+		),
+		request=AvatarUploadSerializer,
+		responses={
+			201: OpenApiTypes.OBJECT,
+			400: OpenApiResponse(description="Erro de validação"),
+			501: OpenApiResponse(description="Storage sem suporte a upload direto"),
+			401: OpenApiTypes.OBJECT,
+		},
+		examples=[
+			OpenApiExample(
+				"Exemplo de request",
+				value={
+					"nome_arquivo": "foto.png",
+					"tamanho": 48213,
+					"checksum": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+				},
+				request_only=True,
+			),
+		],
+	)
+	def post(self, request):
+		"""
+		Gera os dados de envio direto do avatar.
+		"""
+		storage = get_avatar_storage()
+		if storage is None:
+			return Response({
+				'message': 'Upload direto de avatar indisponível'
+			}, status=status.HTTP_501_NOT_IMPLEMENTED)
+		
+		serializer = AvatarUploadSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({
+				'message': 'Erro ao iniciar envio do avatar',
+				'errors': serializer.errors
+			}, status=status.HTTP_400_BAD_REQUEST)
+		
+		data = serializer.validated_data
+		extension = os.path.splitext(data['nome_arquivo'])[1].lower()
+		name = User._meta.get_field('avatar').generate_filename(None, f'{uuid.uuid4().hex}{extension}')
+		envio = storage.presigned_put(name, data['tamanho'], data['checksum'])
+		token = signing.dumps(
+			{'user': str(request.user.pk), 'name': name, 'tamanho': data['tamanho'], 'checksum': data['checksum']},
+			salt=AVATAR_UPLOAD_SALT,
+		)
+		return Response({
+			'message': 'Envio do avatar iniciado com sucesso',
+			'result': {'token': token, 'envio': envio}
+		}, status=status.HTTP_201_CREATED)
+
+
+class AvatarUploadCompleteView(APIView):
+	"""
+	View para concluir o envio direto do avatar.
+	POST: Confere a imagem no storage e atualiza o avatar do usuário
+	"""
+	permission_classes = [IsAuthenticated]
+	
+	@extend_schema(
+		tags=["Usuário"],
+		summary="Concluir envio direto do avatar",
+		description=(
+			"Confere a imagem enviada ao storage (tamanho, SHA-256 e formato, lendo só os primeiros bytes) "
+			"e passa a usá-la como avatar do usuário. Uma imagem recusada é removida do storage. "
+			"Requer autenticação via Bearer token no header Authorization."
+		),
+		request=AvatarUploadCompleteSerializer,
+		responses={
+			200: OpenApiResponse(response=UserSerializer, description="Avatar atualizado com sucesso"),
+			400: OpenApiResponse(description="Token inválido ou expirado"),
+			409: OpenApiResponse(description="Imagem ainda não enviada ao storage"),
+			415: OpenApiResponse(description="O arquivo não é uma imagem PNG, JPEG, WebP ou GIF"),
+			422: OpenApiResponse(description="Tamanho ou SHA-256 da imagem não confere"),
+			501: OpenApiResponse(description="Storage sem suporte a upload direto"),
+			401: OpenApiTypes.OBJECT,
+		},
+	)
+	def post(self, request):
+		"""
+		Conclui o envio direto do avatar.
+		"""
+		storage = get_avatar_storage()
+		if storage is None:
+			return Response({
+				'message': 'Upload direto de avatar indisponível'
+			}, status=status.HTTP_501_NOT_IMPLEMENTED)
+		
+		serializer = AvatarUploadCompleteSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({
+				'message': 'Erro ao concluir envio do avatar',
+				'errors': serializer.errors
+			}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			ticket = signing.loads(serializer.validated_data['token'], salt=AVATAR_UPLOAD_SALT, max_age=AVATAR_UPLOAD_MAX_AGE)
+		except signing.BadSignature:
+			return Response({
+				'message': 'Erro ao concluir envio do avatar',
+				'error': 'Token inválido ou expirado'
+			}, status=status.HTTP_400_BAD_REQUEST)
+		if ticket['user'] != str(request.user.pk):
+			return Response({
+				'message': 'Erro ao concluir envio do avatar',
+				'error': 'Token inválido ou expirado'
+			}, status=status.HTTP_400_BAD_REQUEST)
+		
+		name = ticket['name']
+		user = request.user
+		if user.avatar.name != name:
+			error = self.check_image(storage, name, ticket)
+			if error is not None:
+				message, status_code = error
+				return Response({
+					'message': 'Erro ao concluir envio do avatar',
+					'error': message
+				}, status=status_code)
+			
+			previous = user.avatar.name
+			user.avatar.name = name
+			user.save(update_fields=['avatar', 'updated_at'])
+			self.discard_previous(storage, previous)
+		
+		return Response({
+			'message': 'Avatar atualizado com sucesso',
+			'result': UserSerializer(user, context={'request': request}).data
+		}, status=status.HTTP_200_OK)
+	
+	def check_image(self, storage, name, ticket):
+		"""
+		Confere a imagem no storage sem baixá-la: tamanho e SHA-256 pelo HEAD
+		(ou lendo a imagem, se o bucket não devolver o checksum), formato pelos
+		primeiros bytes. Retorna (mensagem, status) ou None.
+		"""
+		info = storage.head(name)
+		if info is None:
+			return 'A imagem ainda não foi enviada ao storage', status.HTTP_409_CONFLICT
+		digest = info['sha256']
+		if digest is None and info['size'] == ticket['tamanho']:
+			with storage.open(name, 'rb') as file:
+				digest = content_sha256(file)
+		if info['size'] != ticket['tamanho'] or digest != ticket['checksum']:
+			storage.delete(name)
+			return 'Tamanho ou checksum da imagem não confere; reenvie a imagem', status.HTTP_422_UNPROCESSABLE_ENTITY
+		
+		header = storage.read_range(name, 0, min(AVATAR_HEADER_SIZE, info['size']) - 1)
+		try:
+			image_format = Image.open(io.BytesIO(header)).format
+		except (UnidentifiedImageError, OSError):
+			image_format = None
+		if image_format not in AVATAR_FORMATS:
+			storage.delete(name)
+			return 'O arquivo não é uma imagem PNG, JPEG, WebP ou GIF', status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+		return None
+	
+	def discard_previous(self, storage, name):
+		"""
+		Remove o avatar anterior do storage se ninguém mais o usa (o padrão é mantido).
+		"""
+		default = User._meta.get_field('avatar').default
+		if not name or name == default or User.objects.filter(avatar=name).exists():
+			return
+		storage.delete(name)
+
+
+@extend_schema(
+    tags=["Usuário"],
+    summary="Importar usuários em lote",
+    description=(
+        "Cria usuários e endereços em lote a partir de um arquivo CSV ou JSONL (multipart, campo arquivo) "
+        "ou de uma lista no corpo JSON (campo usuarios). As linhas são validadas em lotes, as senhas são "
+        "hasheadas em um pool de processos e usuários e endereços são gravados com inserções em bloco. "
+        "Linhas inválidas não interrompem a importação: voltam no relatório com o número da linha e os erros. "
+        "Com dry_run apenas valida. Limite de linhas por requisição em BULK_USER_IMPORT['MAX_ROWS']; "
+        "para arquivos maiores use o comando import_users. Restrito a administradores."
+    ),
+    request={
+        'multipart/form-data': UserImportRequestSerializer,
+        'application/json': UserImportRequestSerializer,
+    },
+    responses={
+        200: OpenApiResponse(
+            description="Relatório da importação",
+            examples=[
+                OpenApiExample(
+                    name="Sucesso",
+                    value={
+                        "message": "Importação concluída",
+                        "result": {
+                            "linhas": 3,
+                            "criados": 2,
+                            "enderecos": 2,
+                            "erros": [
+                                {
+                                    "linha": 3,
+                                    "email": "cedente@example.com",
+                                    "erros": {"email": ["Já existe um usuário com este email."]},
+                                },
+                            ],
+                        },
+                    },
+                ),
+            ],
+        ),
+        400: OpenApiResponse(description="Requisição inválida ou acima do limite de linhas"),
+        403: OpenApiResponse(description="Usuário não é administrador"),
+    },
+    examples=[
+        OpenApiExample(
+            "Exemplo de request (JSON)",
+            value={
+                "usuarios": [
+                    {
+                        "email": "cedente@example.com",
+                        "username": "cedente01",
+                        "password": "SenhaSegura123!",
+                        "name": "Maria Souza",
+                        "cpf": "12345678901",
+                        "type_user": "Cedente",
+                        "addresses": [{"address": "Rua Exemplo", "number": "10", "city": "Recife", "state": "PE"}],
+                    },
+                ],
+                "dry_run": False,
+            },
+            request_only=True,
+        ),
+    ],
+)
+class UserImportView(APIView):
+	permission_classes = [IsAdministrador]
+	def post(self, request):
+		serializer = UserImportRequestSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({
+				'message': 'Erro ao importar usuários',
+				'errors': serializer.errors
+			}, status=status.HTTP_400_BAD_REQUEST)
+		
+		options = get_import_settings()
+		upload = serializer.validated_data.get('arquivo')
+		if upload is not None:
+			rows = read_rows(upload, upload.name)
+		else:
+			rows = enumerate(serializer.validated_data['usuarios'], start=1)
+		rows = list(itertools.islice(rows, options['MAX_ROWS'] + 1))
+		if len(rows) > options['MAX_ROWS']:
+			return Response({
+				'message': 'Erro ao importar usuários',
+				'error': f"Limite de {options['MAX_ROWS']} linhas por requisição; use o comando import_users"
+			}, status=status.HTTP_400_BAD_REQUEST)
+		
+		report = UserImporter(options, dry_run=serializer.validated_data['dry_run']).run(rows)
+		return Response({
+			'message': 'Importação concluída',
+			'result': report
+		}, status=status.HTTP_200_OK)
@@ -0,0 +1,280 @@
+"""
+Cliente mínimo de S3 (AWS Signature Version 4) usando só a biblioteca padrão.
+
+Cobre o que os storages precisam (core.storage.S3Storage): URLs pré-assinadas
+de PUT e GET, HEAD, GET com Range, PUT em streaming, cópia no servidor e
+DELETE. Funciona com o
+S3 da AWS e com serviços compatíveis (MinIO, Ceph, R2...); em desenvolvimento
+o MinIO do docker-compose faz esse papel.
+
+Configuração em S3_STORAGE:
+
+- ENDPOINT_URL: endereço usado pelo Django (ex: http://127.0.0.1:9000);
+- PUBLIC_ENDPOINT_URL: endereço usado pelos clientes nas URLs pré-assinadas,
+  quando diferente do interno (ex: http://minio:9000 dentro do docker);
+- ADDRESSING_STYLE: "path" (`/<bucket>/<chave>`, padrão do MinIO) ou
+  "virtual" (`<bucket>.<host>/<chave>`).
+"""
+import base64
+import datetime
+import hashlib
+import hmac
+import http.client
+import urllib.parse
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+SERVICE = 's3'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+# Chaves com estes caracteres não precisam de escape na URL (RFC 3986, sem reservados)
+UNRESERVED = '-_.~'
+
+
+class S3Error(Exception):
+	"""
+	Resposta de erro do S3, com o status HTTP e o código do XML de erro.
+	"""
+	def __init__(self, status, code='', message=''):
+		super().__init__(f'{status} {code}: {message}'.strip(': '))
+		self.status = status
+		self.code = code
+		self.message = message
+
+
+def get_s3_settings():
+	options = getattr(settings, 'S3_STORAGE', {})
+	return {
+		'ENDPOINT_URL': options.get('ENDPOINT_URL', 'http://127.0.0.1:9000'),
+		'PUBLIC_ENDPOINT_URL': options.get('PUBLIC_ENDPOINT_URL') or options.get('ENDPOINT_URL', 'http://127.0.0.1:9000'),
+		'REGION': options.get('REGION', 'us-east-1'),
+		'BUCKET': options.get('BUCKET', 'lexpay'),
+		'ACCESS_KEY': options.get('ACCESS_KEY', ''),
+		'SECRET_KEY': options.get('SECRET_KEY', ''),
+		'ADDRESSING_STYLE': options.get('ADDRESSING_STYLE', 'path').lower(),
+		'PRESIGN_EXPIRES': options.get('PRESIGN_EXPIRES', 3600),
+		'TIMEOUT': options.get('TIMEOUT', 30),
+	}
+
+
+def quote(value, safe=UNRESERVED):
+	return urllib.parse.quote(value, safe=safe)
+
+
+def checksum_header(digest):
+	"""
+	Valor de `x-amz-checksum-sha256`: o SHA-256 em base64 (e não em hex).
+	"""
+	return base64.b64encode(bytes.fromhex(digest)).decode('ascii')
+
+
+def hmac_sha256(key, message):
+	return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3Client:
+	"""
+	Cliente de um bucket. As opções sobrescrevem S3_STORAGE (chaves em
+	minúsculas ou maiúsculas).
+	"""
+
+	def __init__(self, **options):
+		self.options = {**get_s3_settings(), **{key.upper(): value for key, value in options.items()}}
+
+	def endpoint(self, public=False):
+		url = self.options['PUBLIC_ENDPOINT_URL' if public else 'ENDPOINT_URL']
+		return urllib.parse.urlsplit(url)
+
+	def locate(self, key, public=False):
+		"""
+		Retorna (scheme, host, caminho) do objeto conforme o ADDRESSING_STYLE.
+		"""
+		endpoint = self.endpoint(public)
+		base_path = endpoint.path.rstrip('/')
+		key = quote(key, safe=UNRESERVED + '/')
+		if self.options['ADDRESSING_STYLE'] == 'virtual':
+			return endpoint.scheme, f"{self.options['BUCKET']}.{endpoint.netloc}", f'{base_path}/{key}'
+		return endpoint.scheme, endpoint.netloc, f"{base_path}/{quote(self.options['BUCKET'])}/{key}"
+
+	def signing_key(self, date):
+		key = hmac_sha256(('AWS4' + self.options['SECRET_KEY']).encode('utf-8'), date)
+		key = hmac.new(key, self.options['REGION'].encode('utf-8'), hashlib.sha256).digest()
+		key = hmac.new(key, SERVICE.encode('utf-8'), hashlib.sha256).digest()
+		return hmac.new(key, b'aws4_request', hashlib.sha256).digest()
+
+	def scope(self, date):
+		return f"{date}/{self.options['REGION']}/{SERVICE}/aws4_request"
+
+	def signature(self, method, path, query, headers, payload_hash, timestamp):
+		"""
+		Assina a requisição canônica. `headers` já em minúsculas e incluindo host.
+		Retorna (assinatura, headers assinados).
+		"""
+		canonical_query = '&'.join(
+			f'{quote(name)}={quote(value)}' for name, value in sorted(query.items())
+		)
+		names = sorted(headers)
+		canonical_headers = ''.join(f"{name}:{' '.join(str(headers[name]).split())}\n" for name in names)
+		signed_headers = ';'.join(names)
+		canonical_request = '\n'.join([
+			method, path, canonical_query, canonical_headers, signed_headers, payload_hash,
+		])
+		string_to_sign = '\n'.join([
+			ALGORITHM,
+			timestamp,
+			self.scope(timestamp[:8]),
+			hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+		])
+		signature = hmac.new(
+			self.signing_key(timestamp[:8]), string_to_sign.encode('utf-8'), hashlib.sha256,
+		).hexdigest()
+		return signature, signed_headers
+
+	@staticmethod
+	def timestamp():
+		return datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+	def presign(self, method, key, expires=None, headers=None, query=None):
+		"""
+		URL pré-assinada (assinatura na query string). Os `headers` informados
+		entram na assinatura e o cliente precisa enviá-los com os mesmos valores
+		(ex: Content-Length e x-amz-checksum-sha256 de um PUT).
+		"""
+		scheme, host, path = self.locate(key, public=True)
+		timestamp = self.timestamp()
+		signed = {name.lower(): value for name, value in (headers or {}).items()}
+		signed['host'] = host
+		query = {
+			**(query or {}),
+			'X-Amz-Algorithm': ALGORITHM,
+			'X-Amz-Credential': f"{self.options['ACCESS_KEY']}/{self.scope(timestamp[:8])}",
+			'X-Amz-Date': timestamp,
+			'X-Amz-Expires': str(int(expires or self.options['PRESIGN_EXPIRES'])),
+			'X-Amz-SignedHeaders': ';'.join(sorted(signed)),
+		}
+		signature, _ = self.signature(method, path, query, signed, UNSIGNED_PAYLOAD, timestamp)
+		query['X-Amz-Signature'] = signature
+		return f'{scheme}://{host}{path}?' + '&'.join(
+			f'{quote(name)}={quote(value)}' for name, value in sorted(query.items())
+		)
+
+	def request(self, method, key, headers=None, body=None, payload_hash=UNSIGNED_PAYLOAD):
+		"""
+		Requisição assinada no header Authorization. `body` pode ser bytes ou
+		um arquivo (enviado em blocos; Content-Length deve estar nos headers).
+		Retorna a resposta aberta; erros viram S3Error.
+		"""
+		scheme, host, path = self.locate(key)
+		timestamp = self.timestamp()
+		headers = {name.lower(): value for name, value in (headers or {}).items()}
+		headers.update({'host': host, 'x-amz-date': timestamp, 'x-amz-content-sha256': payload_hash})
+		signature, signed_headers = self.signature(method, path, {}, headers, payload_hash, timestamp)
+		headers['authorization'] = (
+			f"{ALGORITHM} Credential={self.options['ACCESS_KEY']}/{self.scope(timestamp[:8])}, "
+			f'SignedHeaders={signed_headers}, Signature={signature}'
+		)
+		# Sem keep-alive: a conexão é fechada junto com a resposta
+		headers['connection'] = 'close'
+
+		connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+		connection = connection_class(host, timeout=self.options['TIMEOUT'], blocksize=64 * 1024)
+		try:
+			connection.request(method, path, body=body, headers=headers)
+			response = connection.getresponse()
+		except Exception:
+			connection.close()
+			raise
+		if response.status >= 300:
+			content = response.read()
+			connection.close()
+			raise self.error(response.status, content)
+		return response
+
+	@staticmethod
+	def error(status, content):
+		code = message = ''
+		if content:
+			try:
+				root = ElementTree.fromstring(content)
+				code = root.findtext('Code') or ''
+				message = root.findtext('Message') or ''
+			except ElementTree.ParseError:
+				message = content[:200].decode('utf-8', 'replace')
+		return S3Error(status, code, message)
+
+	def head(self, key):
+		"""
+		Metadados do objeto (tamanho, ETag, SHA-256 quando gravado com checksum,
+		content type e data de modificação), ou None se não existe.
+		"""
+		try:
+			response = self.request('HEAD', key, headers={'x-amz-checksum-mode': 'ENABLED'})
+		except S3Error as e:
+			if e.status == 404:
+				return None
+			raise
+		response.read()
+		response.close()
+		checksum = response.getheader('x-amz-checksum-sha256')
+		modified = response.getheader('Last-Modified')
+		return {
+			'size': int(response.getheader('Content-Length', 0)),
+			'etag': response.getheader('ETag', '').strip('"'),
+			'sha256': base64.b64decode(checksum).hex() if checksum else None,
+			'content_type': response.getheader('Content-Type'),
+			'modified': (
+				datetime.datetime.strptime(modified, '%a, %d %b %Y %H:%M:%S GMT').replace(tzinfo=datetime.timezone.utc)
+				if modified else None
+			),
+		}
+
+	def get(self, key, start=None, end=None):
+		"""
+		Abre o objeto para leitura, opcionalmente só o intervalo [start, end].
+		Levanta FileNotFoundError se o objeto não existe.
+		"""
+		headers = {}
+		if start is not None or end is not None:
+			headers['range'] = f"bytes={start or 0}-{'' if end is None else end}"
+		try:
+			return self.request('GET', key, headers=headers)
+		except S3Error as e:
+			if e.status == 404:
+				raise FileNotFoundError(key) from e
+			raise
+
+	def put(self, key, body, size, content_type=None, sha256=None):
+		"""
+		Grava o objeto. Com `sha256` (hex) o S3 confere o conteúdo recebido e
+		guarda o checksum, que depois volta no HEAD.
+		"""
+		headers = {'content-length': str(size), 'content-type': content_type or 'application/octet-stream'}
+		if sha256:
+			headers['x-amz-checksum-sha256'] = checksum_header(sha256)
+		response = self.request('PUT', key, headers=headers, body=body)
+		response.read()
+		response.close()
+
+	def copy(self, source, key):
+		"""
+		Copia o objeto `source` para `key` dentro do bucket, sem passar os bytes
+		pelo Django. O S3 calcula e guarda o SHA-256 da cópia.
+		"""
+		headers = {
+			'x-amz-copy-source': f"/{quote(self.options['BUCKET'])}/{quote(source, safe=UNRESERVED + '/')}",
+			'x-amz-checksum-algorithm': 'SHA256',
+		}
+		response = self.request('PUT', key, headers=headers)
+		content = response.read()
+		response.close()
+		# A cópia pode falhar depois do status 200: o erro vem no corpo
+		if b'<Error>' in content:
+			raise self.error(response.status, content)
+
+	def delete(self, key):
+		response = self.request('DELETE', key)
+		response.read()
+		response.close()
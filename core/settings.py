@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'rest_framework_simplejwt',
@@ -122,6 +123,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashers de senha: o primeiro é o padrão dos hashes novos. O PBKDF2 com custo
+# configurável (auth.hashing) usa o mesmo algoritmo do padrão do Django.
+PASSWORD_HASHERS = [
+    "auth.hashing.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Hash de senhas no login/cadastro com concorrência limitada, com 429 quando
+# não há vaga, e atualização do hash no login para o hasher PREFERRED (auth.hashing)
+PASSWORD_HASHING = {
+    "MAX_WORKERS": config("PASSWORD_HASHING_MAX_WORKERS", default=2, cast=int),
+    "MAX_PENDING": config("PASSWORD_HASHING_MAX_PENDING", default=32, cast=int),
+    "QUEUE_TIMEOUT": config("PASSWORD_HASHING_QUEUE_TIMEOUT", default=1, cast=float),
+    "RETRY_AFTER": config("PASSWORD_HASHING_RETRY_AFTER", default=1, cast=int),
+    # Algoritmo dos hashes novos e atualizados (ex: pbkdf2_sha256, argon2, scrypt); vazio = primeiro de PASSWORD_HASHERS
+    "PREFERRED": config("PASSWORD_HASHER", default=""),
+    # Iterações do PBKDF2; vazio = padrão do Django
+    "PBKDF2_ITERATIONS": config("PASSWORD_PBKDF2_ITERATIONS", default=0, cast=int) or None,
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -144,12 +169,100 @@ STATIC_URL = 'static/'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+# Upload retomável de documentos (oficio.uploads)
+DOCUMENTO_UPLOAD = {
+    "TEMP_DIR": config("DOCUMENTO_UPLOAD_TEMP_DIR", default=str(BASE_DIR / "tmp" / "uploads")),
+    "CHUNK_SIZE": config("DOCUMENTO_UPLOAD_CHUNK_SIZE", default=64 * 1024, cast=int),
+}
+
+# Download autorizado de documentos (oficio.downloads)
+# BACKEND: "python" (Django envia o arquivo, com Range), "x-accel-redirect" (nginx),
+# "x-sendfile" (Apache/lighttpd) ou "redirect" (URL pré-assinada do S3_STORAGE)
+DOCUMENTO_DOWNLOAD = {
+    "BACKEND": config("DOCUMENTO_DOWNLOAD_BACKEND", default="python"),
+    "INTERNAL_PREFIX": config("DOCUMENTO_DOWNLOAD_INTERNAL_PREFIX", default="/protected-media/"),
+}
+
+# Extração de texto dos documentos (oficio.extraction_queue / run_extraction_worker)
+DOCUMENTO_EXTRACTION = {
+    "WORKERS": config("DOCUMENTO_EXTRACTION_WORKERS", default=2, cast=int),
+    "BATCH_SIZE": config("DOCUMENTO_EXTRACTION_BATCH_SIZE", default=10, cast=int),
+    "POLL_INTERVAL": config("DOCUMENTO_EXTRACTION_POLL_INTERVAL", default=5, cast=int),
+    "MAX_ATTEMPTS": config("DOCUMENTO_EXTRACTION_MAX_ATTEMPTS", default=3, cast=int),
+    "RETRY_DELAY": config("DOCUMENTO_EXTRACTION_RETRY_DELAY", default=60, cast=int),
+    "STALE_AFTER": config("DOCUMENTO_EXTRACTION_STALE_AFTER", default=600, cast=int),
+}
+
+# Cache em disco das miniaturas de documentos e avatares (oficio.previews)
+PREVIEW_CACHE = {
+    "ROOT": config("PREVIEW_CACHE_ROOT", default=str(BASE_DIR / "cache" / "previews")),
+    "MAX_BYTES": config("PREVIEW_CACHE_MAX_BYTES", default=256 * 1024 * 1024, cast=int),
+    "SIZES": {"pequeno": 160, "medio": 480, "grande": 1024},
+    "EAGER": config("PREVIEW_CACHE_EAGER", default=True, cast=bool),
+    "WORKERS": config("PREVIEW_CACHE_WORKERS", default=1, cast=int),
+}
+
+# Exportação de documentos em ZIP (oficio.exports)
+DOCUMENTO_EXPORT = {
+    "CHUNK_SIZE": config("DOCUMENTO_EXPORT_CHUNK_SIZE", default=256 * 1024, cast=int),
+    "COMPRESSION": config("DOCUMENTO_EXPORT_COMPRESSION", default="stored"),
+}
+
+# Coleta de arquivos órfãos do MEDIA_ROOT (oficio.media_gc / collect_orphan_media)
+MEDIA_GC = {
+    "ROOTS": ["avatars", "precatorios/docs"],
+    "MIN_AGE": config("MEDIA_GC_MIN_AGE", default=24 * 3600, cast=int),
+    "BATCH_SIZE": config("MEDIA_GC_BATCH_SIZE", default=500, cast=int),
+    "MAX_OPS_PER_SECOND": config("MEDIA_GC_MAX_OPS_PER_SECOND", default=200, cast=int),
+    "UPLOAD_EXPIRES": config("MEDIA_GC_UPLOAD_EXPIRES", default=7 * 24 * 3600, cast=int),
+}
+
+# Bucket S3 (ou compatível, ex: o MinIO do docker-compose) usado pelos storages
+# core.storage.S3Storage / oficio.storage.ContentAddressedS3Storage e pelo upload direto (core.s3)
+S3_STORAGE = {
+    "ENDPOINT_URL": config("S3_ENDPOINT_URL", default="http://127.0.0.1:9000"),
+    "PUBLIC_ENDPOINT_URL": config("S3_PUBLIC_ENDPOINT_URL", default=""),
+    "REGION": config("S3_REGION", default="us-east-1"),
+    "BUCKET": config("S3_BUCKET", default="lexpay"),
+    "ACCESS_KEY": config("S3_ACCESS_KEY", default=""),
+    "SECRET_KEY": config("S3_SECRET_KEY", default=""),
+    "ADDRESSING_STYLE": config("S3_ADDRESSING_STYLE", default="path"),
+    "PRESIGN_EXPIRES": config("S3_PRESIGN_EXPIRES", default=3600, cast=int),
+}
+
+# Validação do conteúdo dos documentos (oficio.content)
+DOCUMENTO_VALIDATION = {
+    "DEEP_CHECKS": config("DOCUMENTO_VALIDATION_DEEP_CHECKS", default=True, cast=bool),
+    "MAX_WORKERS": config("DOCUMENTO_VALIDATION_MAX_WORKERS", default=2, cast=int),
+    "MAX_PENDING": config("DOCUMENTO_VALIDATION_MAX_PENDING", default=8, cast=int),
+    "TIMEOUT": config("DOCUMENTO_VALIDATION_TIMEOUT", default=30, cast=int),
+}
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    # Documentos endereçados pelo SHA-256 do conteúdo (oficio.storage); com
+    # oficio.storage.ContentAddressedS3Storage os arquivos ficam no S3_STORAGE
+    # e os documentos podem ser enviados direto ao bucket
+    "documentos": {
+        "BACKEND": config("DOCUMENTO_STORAGE_BACKEND", default="oficio.storage.ContentAddressedStorage"),
+    },
+    # Avatares dos usuários (User.avatar); core.storage.S3Storage para o bucket
+    "avatars": {
+        "BACKEND": config("AVATAR_STORAGE_BACKEND", default="django.core.files.storage.FileSystemStorage"),
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -161,6 +274,9 @@ REST_FRAMEWORK = {
     'DATETIME_INPUT_FORMATS': ["%d-%m-%Y %H:%M"],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Proxies reversos na frente da API. Com 0 o IP do cliente (throttles) é o
+    # REMOTE_ADDR e o X-Forwarded-For, que o cliente controla, é ignorado.
+    'NUM_PROXIES': config("NUM_PROXIES", default=0, cast=int),
 }
 
 SIMPLE_JWT = {
@@ -174,6 +290,82 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
 
+# Autenticação pelas claims do access token, sem buscar o usuário no banco
+# a cada requisição (auth.authentication)
+TOKEN_CLAIMS_AUTH = {
+    "ENABLED": config("TOKEN_CLAIMS_AUTH_ENABLED", default=True, cast=bool),
+    "VERSION_CACHE_TTL": config("TOKEN_CLAIMS_AUTH_VERSION_CACHE_TTL", default=30, cast=int),
+    "VERSION_CACHE_SIZE": config("TOKEN_CLAIMS_AUTH_VERSION_CACHE_SIZE", default=10000, cast=int),
+}
+
+# Blacklist de refresh tokens: filtro em memória das verificações e limpeza
+# dos tokens expirados (auth.blacklist / prune_token_blacklist)
+TOKEN_BLACKLIST = {
+    "FILTER_ENABLED": config("TOKEN_BLACKLIST_FILTER_ENABLED", default=True, cast=bool),
+    "SYNC_INTERVAL": config("TOKEN_BLACKLIST_SYNC_INTERVAL", default=5, cast=int),
+    "SYNC_OVERLAP": config("TOKEN_BLACKLIST_SYNC_OVERLAP", default=1000, cast=int),
+    "REBUILD_INTERVAL": config("TOKEN_BLACKLIST_REBUILD_INTERVAL", default=3600, cast=int),
+    "CAPACITY": config("TOKEN_BLACKLIST_CAPACITY", default=100000, cast=int),
+    "FALSE_POSITIVE_RATE": config("TOKEN_BLACKLIST_FALSE_POSITIVE_RATE", default=0.01, cast=float),
+    "PRUNE_BATCH_SIZE": config("TOKEN_BLACKLIST_PRUNE_BATCH_SIZE", default=1000, cast=int),
+}
+
+# Importação de usuários em lote (auth.bulk_import / import_users)
+BULK_USER_IMPORT = {
+    "BATCH_SIZE": config("BULK_USER_IMPORT_BATCH_SIZE", default=500, cast=int),
+    "HASH_WORKERS": config("BULK_USER_IMPORT_HASH_WORKERS", default=2, cast=int),
+    "HASH_CHUNK": config("BULK_USER_IMPORT_HASH_CHUNK", default=50, cast=int),
+    "MAX_ROWS": config("BULK_USER_IMPORT_MAX_ROWS", default=5000, cast=int),
+}
+
+# Limite de tentativas de login por email e por IP, com bloqueio progressivo
+# (auth.throttling). Para vários nós use auth.throttling.CacheCounterStore
+# com um cache compartilhado (Redis/memcached) em LOGIN_THROTTLE_CACHE_ALIAS.
+LOGIN_THROTTLE = {
+    "ENABLED": config("LOGIN_THROTTLE_ENABLED", default=True, cast=bool),
+    "STORE": config("LOGIN_THROTTLE_STORE", default="auth.throttling.MemoryCounterStore"),
+    "CACHE_ALIAS": config("LOGIN_THROTTLE_CACHE_ALIAS", default="default"),
+    "EMAIL_LIMIT": config("LOGIN_THROTTLE_EMAIL_LIMIT", default=5, cast=int),
+    "EMAIL_WINDOW": config("LOGIN_THROTTLE_EMAIL_WINDOW", default=300, cast=int),
+    "IP_LIMIT": config("LOGIN_THROTTLE_IP_LIMIT", default=20, cast=int),
+    "IP_WINDOW": config("LOGIN_THROTTLE_IP_WINDOW", default=60, cast=int),
+    "COOLDOWN": config("LOGIN_THROTTLE_COOLDOWN", default=60, cast=int),
+    "MAX_COOLDOWN": config("LOGIN_THROTTLE_MAX_COOLDOWN", default=3600, cast=int),
+    "LEVEL_TTL": config("LOGIN_THROTTLE_LEVEL_TTL", default=24 * 3600, cast=int),
+}
+
+# Cache
+# Backend configurável por ambiente: LocMemCache (padrão), FileBasedCache
+# ou RedisCache (django.core.cache.backends.redis.RedisCache, requer redis-py).
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="lexpay"),
+    },
+}
+OFICIO_CACHE_ALIAS = config("OFICIO_CACHE_ALIAS", default="default")
+
+# Processos do servidor web (o gunicorn lê a mesma variável). Com mais de um,
+# caches invalidados por signal precisam de um backend compartilhado (ex: Redis).
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=1, cast=int)
+
+# Cache das páginas da vitrine de precatórios disponíveis (oficio.cache)
+PRECATORIO_MARKETPLACE_CACHE = {
+    "ENABLED": config("PRECATORIO_MARKETPLACE_CACHE_ENABLED", default=True, cast=bool),
+    "TIMEOUT": config("PRECATORIO_MARKETPLACE_CACHE_TIMEOUT", default=60, cast=int),
+    # Alias em CACHES; vazio usa OFICIO_CACHE_ALIAS. Precisa ser compartilhado entre os workers
+    "CACHE_ALIAS": config("PRECATORIO_MARKETPLACE_CACHE_ALIAS", default=""),
+}
+
+# Contagem da listagem de precatórios (oficio.counting)
+PRECATORIO_COUNT = {
+    "ESTIMATE_THRESHOLD": config("PRECATORIO_COUNT_ESTIMATE_THRESHOLD", default=10000, cast=int),
+    "CACHE_TIMEOUT": config("PRECATORIO_COUNT_CACHE_TIMEOUT", default=300, cast=int),
+}
+
+# Visibilidade de Broker/Advogado: 'union' (UNION ALL de ramos indexados) ou 'or'
+PRECATORIO_VISIBILITY_STRATEGY = config("PRECATORIO_VISIBILITY_STRATEGY", default="union")
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'LexPay',
     'DESCRIPTION': 'Esta é a documentação da API LexPay, um sistema de gerenciamento de precatórios e pagamentos inspirados no Celer..',
@@ -193,6 +385,7 @@ SPECTACULAR_SETTINGS = {
         {'name': 'Usuário', 'description': 'Configurações referentes aos usuários do sistema'},
         {'name': 'Endereço', 'description': 'Configurações referentes aos endereços do sistema'},
         {'name': 'Precatórios', 'description': 'Configurações referentes aos precatórios do sistema'},
+        {'name': 'Documentos', 'description': 'Configurações referentes aos documentos dos precatórios'},
     ],
     'SORT_OPERATIONS': False,
     'ENUM_NAME_OVERRIDES': {},
@@ -0,0 +1,253 @@
+"""
+Storages e utilitários de arquivo compartilhados pelos apps: o S3Storage
+(bucket S3 ou compatível, ver core.s3), o storage dos avatares e helpers
+como content_sha256 e local_path. Os storages endereçados pelo conteúdo dos
+documentos ficam em oficio.storage.
+"""
+import datetime
+import hashlib
+import io
+import mimetypes
+import os
+import posixpath
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.http import content_disposition_header
+
+from .s3 import S3Client, checksum_header
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_sha256(content):
+	"""
+	SHA-256 (hex) de um File lido em blocos, voltando ao início no fim.
+	"""
+	digest = hashlib.sha256()
+	if hasattr(content, 'seek'):
+		content.seek(0)
+	for chunk in content.chunks():
+		digest.update(chunk)
+	if hasattr(content, 'seek'):
+		content.seek(0)
+	return digest.hexdigest()
+
+
+class S3ObjectFile(io.RawIOBase):
+	"""
+	Leitura de um objeto do S3 sob demanda: o GET (com Range a partir da
+	posição atual) só é aberto na primeira leitura e reaberto após um seek,
+	então servir um intervalo ou copiar o arquivo não baixa o objeto inteiro
+	antes.
+	"""
+
+	def __init__(self, client, key, size):
+		super().__init__()
+		self.client = client
+		self.key = key
+		self.size = size
+		self._position = 0
+		self._response = None
+
+	def readable(self):
+		return True
+
+	def seekable(self):
+		return True
+
+	def tell(self):
+		return self._position
+
+	def seek(self, offset, whence=io.SEEK_SET):
+		if whence == io.SEEK_CUR:
+			offset += self._position
+		elif whence == io.SEEK_END:
+			offset += self.size
+		offset = max(offset, 0)
+		if offset != self._position:
+			self._close_response()
+			self._position = offset
+		return self._position
+
+	def readinto(self, buffer):
+		if self._position >= self.size:
+			return 0
+		if self._response is None:
+			self._response = self.client.get(self.key, start=self._position)
+		count = self._response.readinto(buffer)
+		self._position += count
+		return count
+
+	def _close_response(self):
+		if self._response is not None:
+			self._response.close()
+			self._response = None
+
+	def close(self):
+		self._close_response()
+		super().close()
+
+
+@deconstructible(path='core.storage.S3Storage')
+class S3Storage(Storage):
+	"""
+	Storage em um bucket S3 (ou compatível), configurado por S3_STORAGE
+	(ver core.s3); `options` sobrescreve as chaves, e `location` é um
+	prefixo aplicado a todos os nomes.
+
+	Além da API de Storage, gera URLs pré-assinadas para o cliente enviar
+	(presigned_put) e baixar (url) o arquivo direto do bucket, sem os bytes
+	passarem pelo Django. Não há caminho local: quem precisa de um arquivo em
+	disco usa local_path().
+	"""
+
+	def __init__(self, location='', **options):
+		self.location = location.strip('/')
+		self.options = options
+		self._client = None
+
+	@property
+	def client(self):
+		if self._client is None:
+			self._client = S3Client(**self.options)
+		return self._client
+
+	def key(self, name):
+		name = name.replace('\\', '/').lstrip('/')
+		return posixpath.join(self.location, name) if self.location else name
+
+	def head(self, name):
+		"""
+		Metadados do objeto (ver S3Client.head), ou None se não existe.
+		"""
+		return self.client.head(self.key(name))
+
+	def _open(self, name, mode='rb'):
+		if 'w' in mode or 'a' in mode or '+' in mode:
+			raise ValueError('S3Storage só abre arquivos para leitura.')
+		info = self.head(name)
+		if info is None:
+			raise FileNotFoundError(name)
+		file = File(io.BufferedReader(S3ObjectFile(self.client, self.key(name), info['size']), CHUNK_SIZE), name=name)
+		file.size = info['size']
+		return file
+
+	def _put(self, name, content, digest):
+		if hasattr(content, 'seek'):
+			content.seek(0)
+		content_type = getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+		self.client.put(self.key(name), content, content.size, content_type=content_type, sha256=digest)
+		return name
+
+	def _save(self, name, content):
+		return self._put(name, content, content_sha256(content))
+
+	def read_range(self, name, start, end):
+		"""
+		Bytes [start, end] do objeto, sem baixar o resto (ex: conferir a
+		assinatura de um arquivo enviado direto ao bucket).
+		"""
+		response = self.client.get(self.key(name), start=start, end=end)
+		try:
+			return response.read()
+		finally:
+			response.close()
+
+	def copy(self, name, new_name):
+		"""
+		Copia o objeto dentro do bucket (ex: promover o envio de um upload
+		direto para o nome definitivo).
+		"""
+		self.client.copy(self.key(name), self.key(new_name))
+		return new_name
+
+	def delete(self, name):
+		self.client.delete(self.key(name))
+
+	def exists(self, name):
+		return self.head(name) is not None
+
+	def size(self, name):
+		info = self.head(name)
+		if info is None:
+			raise FileNotFoundError(name)
+		return info['size']
+
+	def get_modified_time(self, name):
+		info = self.head(name)
+		if info is None:
+			raise FileNotFoundError(name)
+		modified = info['modified'] or datetime.datetime.now(datetime.timezone.utc)
+		return modified if settings.USE_TZ else timezone.make_naive(modified)
+
+	def url(self, name, filename=None, as_attachment=False, content_type=None, expires=None):
+		"""
+		URL pré-assinada de GET. Com `filename` o bucket responde com
+		Content-Disposition (o objeto pode ter um nome técnico, ex: o SHA-256).
+		"""
+		query = {}
+		if filename:
+			query['response-content-disposition'] = content_disposition_header(as_attachment, filename)
+		if content_type:
+			query['response-content-type'] = content_type
+		return self.client.presign('GET', self.key(name), expires=expires, query=query)
+
+	def presigned_put(self, name, size, sha256, content_type=None, expires=None):
+		"""
+		Dados para o cliente enviar o arquivo direto ao bucket: URL pré-assinada
+		de PUT e os headers que precisam ir junto. Content-Length e o checksum
+		entram na assinatura, então o bucket recusa um corpo de outro tamanho
+		ou com outro SHA-256.
+		"""
+		expires = int(expires or self.client.options['PRESIGN_EXPIRES'])
+		headers = {
+			'Content-Length': str(size),
+			'Content-Type': content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream',
+			'x-amz-checksum-sha256': checksum_header(sha256),
+		}
+		return {
+			'method': 'PUT',
+			'url': self.client.presign('PUT', self.key(name), expires=expires, headers=headers),
+			'headers': headers,
+			'expires_at': timezone.localtime(timezone.now() + datetime.timedelta(seconds=expires)),
+		}
+
+
+def supports_presigned_upload(storage):
+	return callable(getattr(storage, 'presigned_put', None))
+
+
+@contextmanager
+def local_path(fieldfile):
+	"""
+	Caminho local do arquivo de um FileField: o próprio arquivo em storages de
+	disco, ou uma cópia temporária (apagada na saída) em storages remotos.
+	"""
+	try:
+		path = fieldfile.storage.path(fieldfile.name)
+	except NotImplementedError:
+		path = None
+	if path is not None:
+		yield path
+		return
+
+	with tempfile.NamedTemporaryFile(suffix=os.path.splitext(fieldfile.name)[1]) as copy:
+		with fieldfile.storage.open(fieldfile.name, 'rb') as source:
+			shutil.copyfileobj(source, copy, CHUNK_SIZE)
+		copy.flush()
+		yield copy.name
+
+
+def get_avatar_storage():
+	"""
+	Storage do campo User.avatar (alias 'avatars' em STORAGES).
+	"""
+	return storages['avatars']
@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.http import FileResponse, Http404
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from django.urls import reverse
+from django.urls import path, reverse
+from .downloads import build_download_response
 from .models import Tribunal, EnteDevedor, Precatorio, Documento
+from .previews import PREVIEW_CONTENT_TYPE, InvalidPreviewSize, PreviewUnavailable, preview_cache
 
 
 @admin.register(Tribunal)
@@ -289,6 +292,8 @@ class DocumentoAdmin(admin.ModelAdmin):
 		'enviado_em',
 		'get_file_type',
 		'get_file_size_display',
+		'content_type',
+		'sha256',
 		'get_file_preview'
 	)
 	
@@ -302,6 +307,8 @@ class DocumentoAdmin(admin.ModelAdmin):
 			'fields': (
 				'get_file_type',
 				'get_file_size_display',
+				'content_type',
+				'sha256',
 				'get_file_preview'
 			)
 		}),
@@ -336,11 +343,13 @@ class DocumentoAdmin(admin.ModelAdmin):
 			if extension:
 				if obj.is_pdf():
 					return format_html(
-						'<span style="color: #d32f2f; font-weight: bold;">PDF</span>'
+						'<span style="color: #d32f2f; font-weight: bold;">{}</span>',
+						'PDF'
 					)
 				elif obj.is_word():
 					return format_html(
-						'<span style="color: #1976d2; font-weight: bold;">WORD</span>'
+						'<span style="color: #1976d2; font-weight: bold;">{}</span>',
+						'WORD'
 					)
 				return extension.upper()
 		return '-'
@@ -361,17 +370,66 @@ class DocumentoAdmin(admin.ModelAdmin):
 	
 	def get_file_preview(self, obj):
 		"""
-		Exibe link para visualizar/download do arquivo.
+		Exibe a miniatura da primeira página e o link para abrir o arquivo.
+		
+		Os dois passam por views do próprio admin, pois os documentos não são
+		servidos pelo MEDIA_URL.
 		"""
-		if obj.arquivo:
+		if obj.pk and obj.arquivo:
+			file_url = reverse('admin:oficio_documento_arquivo', args=[obj.pk])
 			return format_html(
-				'<a href="{}" target="_blank" class="button">Abrir Arquivo</a>',
-				obj.arquivo.url
+				'<a href="{}" target="_blank"><img src="{}" alt="{}" style="max-width: 240px; border: 1px solid #ddd;"></a>'
+				'<br><a href="{}" target="_blank" class="button">Abrir Arquivo</a>',
+				file_url,
+				reverse('admin:oficio_documento_preview', args=[obj.pk]),
+				obj.titulo,
+				file_url
 			)
 		return '-'
 	
 	get_file_preview.short_description = 'Visualizar Arquivo'
 	
+	def get_urls(self):
+		"""
+		Adiciona as views de miniatura e de arquivo do documento.
+		"""
+		custom_urls = [
+			path(
+				'<path:object_id>/preview/',
+				self.admin_site.admin_view(self.preview_view),
+				name='oficio_documento_preview'
+			),
+			path(
+				'<path:object_id>/arquivo/',
+				self.admin_site.admin_view(self.file_view),
+				name='oficio_documento_arquivo'
+			),
+		]
+		return custom_urls + super().get_urls()
+	
+	def get_visible_object(self, request, object_id):
+		documento = self.get_object(request, object_id)
+		if documento is None or not documento.arquivo or not self.has_view_permission(request, documento):
+			raise Http404
+		return documento
+	
+	def preview_view(self, request, object_id):
+		"""
+		Entrega a miniatura do documento (cache em disco, ver oficio.previews).
+		"""
+		documento = self.get_visible_object(request, object_id)
+		try:
+			path, _ = preview_cache.documento(documento, request.GET.get('tamanho', 'medio'))
+			return FileResponse(open(path, 'rb'), content_type=PREVIEW_CONTENT_TYPE)
+		except (InvalidPreviewSize, PreviewUnavailable, FileNotFoundError):
+			raise Http404
+	
+	def file_view(self, request, object_id):
+		"""
+		Entrega o arquivo do documento para visualização no navegador.
+		"""
+		return build_download_response(request, self.get_visible_object(request, object_id), as_attachment=False)
+	
 	def get_queryset(self, request):
 		"""
 		Otimiza as queries usando select_related.
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class OficioConfig(AppConfig):
     name = 'oficio'
+
+    def ready(self):
+        """
+        Método chamado quando o app está pronto.
+        Importa os signals e os checks para que sejam registrados automaticamente.
+        """
+        import oficio.checks
+        import oficio.signals
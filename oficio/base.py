@@ -1,9 +1,9 @@
 from rest_framework import generics, permissions
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
 
+from .filters import PrecatorioFilterSet, PrecatorioOrderingFilter, PrecatorioSearchFilter
 from .models import Precatorio
-from .serializer import PrecatorioSerializer
+from .serializer import PrecatorioSerializer, get_related_to_load
 
 
 class BasePrecatorioView(generics.GenericAPIView):
@@ -13,15 +13,8 @@ class BasePrecatorioView(generics.GenericAPIView):
 	serializer_class = PrecatorioSerializer
 	permission_classes = [permissions.IsAuthenticated]
 	
-	filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-	filterset_fields = {
-		'status': ['exact'],
-		'tribunal': ['exact'],
-		'ente_devedor': ['exact'],
-		'natureza': ['exact'],
-		'ano_orcamentario': ['exact', 'gte', 'lte'],
-		'valor_principal': ['gte', 'lte'],
-	}
+	filter_backends = [DjangoFilterBackend, PrecatorioSearchFilter, PrecatorioOrderingFilter]
+	filterset_class = PrecatorioFilterSet
 	search_fields = ['numero_processo', 'descricao']
 	ordering_fields = ['valor_principal', 'created_at', 'ano_orcamentario']
 	ordering = ['-created_at']
@@ -30,13 +23,16 @@ class BasePrecatorioView(generics.GenericAPIView):
 		"""
 		Retorna queryset otimizado e aplica filtros baseados nas Permissions.
 		Isso evita repetir código em cada View.
+		
+		Só faz JOIN/prefetch dos relacionamentos que o serializer da view
+		realmente vai renderizar (respeitando ?fields= e ?expand=).
 		"""
-		queryset = Precatorio.objects.all().select_related(
-			'tribunal',
-			'ente_devedor',
-			'cedente',
-			'advogado'
-		).prefetch_related('documentos')
+		select_related, prefetch_related = get_related_to_load(self.get_serializer())
+		queryset = Precatorio.objects.all()
+		if select_related:
+			queryset = queryset.select_related(*select_related)
+		if prefetch_related:
+			queryset = queryset.prefetch_related(*prefetch_related)
 		
 		for permission in self.get_permissions():
 			if hasattr(permission, 'filter_queryset'):
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from auth.models import TypeUserChoices
+
+
+GENERATION_KEY_PREFIX = 'oficio:geracao'
+MARKETPLACE_GENERATION = 'precatorios:marketplace'
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache(alias=None):
+	"""
+	Retorna o cache usado pelo app oficio (alias OFICIO_CACHE_ALIAS em CACHES).
+	"""
+	return caches[alias or getattr(settings, 'OFICIO_CACHE_ALIAS', 'default')]
+
+
+def is_process_local(cache):
+	"""
+	Indica se o backend só existe dentro do processo (LocMemCache): o que um
+	worker grava ou invalida nele não é visto pelos outros.
+	"""
+	return isinstance(cache, LocMemCache)
+
+
+def has_multiple_workers():
+	return getattr(settings, 'WEB_CONCURRENCY', 1) > 1
+
+
+def get_generation(name, cache=None):
+	"""
+	Retorna a geração atual de um namespace de cache.
+
+	A geração entra na chave de tudo que é cacheado no namespace, então
+	incrementá-la invalida todas as entradas de uma vez, sem varrer o cache.
+	"""
+	cache = get_cache() if cache is None else cache
+	key = f'{GENERATION_KEY_PREFIX}:{name}'
+	generation = cache.get(key)
+	if generation is None:
+		cache.add(key, 1, timeout=None)
+		generation = cache.get(key, 1)
+	return generation
+
+
+def bump_generation(name, cache=None):
+	"""
+	Incrementa a geração de um namespace, invalidando suas entradas.
+	"""
+	cache = get_cache() if cache is None else cache
+	key = f'{GENERATION_KEY_PREFIX}:{name}'
+	try:
+		return cache.incr(key)
+	except ValueError:
+		cache.add(key, 2, timeout=None)
+		return cache.get(key, 2)
+
+
+class MarketplaceResponseCache:
+	"""
+	Cache das páginas serializadas da vitrine de precatórios disponíveis.
+
+	Para Broker/Advogado a listagem é `os seus + os disponíveis`. Ela é idêntica
+	para todos esses usuários quando:
+	- a requisição filtra `status=Disponível` (os seus disponíveis já estão na vitrine), ou
+	- o usuário não é cedente de nenhum precatório.
+
+	Nesses casos a resposta é cacheada por (host, parâmetros normalizados) e
+	compartilhada entre os usuários. A invalidação é feita pela geração
+	MARKETPLACE_GENERATION, incrementada nos signals de oficio.signals.
+
+	A geração e as páginas ficam no alias CACHE_ALIAS. Com mais de um worker
+	(WEB_CONCURRENCY) ele precisa ser compartilhado (ex: Redis): num
+	LocMemCache o signal de um worker não invalida a cópia dos outros, então
+	o cache fica desligado (ver também o check oficio.W001).
+	"""
+
+	def __init__(self):
+		options = getattr(settings, 'PRECATORIO_MARKETPLACE_CACHE', {})
+		self.enabled = options.get('ENABLED', True)
+		self.timeout = options.get('TIMEOUT', 60)
+		self.alias = options.get('CACHE_ALIAS')
+		self._usable = None
+
+	@property
+	def cache(self):
+		return get_cache(self.alias)
+
+	def is_usable(self):
+		"""
+		Indica se o cache pode ser usado: ligado e, com vários workers, num
+		backend compartilhado entre eles.
+		"""
+		if self._usable is None:
+			self._usable = self.enabled
+			if self.enabled and has_multiple_workers() and is_process_local(self.cache):
+				logger.warning(
+					'Cache da vitrine desligado: o alias %r é um LocMemCache e há '
+					'%s workers; configure um backend compartilhado.',
+					self.alias or getattr(settings, 'OFICIO_CACHE_ALIAS', 'default'),
+					settings.WEB_CONCURRENCY,
+				)
+				self._usable = False
+		return self._usable
+
+	def is_shared_slice(self, request):
+		from .models import Precatorio, StatusPrecatorioChoices
+
+		user = getattr(request, 'user', None)
+		if user is None or not user.is_authenticated or user.is_staff:
+			return False
+		if user.type_user not in [TypeUserChoices.BROKER, TypeUserChoices.ADVOGADO]:
+			return False
+		if request.query_params.get('status') == StatusPrecatorioChoices.DISPONIVEL:
+			return True
+		return not Precatorio.objects.filter(cedente=user).exists()
+
+	def get_key(self, request, version=None):
+		"""
+		Retorna a chave de cache da requisição, ou None se ela não for cacheável.
+
+		`version` (ex: PrecatorioQuerySet.freshness) entra na chave, então uma
+		página cacheada não é servida depois de uma alteração que o resumo
+		enxerga, mesmo sem signal (QuerySet.update, SQL direto).
+		"""
+		if not self.is_usable() or not self.is_shared_slice(request):
+			return None
+		params = sorted(
+			(name, sorted(values))
+			for name, values in request.query_params.lists()
+		)
+		raw = json.dumps([request.scheme, request.get_host(), request.path, params, version], default=str)
+		return 'oficio:mercado:{}:{}'.format(
+			get_generation(MARKETPLACE_GENERATION, self.cache),
+			hashlib.sha1(raw.encode('utf-8')).hexdigest(),
+		)
+
+	def get(self, key):
+		return self.cache.get(key)
+
+	def set(self, key, data):
+		self.cache.set(key, data, self.timeout)
+
+
+marketplace_cache = MarketplaceResponseCache()
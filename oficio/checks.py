@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .cache import has_multiple_workers, is_process_local, marketplace_cache
+
+
+@register()
+def check_marketplace_cache(app_configs, **kwargs):
+	"""
+	Avisa quando o cache da vitrine está ligado num LocMemCache com mais de
+	um worker: a invalidação por signal só chegaria ao próprio processo, e
+	por isso o cache é desligado em tempo de execução.
+	"""
+	if not marketplace_cache.enabled or not has_multiple_workers():
+		return []
+	if not is_process_local(marketplace_cache.cache):
+		return []
+	return [
+		Warning(
+			'O cache da vitrine de precatórios usa um LocMemCache com '
+			f'WEB_CONCURRENCY={settings.WEB_CONCURRENCY}; ele ficará desligado.',
+			hint=(
+				'Aponte PRECATORIO_MARKETPLACE_CACHE_ALIAS para um cache '
+				'compartilhado entre os workers (ex: Redis).'
+			),
+			id='oficio.W001',
+		)
+	]
@@ -0,0 +1,76 @@
+"""
+Utilitários para o número único de processo do CNJ (Resolução CNJ 65/2008).
+
+Formato: NNNNNNN-DD.AAAA.J.TR.OOOO (20 dígitos)
+- NNNNNNN: número sequencial do processo
+- DD: dígito verificador (módulo 97)
+- AAAA: ano de ajuizamento
+- J: segmento do Judiciário
+- TR: tribunal
+- OOOO: unidade de origem
+"""
+import re
+from collections import namedtuple
+
+
+CNJ_LENGTH = 20
+
+NON_DIGITS = re.compile(r'\D')
+CNJ_CHARS = re.compile(r'[\d.\-\s]+')
+
+NumeroCNJ = namedtuple('NumeroCNJ', ['sequencial', 'digito', 'ano', 'segmento', 'tribunal', 'origem'])
+
+
+def normalize_cnj(value):
+	"""
+	Remove pontuação e espaços, mantendo apenas os dígitos.
+	"""
+	if not value:
+		return ''
+	return NON_DIGITS.sub('', str(value))
+
+
+def parse_cnj(value):
+	"""
+	Decompõe um número CNJ (com ou sem pontuação) em suas partes.
+	Retorna None se o valor não tiver exatamente 20 dígitos.
+	"""
+	digits = normalize_cnj(value)
+	if len(digits) != CNJ_LENGTH:
+		return None
+	return NumeroCNJ(
+		sequencial=digits[0:7],
+		digito=digits[7:9],
+		ano=int(digits[9:13]),
+		segmento=digits[13],
+		tribunal=digits[14:16],
+		origem=digits[16:20],
+	)
+
+
+def looks_like_cnj(value):
+	"""
+	Indica se o valor é um número CNJ completo, com ou sem pontuação.
+	"""
+	return bool(value) and CNJ_CHARS.fullmatch(value) is not None and parse_cnj(value) is not None
+
+
+def format_cnj(value):
+	"""
+	Formata os 20 dígitos no padrão NNNNNNN-DD.AAAA.J.TR.OOOO.
+	"""
+	parts = parse_cnj(value)
+	if parts is None:
+		return value
+	return f'{parts.sequencial}-{parts.digito}.{parts.ano:04d}.{parts.segmento}.{parts.tribunal}.{parts.origem}'
+
+
+def is_valid_check_digit(value):
+	"""
+	Valida o dígito verificador (módulo 97, ISO 7064) do número CNJ.
+	"""
+	parts = parse_cnj(value)
+	if parts is None:
+		return False
+	base = f'{parts.sequencial}{parts.ano:04d}{parts.segmento}{parts.tribunal}{parts.origem}'
+	return 98 - (int(base) * 100 % 97) == int(parts.digito)
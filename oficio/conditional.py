@@ -0,0 +1,58 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(request, *parts):
+	"""
+	Monta um ETag fraco a partir das partes informadas, do usuário e dos
+	parâmetros da requisição (?fields=, ?expand=, página, filtros...).
+
+	O usuário entra no hash porque a visibilidade dos precatórios depende dele.
+	"""
+	params = sorted(
+		(name, sorted(values))
+		for name, values in request.query_params.lists()
+	)
+	user = getattr(request, 'user', None)
+	raw = json.dumps([str(getattr(user, 'pk', None)), params, parts], default=str)
+	return 'W/"{}"'.format(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def row_version(instance):
+	"""
+	Valores das colunas de uma linha já carregada, para entrar no ETag de quem
+	a exibe aninhada (ex: tribunal e ente devedor no detalhe do precatório),
+	sem consultar o banco de novo.
+	"""
+	if instance is None:
+		return None
+	return [getattr(instance, field.attname) for field in instance._meta.concrete_fields]
+
+
+def get_not_modified(request, etag, last_modified=None):
+	"""
+	Avalia If-None-Match / If-Modified-Since (e If-Match / If-Unmodified-Since).
+
+	Retorna a resposta 304/412 quando a requisição condicional é atendida,
+	ou None quando a view deve montar a resposta completa.
+	"""
+	timestamp = int(last_modified.timestamp()) if last_modified else None
+	response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+	if response is not None:
+		set_validators(response, etag, last_modified)
+	return response
+
+
+def set_validators(response, etag, last_modified=None):
+	"""
+	Grava ETag/Last-Modified na resposta e obriga o cliente a revalidar.
+	"""
+	response['ETag'] = etag
+	if last_modified:
+		response['Last-Modified'] = http_date(last_modified.timestamp())
+	patch_cache_control(response, private=True, no_cache=True)
+	patch_vary_headers(response, ['Authorization'])
+	return response
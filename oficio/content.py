@@ -0,0 +1,251 @@
+"""
+Validação do conteúdo dos documentos enviados.
+
+A extensão do nome do arquivo não garante o formato, então o conteúdo é
+conferido em duas etapas:
+
+1. Assinatura (magic bytes): lê apenas os primeiros HEADER_SIZE bytes e
+   confere se batem com a extensão (PDF, OLE/.doc ou ZIP/.docx). É barata e
+   roda sempre, na própria requisição.
+2. Verificação estrutural (opcional, DOCUMENTO_VALIDATION['DEEP_CHECKS']):
+   lê o arquivo inteiro (fim do PDF, diretório do ZIP, streams do OLE). Roda
+   num ProcessPoolExecutor limitado, para não ocupar a CPU das threads de
+   requisição; quando o pool está cheio a validação é recusada em vez de
+   enfileirar sem limite.
+
+As funções de verificação só usam a biblioteca padrão, pois rodam nos
+processos do pool.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+HEADER_SIZE = 1024
+
+PDF = 'pdf'
+OLE = 'ole'
+ZIP = 'zip'
+
+OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+ZIP_SIGNATURE = b'PK\x03\x04'
+PDF_SIGNATURE = b'%PDF-'
+
+EXTENSION_FORMATS = {
+	'.pdf': PDF,
+	'.doc': OLE,
+	'.docx': ZIP,
+}
+
+# Limite de tamanho descompactado de um .docx, contra zip bombs
+MAX_UNCOMPRESSED_SIZE = 200 * 1024 * 1024
+
+
+def sniff_format(header):
+	"""
+	Identifica o formato pelos primeiros bytes do arquivo.
+	Retorna PDF, OLE, ZIP ou None.
+	"""
+	if header.startswith(OLE_SIGNATURE):
+		return OLE
+	if header.startswith(ZIP_SIGNATURE):
+		return ZIP
+	# A especificação do PDF aceita lixo antes do cabeçalho dentro do primeiro KB
+	if PDF_SIGNATURE in header[:HEADER_SIZE]:
+		return PDF
+	return None
+
+
+def check_signature(name, header):
+	"""
+	Confere se o conteúdo bate com a extensão do nome.
+	Retorna a mensagem de erro, ou None se o arquivo é válido.
+	"""
+	expected = EXTENSION_FORMATS.get(os.path.splitext(name)[1].lower())
+	if expected is None:
+		return None
+	if sniff_format(header) != expected:
+		return 'O conteúdo do arquivo não corresponde à extensão informada.'
+	return None
+
+
+def inspect_pdf(path):
+	with open(path, 'rb') as file:
+		file.seek(0, os.SEEK_END)
+		file.seek(max(file.tell() - HEADER_SIZE, 0))
+		tail = file.read()
+	if b'%%EOF' not in tail or b'startxref' not in tail:
+		return 'O arquivo PDF está incompleto ou corrompido.'
+	return None
+
+
+def inspect_docx(path):
+	try:
+		with zipfile.ZipFile(path) as archive:
+			members = archive.infolist()
+			names = {member.filename for member in members}
+			if '[Content_Types].xml' not in names or 'word/document.xml' not in names:
+				return 'O arquivo não é um documento Word (.docx) válido.'
+			if sum(member.file_size for member in members) > MAX_UNCOMPRESSED_SIZE:
+				return 'O documento Word (.docx) excede o tamanho descompactado permitido.'
+			if archive.testzip() is not None:
+				return 'O documento Word (.docx) está corrompido.'
+	except (zipfile.BadZipFile, OSError, EOFError):
+		return 'O documento Word (.docx) está corrompido.'
+	return None
+
+
+def inspect_ole(path):
+	with open(path, 'rb') as file:
+		data = file.read()
+	# Cabeçalho OLE: byte order FFFE e setor de 512 ou 4096 bytes
+	if len(data) < 512 or data[28:30] != b'\xfe\xff' or data[30] not in (9, 12):
+		return 'O documento Word (.doc) está corrompido.'
+	if 'WordDocument'.encode('utf-16-le') not in data:
+		return 'O arquivo não é um documento Word (.doc) válido.'
+	return None
+
+
+STRUCTURE_CHECKS = {
+	PDF: inspect_pdf,
+	ZIP: inspect_docx,
+	OLE: inspect_ole,
+}
+
+
+def inspect_structure(path, file_format):
+	"""
+	Verificação estrutural do arquivo em `path`. Roda nos processos do pool.
+	"""
+	check = STRUCTURE_CHECKS.get(file_format)
+	return check(path) if check else None
+
+
+class ContentInspector:
+	"""
+	Executa as verificações estruturais num pool de processos limitado.
+
+	- MAX_WORKERS: processos do pool (0 roda na própria thread);
+	- MAX_PENDING: verificações em andamento ou na fila; acima disso a
+	  validação espera até TIMEOUT segundos por uma vaga e depois é recusada;
+	- TIMEOUT: tempo máximo de espera por vaga e por resultado.
+	"""
+
+	def __init__(self):
+		self._executor = None
+		self._lock = threading.Lock()
+		self._slots = None
+
+	@property
+	def options(self):
+		options = getattr(settings, 'DOCUMENTO_VALIDATION', {})
+		return {
+			'DEEP_CHECKS': options.get('DEEP_CHECKS', True),
+			'MAX_WORKERS': options.get('MAX_WORKERS', 2),
+			'MAX_PENDING': options.get('MAX_PENDING', 8),
+			'TIMEOUT': options.get('TIMEOUT', 30),
+		}
+
+	def get_executor(self):
+		with self._lock:
+			if self._executor is None:
+				options = self.options
+				self._slots = threading.BoundedSemaphore(options['MAX_PENDING'])
+				# forkserver: os processos não herdam threads/conexões do servidor.
+				# Pré-carrega só este módulo, sem reimportar o __main__ (manage.py, gunicorn...).
+				context = multiprocessing.get_context('forkserver')
+				context.set_forkserver_preload([__name__])
+				self._executor = ProcessPoolExecutor(max_workers=options['MAX_WORKERS'], mp_context=context)
+			return self._executor
+
+	def reset(self):
+		with self._lock:
+			if self._executor is not None:
+				self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+	def inspect(self, path, file_format):
+		"""
+		Retorna a mensagem de erro da verificação estrutural, ou None.
+		"""
+		options = self.options
+		if not options['DEEP_CHECKS'] or file_format not in STRUCTURE_CHECKS:
+			return None
+		if options['MAX_WORKERS'] <= 0:
+			return inspect_structure(path, file_format)
+
+		executor = self.get_executor()
+		slots = self._slots
+		if not slots.acquire(timeout=options['TIMEOUT']):
+			return 'Validação de arquivos indisponível no momento. Tente novamente.'
+		try:
+			return executor.submit(inspect_structure, path, file_format).result(timeout=options['TIMEOUT'])
+		except FutureTimeoutError:
+			return 'Não foi possível validar o arquivo a tempo. Tente novamente.'
+		except BrokenProcessPool:
+			self.reset()
+			return inspect_structure(path, file_format)
+		finally:
+			slots.release()
+
+	def inspect_path(self, path, name):
+		"""
+		Verificação estrutural de um arquivo em disco, pelo formato da extensão de `name`.
+		"""
+		return self.inspect(path, EXTENSION_FORMATS.get(os.path.splitext(name)[1].lower()))
+
+	def inspect_file(self, file, name):
+		"""
+		Verificação estrutural de um arquivo enviado (UploadedFile/File).
+		Uploads em memória são copiados em blocos para um arquivo temporário.
+		"""
+		file_format = EXTENSION_FORMATS.get(os.path.splitext(name)[1].lower())
+		if not self.options['DEEP_CHECKS'] or file_format is None:
+			return None
+		if hasattr(file, 'temporary_file_path'):
+			return self.inspect(file.temporary_file_path(), file_format)
+
+		with tempfile.NamedTemporaryFile(suffix=os.path.splitext(name)[1]) as copy:
+			file.seek(0)
+			for chunk in file.chunks():
+				copy.write(chunk)
+			copy.flush()
+			file.seek(0)
+			return self.inspect(copy.name, file_format)
+
+
+content_inspector = ContentInspector()
+
+
+def read_header(file):
+	"""
+	Lê os primeiros HEADER_SIZE bytes sem alterar a posição do arquivo.
+	"""
+	position = file.tell()
+	file.seek(0)
+	header = file.read(HEADER_SIZE)
+	file.seek(position)
+	return header
+
+
+def validate_file_content(value):
+	"""
+	Valida o conteúdo do arquivo (assinatura e, se habilitado, estrutura).
+	Arquivos já gravados no storage não são lidos novamente.
+	"""
+	if getattr(value, '_committed', False):
+		return
+	# FieldFile (model/admin) embrulha o UploadedFile; serializers passam o UploadedFile
+	upload = value.file if hasattr(value, 'field') else value
+	error = check_signature(value.name, read_header(upload))
+	if error is None:
+		error = content_inspector.inspect_file(upload, value.name)
+	if error is not None:
+		raise ValidationError(error)
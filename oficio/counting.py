@@ -0,0 +1,122 @@
+import hashlib
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections
+
+from auth.models import TypeUserChoices
+from .cache import get_cache, get_generation
+
+
+COUNT_GENERATION = 'precatorios:count'
+
+CountResult = namedtuple('CountResult', ['value', 'exact'])
+
+
+class PrecatorioCounter:
+	"""
+	Estratégia de contagem para o envelope da listagem de precatórios.
+
+	Ordem de resolução:
+	1. Contagem exata em cache para (classe de visibilidade, hash do filtro).
+	2. No Postgres, estimativa do planner (pg_class.reltuples sem filtros,
+	   EXPLAIN com filtros). Acima de ESTIMATE_THRESHOLD a estimativa é
+	   devolvida como contagem aproximada.
+	3. COUNT(*) exato, que é gravado no cache.
+
+	O cache é invalidado por geração (ver oficio.signals), incrementada
+	a cada escrita em Precatorio.
+	"""
+
+	def __init__(self):
+		options = getattr(settings, 'PRECATORIO_COUNT', {})
+		self.estimate_threshold = options.get('ESTIMATE_THRESHOLD', 10000)
+		self.cache_timeout = options.get('CACHE_TIMEOUT', 300)
+
+	def count(self, queryset, request=None):
+		queryset = queryset.order_by()
+		cache = get_cache()
+		key = self.get_cache_key(queryset, request)
+
+		cached = cache.get(key)
+		if cached is not None:
+			return CountResult(cached, True)
+
+		estimate = self.estimate(queryset)
+		if estimate is not None and estimate > self.estimate_threshold:
+			return CountResult(estimate, False)
+
+		value = queryset.count()
+		cache.set(key, value, self.cache_timeout)
+		return CountResult(value, True)
+
+	def get_visibility_class(self, request):
+		"""
+		Agrupa usuários que enxergam exatamente o mesmo conjunto de precatórios.
+		"""
+		user = getattr(request, 'user', None)
+		if user is None or not user.is_authenticated:
+			return 'anonimo'
+		if user.is_staff or user.type_user == TypeUserChoices.ADMINISTRADOR:
+			return 'admin'
+		return f'{user.type_user}:{user.pk}'
+
+	def get_filter_hash(self, queryset):
+		queries = [branch.query for branch in self.get_branches(queryset)]
+		raw = json.dumps([
+			[sql, [str(param) for param in params]]
+			for sql, params in (query.sql_with_params() for query in queries)
+		])
+		return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+	def get_branches(self, queryset):
+		"""
+		Querysets que compõem a contagem: os ramos da visibilidade por UNION
+		(ver PrecatorioQuerySet), ou o próprio queryset.
+		"""
+		branches = getattr(queryset, 'visibility_querysets', lambda: None)()
+		return branches or [queryset]
+
+	def get_cache_key(self, queryset, request):
+		return 'oficio:count:{}:{}:{}'.format(
+			get_generation(COUNT_GENERATION),
+			self.get_visibility_class(request),
+			self.get_filter_hash(queryset),
+		)
+
+	def estimate(self, queryset):
+		"""
+		Retorna a estimativa de linhas do planner do Postgres, ou None
+		em outros bancos / quando não há estatísticas.
+		"""
+		connection = connections[queryset.db]
+		if connection.vendor != 'postgresql':
+			return None
+
+		branches = self.get_branches(queryset)
+		if len(branches) > 1:
+			estimates = [self.estimate(branch) for branch in branches]
+			return None if None in estimates else sum(estimates)
+
+		if not queryset.query.where:
+			with connection.cursor() as cursor:
+				cursor.execute(
+					'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+					[queryset.model._meta.db_table]
+				)
+				row = cursor.fetchone()
+			if row and row[0] >= 0:
+				return row[0]
+			return None
+
+		try:
+			plan = json.loads(queryset.explain(format='json'))
+			if isinstance(plan, list):
+				plan = plan[0]
+			return int(plan['Plan']['Plan Rows'])
+		except (ValueError, KeyError, IndexError, TypeError):
+			return None
+
+
+precatorio_counter = PrecatorioCounter()
@@ -0,0 +1,175 @@
+"""
+Entrega dos arquivos de documentos após a checagem de permissão.
+
+Conforme DOCUMENTO_DOWNLOAD['BACKEND']:
+
+- 'x-accel-redirect' (nginx): a resposta só leva o header X-Accel-Redirect
+  com o caminho interno (INTERNAL_PREFIX + nome no storage) e o nginx envia
+  o arquivo, inclusive Range. Exemplo de configuração:
+
+      location /protected-media/ {
+          internal;
+          alias /caminho/para/MEDIA_ROOT/;
+      }
+
+- 'x-sendfile' (Apache mod_xsendfile, lighttpd): header X-Sendfile com o
+  caminho absoluto do arquivo.
+- 'redirect': com o storage no S3 (core.storage.S3Storage), redireciona
+  para uma URL pré-assinada de curta duração e o cliente baixa do bucket,
+  inclusive Range. Em storages locais cai no envio pelo Django.
+- 'python' (padrão): o próprio Django envia o arquivo em blocos, com
+  suporte a requisições Range de um intervalo (206 / 416).
+"""
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
+
+from core.storage import S3Storage
+
+
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+REDIRECT = 'redirect'
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+	pass
+
+
+def get_download_settings():
+	options = getattr(settings, 'DOCUMENTO_DOWNLOAD', {})
+	return {
+		'BACKEND': options.get('BACKEND', 'python').lower(),
+		'INTERNAL_PREFIX': options.get('INTERNAL_PREFIX', '/protected-media/'),
+		'CHUNK_SIZE': options.get('CHUNK_SIZE', 64 * 1024),
+		'REDIRECT_EXPIRES': options.get('REDIRECT_EXPIRES', 300),
+	}
+
+
+def get_download_name(documento):
+	"""
+	Nome sugerido ao cliente: o arquivo no storage é nomeado pelo SHA-256,
+	então o nome vem do título do documento.
+	"""
+	return f'{documento.titulo}{documento.get_file_extension() or ""}'
+
+
+def get_document_etag(documento):
+	"""
+	ETag forte do arquivo: o SHA-256 do conteúdo.
+	"""
+	return f'"{documento.sha256}"' if documento.sha256 else None
+
+
+def parse_range(header, size):
+	"""
+	Interpreta o header Range para um único intervalo.
+
+	Retorna (início, fim) inclusivos, ou None quando o arquivo deve ser
+	enviado inteiro (sem Range, Range malformado ou com vários intervalos).
+	Levanta RangeNotSatisfiable se o intervalo está fora do arquivo.
+	"""
+	match = RANGE_HEADER.match((header or '').strip())
+	if not match:
+		return None
+	start, end = match.groups()
+	if not start and not end:
+		return None
+	if not start:
+		suffix = int(end)
+		if suffix == 0:
+			raise RangeNotSatisfiable()
+		return max(size - suffix, 0), size - 1
+	start = int(start)
+	end = min(int(end), size - 1) if end else size - 1
+	if start >= size or start > end:
+		raise RangeNotSatisfiable()
+	return start, end
+
+
+def iter_file_range(file, start, length, chunk_size):
+	try:
+		file.seek(start)
+		remaining = length
+		while remaining > 0:
+			block = file.read(min(chunk_size, remaining))
+			if not block:
+				break
+			remaining -= len(block)
+			yield block
+	finally:
+		file.close()
+
+
+def build_download_response(request, documento, as_attachment=True):
+	"""
+	Monta a resposta de download do documento conforme o backend configurado.
+	A permissão já deve ter sido verificada pela view.
+	"""
+	options = get_download_settings()
+	arquivo = documento.arquivo
+	filename = get_download_name(documento)
+	content_type = documento.content_type or 'application/octet-stream'
+	disposition = content_disposition_header(as_attachment, filename)
+
+	if options['BACKEND'] == X_ACCEL_REDIRECT:
+		response = HttpResponse(content_type=content_type)
+		response['X-Accel-Redirect'] = options['INTERNAL_PREFIX'].rstrip('/') + '/' + arquivo.name.lstrip('/')
+		response['Content-Disposition'] = disposition
+		return response
+
+	if options['BACKEND'] == X_SENDFILE:
+		response = HttpResponse(content_type=content_type)
+		response['X-Sendfile'] = arquivo.storage.path(arquivo.name)
+		response['Content-Disposition'] = disposition
+		return response
+
+	if options['BACKEND'] == REDIRECT and isinstance(arquivo.storage, S3Storage):
+		response = HttpResponseRedirect(arquivo.storage.url(
+			arquivo.name,
+			filename=filename,
+			as_attachment=as_attachment,
+			content_type=content_type,
+			expires=options['REDIRECT_EXPIRES'],
+		))
+		# A URL expira: não deve ser reaproveitada de um cache
+		patch_cache_control(response, private=True, no_store=True)
+		return response
+
+	size = documento.tamanho_bytes if documento.tamanho_bytes is not None else arquivo.size
+	range_header = request.headers.get('Range')
+	if_range = request.headers.get('If-Range')
+	if if_range is not None and if_range != get_document_etag(documento):
+		# O cliente tem uma versão diferente em cache: envia o arquivo inteiro
+		range_header = None
+	try:
+		byte_range = parse_range(range_header, size)
+	except RangeNotSatisfiable:
+		response = HttpResponse(status=416)
+		response['Content-Range'] = f'bytes */{size}'
+		return response
+
+	file = arquivo.storage.open(arquivo.name, 'rb')
+	if byte_range is None:
+		response = FileResponse(file, content_type=content_type)
+		response['Content-Disposition'] = disposition
+	else:
+		start, end = byte_range
+		length = end - start + 1
+		response = StreamingHttpResponse(
+			iter_file_range(file, start, length, options['CHUNK_SIZE']),
+			status=206,
+			content_type=content_type,
+		)
+		# Fecha o arquivo mesmo se o gerador não for consumido (HEAD, conexão abortada)
+		response._resource_closers.append(file.close)
+		response['Content-Range'] = f'bytes {start}-{end}/{size}'
+		response['Content-Length'] = str(length)
+		response['Content-Disposition'] = disposition
+	response['Accept-Ranges'] = 'bytes'
+	return response
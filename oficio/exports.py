@@ -0,0 +1,163 @@
+"""
+Exportação de documentos em ZIP, montado enquanto é enviado.
+
+O ZipFile escreve num destino sem seek (ZipStream); o zipfile grava então
+cada entrada com data descriptor (CRC e tamanhos depois dos dados) e o
+gerador entrega os bytes a cada bloco lido do arquivo. Não há arquivo
+temporário, a memória usada é de um bloco (DOCUMENTO_EXPORT['CHUNK_SIZE'])
+e o primeiro byte sai assim que o primeiro bloco é lido. ZIP64 é usado
+quando necessário, então o arquivo pode passar de 4GB.
+
+Por padrão as entradas não são comprimidas (PDF e DOCX já são comprimidos),
+o que mantém o custo de CPU próximo de uma cópia.
+"""
+import re
+import zipfile
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
+
+
+COMPRESSION_METHODS = {
+	'stored': zipfile.ZIP_STORED,
+	'deflated': zipfile.ZIP_DEFLATED,
+}
+
+MISSING_FILES_ENTRY = 'ARQUIVOS_NAO_ENCONTRADOS.txt'
+
+UNSAFE_NAME_CHARACTERS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def get_export_settings():
+	options = getattr(settings, 'DOCUMENTO_EXPORT', {})
+	return {
+		'CHUNK_SIZE': options.get('CHUNK_SIZE', 256 * 1024),
+		'COMPRESSION': COMPRESSION_METHODS[options.get('COMPRESSION', 'stored').lower()],
+	}
+
+
+class ZipStream:
+	"""
+	Destino de escrita do ZipFile: guarda os bytes escritos até o gerador
+	recolhê-los com drain().
+	"""
+
+	def __init__(self):
+		self._chunks = []
+
+	def write(self, data):
+		self._chunks.append(bytes(data))
+		return len(data)
+
+	def flush(self):
+		pass
+
+	def drain(self):
+		data = b''.join(self._chunks)
+		self._chunks.clear()
+		return data
+
+
+def safe_name(value, default):
+	value = UNSAFE_NAME_CHARACTERS.sub('_', value or '').strip(' .')
+	return value or default
+
+
+def get_entry_name(documento, used):
+	"""
+	Caminho do documento dentro do ZIP: `<numero do processo>/<título>.<ext>`,
+	com sufixo numérico quando o nome já foi usado na mesma pasta.
+	"""
+	folder = safe_name(documento.precatorio.numero_processo, str(documento.precatorio_id))
+	title = safe_name(documento.titulo, str(documento.pk))
+	extension = documento.get_file_extension() or ''
+	name = f'{folder}/{title}{extension}'
+	counter = 2
+	while name in used:
+		name = f'{folder}/{title} ({counter}){extension}'
+		counter += 1
+	used.add(name)
+	return name
+
+
+def iter_zip(documentos):
+	"""
+	Gera os bytes do ZIP com os arquivos dos documentos, na ordem recebida
+	(ver write_zip).
+	"""
+	for data in write_zip(documentos):
+		if data:
+			yield data
+
+
+def write_zip(documentos):
+	"""
+	Documentos cujo arquivo não está no storage são pulados e listados em
+	ARQUIVOS_NAO_ENCONTRADOS.txt no fim do ZIP: depois do primeiro byte não
+	é mais possível responder com erro.
+	"""
+	options = get_export_settings()
+	stream = ZipStream()
+	used = set()
+	missing = []
+
+	with zipfile.ZipFile(stream, 'w', compression=options['COMPRESSION'], allowZip64=True) as archive:
+		for documento in documentos:
+			name = get_entry_name(documento, used)
+			try:
+				file = documento.arquivo.storage.open(documento.arquivo.name, 'rb')
+			except (FileNotFoundError, ValueError):
+				missing.append(name)
+				continue
+
+			with file:
+				info = zipfile.ZipInfo(name, date_time=timezone.localtime(documento.enviado_em).timetuple()[:6])
+				info.compress_type = options['COMPRESSION']
+				info.external_attr = 0o644 << 16
+				if documento.tamanho_bytes is not None:
+					# Define se a entrada precisa de ZIP64 antes de escrever os dados
+					info.file_size = documento.tamanho_bytes
+				with archive.open(info, 'w', force_zip64=documento.tamanho_bytes is None) as entry:
+					for block in iter(lambda: file.read(options['CHUNK_SIZE']), b''):
+						entry.write(block)
+						yield stream.drain()
+			yield stream.drain()
+
+		if missing:
+			archive.writestr(MISSING_FILES_ENTRY, '\n'.join(missing) + '\n')
+	yield stream.drain()
+
+
+def get_archive_name(prefix):
+	return f'{safe_name(prefix, "documentos")}-{timezone.localtime():%Y%m%d-%H%M%S}.zip'
+
+
+def get_export_queryset(queryset):
+	"""
+	Documentos a exportar, com só os campos usados pelo ZIP e lidos do banco
+	em lotes, na ordem das pastas.
+	"""
+	return (
+		queryset.select_related('precatorio')
+		.only(
+			'id', 'titulo', 'arquivo', 'extensao', 'tamanho_bytes', 'enviado_em',
+			'precatorio__id', 'precatorio__numero_processo',
+		)
+		.order_by('precatorio__numero_processo', 'enviado_em', 'pk')
+		.iterator(chunk_size=200)
+	)
+
+
+def build_zip_response(documentos, prefix):
+	"""
+	Resposta em streaming com o ZIP dos documentos (ver iter_zip).
+	"""
+	response = StreamingHttpResponse(iter_zip(documentos), content_type='application/zip')
+	response['Content-Disposition'] = content_disposition_header(True, get_archive_name(prefix))
+	# O nginx não deve acumular o ZIP antes de repassar ao cliente
+	response['X-Accel-Buffering'] = 'no'
+	patch_cache_control(response, private=True, no_store=True)
+	return response
@@ -0,0 +1,175 @@
+"""
+Extração de texto de documentos (PDF e DOCX).
+
+As funções deste módulo rodam nos processos do pool do worker
+(`run_extraction_worker`), então só usam a biblioteca padrão e não dependem
+do Django configurado. Se o pacote opcional `pypdf` estiver instalado ele é
+usado para PDFs; senão é usado um extrator simples, que lê os streams de
+conteúdo (sem filtro ou FlateDecode) e os operadores de texto Tj/TJ.
+"""
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+try:
+	import pypdf
+except ImportError:
+	pypdf = None
+
+
+# Limite do texto guardado: o tsvector do Postgres aceita até 1MB
+MAX_TEXT_LENGTH = 500000
+
+CPF = re.compile(r'(?<!\d)(\d{3})\.?(\d{3})\.?(\d{3})-?(\d{2})(?!\d)')
+CNPJ = re.compile(r'(?<!\d)(\d{2})\.?(\d{3})\.?(\d{3})/?(\d{4})-?(\d{2})(?!\d)')
+VALOR = re.compile(r'R\$\s*(\d{1,3}(?:\.\d{3})*|\d+),(\d{2})(?!\d)')
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+PDF_STREAM = re.compile(rb'<<(.*?)>>\s*stream\r?\n(.*?)\r?\n?endstream', re.S)
+PDF_TEXT_OPERATOR = re.compile(rb'(\((?:\\.|[^\\)])*\)|\[(?:\\.|[^\]])*\])\s*(?:Tj|TJ|\'|")')
+PDF_LITERAL = re.compile(rb'\((?:\\.|[^\\)])*\)|(-?\d+(?:\.\d+)?)')
+PDF_OCTAL = re.compile(rb'[0-7]{1,3}')
+PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+
+class UnsupportedFormat(Exception):
+	pass
+
+
+def extract_text(path, extension):
+	"""
+	Extrai o texto do arquivo em `path`. Levanta UnsupportedFormat para
+	formatos sem extrator (ex: .doc binário).
+	"""
+	extension = extension.lower()
+	if extension == '.pdf':
+		text = extract_pdf(path)
+	elif extension == '.docx':
+		text = extract_docx(path)
+	else:
+		raise UnsupportedFormat(f'Extração de texto não suportada para {extension or "arquivos sem extensão"}')
+	text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+	text = re.sub(r'\n\s*\n+', '\n', text).strip()
+	return text[:MAX_TEXT_LENGTH]
+
+
+def extract_docx(path):
+	with zipfile.ZipFile(path) as archive:
+		xml = archive.read('word/document.xml')
+	paragraphs = []
+	for paragraph in ElementTree.fromstring(xml).iter(f'{WORD_NAMESPACE}p'):
+		parts = []
+		for node in paragraph.iter():
+			if node.tag == f'{WORD_NAMESPACE}t' and node.text:
+				parts.append(node.text)
+			elif node.tag == f'{WORD_NAMESPACE}tab':
+				parts.append('\t')
+		paragraphs.append(''.join(parts))
+	return '\n'.join(paragraphs)
+
+
+def extract_pdf(path):
+	if pypdf is not None:
+		reader = pypdf.PdfReader(path)
+		return '\n'.join(page.extract_text() or '' for page in reader.pages)
+	with open(path, 'rb') as file:
+		data = file.read()
+	return '\n'.join(
+		text for text in (extract_pdf_stream(content) for content in iter_pdf_streams(data)) if text
+	)
+
+
+def iter_pdf_streams(data):
+	for dictionary, stream in PDF_STREAM.findall(data):
+		if b'/FlateDecode' in dictionary:
+			try:
+				yield zlib.decompress(stream)
+			except zlib.error:
+				continue
+		elif b'/Filter' not in dictionary:
+			yield stream
+
+
+def extract_pdf_stream(content):
+	lines = []
+	for operand in PDF_TEXT_OPERATOR.findall(content):
+		if operand.startswith(b'['):
+			parts = []
+			for match in PDF_LITERAL.finditer(operand[1:-1]):
+				if match.group(1) is not None:
+					# Deslocamentos grandes no TJ representam espaço entre palavras
+					if float(match.group(1)) < -200:
+						parts.append(' ')
+				else:
+					parts.append(decode_pdf_literal(match.group(0)))
+			lines.append(''.join(parts))
+		else:
+			lines.append(decode_pdf_literal(operand))
+	text = '\n'.join(lines)
+	printable = sum(character.isprintable() or character.isspace() for character in text)
+	# Fontes com codificação própria (CID) viram lixo sem o mapa ToUnicode
+	return text if text and printable / len(text) > 0.9 else ''
+
+
+def decode_pdf_literal(literal):
+	body = literal[1:-1]
+	output = bytearray()
+	index = 0
+	while index < len(body):
+		byte = body[index:index + 1]
+		if byte != b'\\':
+			output += byte
+			index += 1
+			continue
+		escaped = body[index + 1:index + 2]
+		octal = PDF_OCTAL.match(body, index + 1, index + 4)
+		if escaped in PDF_ESCAPES:
+			output += PDF_ESCAPES[escaped]
+			index += 2
+		elif octal:
+			output.append(int(octal.group(0), 8) & 0xFF)
+			index += 1 + len(octal.group(0))
+		elif escaped in (b'\n', b'\r'):
+			index += 2
+		else:
+			output += escaped
+			index += 2
+	return output.decode('latin-1')
+
+
+def find_identifiers(text):
+	"""
+	Retorna CPFs, CNPJs e valores em reais do texto, normalizados só com dígitos
+	(ex: '123.456.789-09' -> '12345678909', 'R$ 1.500,00' -> '150000').
+	"""
+	found = []
+	for pattern in (CNPJ, CPF):
+		found.extend(''.join(match.groups()) for match in pattern.finditer(text))
+	found.extend(match.group(1).replace('.', '') + match.group(2) for match in VALOR.finditer(text))
+	return ' '.join(dict.fromkeys(found))
+
+
+def normalize_identifier(term):
+	"""
+	Normaliza um termo de busca que é um CPF, CNPJ ou valor para o formato
+	de `find_identifiers`. Retorna None se o termo não for um identificador.
+	"""
+	term = term.strip()
+	for pattern in (CNPJ, CPF):
+		match = pattern.fullmatch(term)
+		if match:
+			return ''.join(match.groups())
+	match = VALOR.fullmatch(term) or VALOR.fullmatch(f'R$ {term}')
+	if match:
+		return match.group(1).replace('.', '') + match.group(2)
+	return None
+
+
+def extract_document(path, extension):
+	"""
+	Ponto de entrada dos processos do pool: retorna (texto, identificadores).
+	"""
+	text = extract_text(path, extension)
+	return text, find_identifiers(text)
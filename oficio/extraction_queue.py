@@ -0,0 +1,142 @@
+"""
+Fila de extração de texto de documentos, guardada no próprio banco.
+
+Cada Documento novo ganha um TextoDocumento Pendente (ver oficio.signals).
+O worker reserva lotes com SELECT ... FOR UPDATE SKIP LOCKED, então vários
+workers podem rodar ao mesmo tempo sem pegar o mesmo documento. Falhas são
+reagendadas com espera crescente até MAX_ATTEMPTS; reservas esquecidas por
+um worker que morreu voltam para a fila depois de STALE_AFTER segundos, e
+contam como tentativa.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Documento, StatusExtracaoChoices, TextoDocumento
+
+
+class ExtractionQueue:
+
+	def __init__(self):
+		options = getattr(settings, 'DOCUMENTO_EXTRACTION', {})
+		self.max_attempts = options.get('MAX_ATTEMPTS', 3)
+		self.retry_delay = options.get('RETRY_DELAY', 60)
+		self.stale_after = options.get('STALE_AFTER', 600)
+
+	def enqueue(self, documento):
+		"""
+		Coloca o documento na fila. Se outro documento com o mesmo SHA-256 já
+		teve o texto extraído, o texto é copiado e nada entra na fila.
+		"""
+		source = None
+		if documento.sha256:
+			source = (
+				TextoDocumento.objects.filter(
+					documento__sha256=documento.sha256,
+					status=StatusExtracaoChoices.CONCLUIDO,
+				)
+				.exclude(documento=documento)
+				.first()
+			)
+		if source is not None:
+			texto, _ = TextoDocumento.objects.update_or_create(
+				documento=documento,
+				defaults={
+					'status': StatusExtracaoChoices.CONCLUIDO,
+					'texto': source.texto,
+					'identificadores': source.identificadores,
+					'processado_em': timezone.now(),
+				},
+			)
+			return texto
+		texto, _ = TextoDocumento.objects.get_or_create(documento=documento)
+		return texto
+
+	def enqueue_missing(self):
+		"""
+		Enfileira documentos que ainda não têm TextoDocumento.
+		"""
+		created = 0
+		for documento in Documento.objects.filter(texto__isnull=True).only('pk', 'sha256').iterator():
+			self.enqueue(documento)
+			created += 1
+		return created
+
+	def claim(self, limit):
+		"""
+		Reserva até `limit` documentos prontos para extração e os marca como
+		Processando. Retorna a lista de TextoDocumento com o documento carregado.
+
+		Reservas esquecidas que já usaram MAX_ATTEMPTS tentativas viram Erro em
+		vez de voltar para a fila: um documento que derruba o processo de
+		extração (e por isso nunca chega a fail()) não é reprocessado sem fim.
+		"""
+		now = timezone.now()
+		stale = Q(
+			status=StatusExtracaoChoices.PROCESSANDO,
+			iniciado_em__lt=now - timedelta(seconds=self.stale_after),
+		)
+		ready = Q(status=StatusExtracaoChoices.PENDENTE, agendado_em__lte=now) | (
+			stale & Q(tentativas__lt=self.max_attempts)
+		)
+		TextoDocumento.objects.filter(stale, tentativas__gte=self.max_attempts).update(
+			status=StatusExtracaoChoices.ERRO,
+			erro='A extração foi interrompida em todas as tentativas (o processo de extração parou).',
+			processado_em=now,
+		)
+		with transaction.atomic():
+			jobs = list(
+				TextoDocumento.objects.select_for_update(skip_locked=True, of=('self',))
+				.select_related('documento')
+				.filter(ready)
+				.order_by('agendado_em')[:limit]
+			)
+			if jobs:
+				TextoDocumento.objects.filter(pk__in=[job.pk for job in jobs]).update(
+					status=StatusExtracaoChoices.PROCESSANDO,
+					iniciado_em=now,
+					tentativas=F('tentativas') + 1,
+				)
+		for job in jobs:
+			job.tentativas += 1
+		return jobs
+
+	def complete(self, job, texto, identificadores):
+		TextoDocumento.objects.filter(pk=job.pk).update(
+			status=StatusExtracaoChoices.CONCLUIDO,
+			texto=texto,
+			identificadores=identificadores,
+			erro='',
+			processado_em=timezone.now(),
+		)
+
+	def skip(self, job, reason):
+		TextoDocumento.objects.filter(pk=job.pk).update(
+			status=StatusExtracaoChoices.IGNORADO,
+			erro=reason,
+			processado_em=timezone.now(),
+		)
+
+	def fail(self, job, error):
+		"""
+		Reagenda a extração com espera crescente, ou marca Erro quando as
+		tentativas acabam.
+		"""
+		if job.tentativas >= self.max_attempts:
+			TextoDocumento.objects.filter(pk=job.pk).update(
+				status=StatusExtracaoChoices.ERRO,
+				erro=str(error),
+				processado_em=timezone.now(),
+			)
+			return
+		TextoDocumento.objects.filter(pk=job.pk).update(
+			status=StatusExtracaoChoices.PENDENTE,
+			erro=str(error),
+			agendado_em=timezone.now() + timedelta(seconds=self.retry_delay * 2 ** (job.tentativas - 1)),
+		)
+
+
+extraction_queue = ExtractionQueue()
@@ -0,0 +1,92 @@
+import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+
+from .cnj import looks_like_cnj, normalize_cnj
+from .models import Precatorio
+
+
+SEARCH_CONFIG = 'portuguese_unaccent'
+
+
+class PrecatorioFilterSet(django_filters.FilterSet):
+	"""
+	Filtros da listagem de precatórios.
+
+	`numero_cnj` aceita o número com ou sem pontuação e vira uma busca exata
+	no índice único de numero_cnj. As partes do CNJ (ano, segmento, tribunal)
+	são filtráveis diretamente, sem regex sobre numero_processo.
+	"""
+	numero_cnj = django_filters.CharFilter(method='filter_numero_cnj', label='Número CNJ (com ou sem pontuação)')
+
+	class Meta:
+		model = Precatorio
+		fields = {
+			'status': ['exact'],
+			'tribunal': ['exact'],
+			'ente_devedor': ['exact'],
+			'natureza': ['exact'],
+			'ano_orcamentario': ['exact', 'gte', 'lte'],
+			'valor_principal': ['gte', 'lte'],
+			'cnj_ano': ['exact', 'gte', 'lte'],
+			'cnj_segmento': ['exact'],
+			'cnj_tribunal': ['exact'],
+		}
+
+	def filter_numero_cnj(self, queryset, name, value):
+		return queryset.filter(numero_cnj=normalize_cnj(value))
+
+
+class PrecatorioSearchFilter(filters.SearchFilter):
+	"""
+	Busca textual de precatórios usando o full-text search do Postgres.
+
+	- `descricao` e `numero_processo` são consultados pelo `search_vector`
+	  (índice GIN, configuração portuguese_unaccent: sem acentos e com stemming);
+	- buscas parciais pelo número CNJ usam o índice trigram de `numero_processo`;
+	- os resultados recebem a anotação `search_rank` (ver PrecatorioOrderingFilter);
+	- um número CNJ completo vira busca exata no índice único de numero_cnj.
+
+	Em bancos que não são Postgres cai no SearchFilter padrão (ILIKE em search_fields).
+	"""
+	search_type = 'websearch'
+	min_partial_length = 3
+
+	def filter_queryset(self, request, queryset, view):
+		term = request.query_params.get(self.search_param, '').strip()
+		if looks_like_cnj(term):
+			return queryset.filter(numero_cnj=normalize_cnj(term))
+
+		connection = connections[queryset.db]
+		if connection.vendor != 'postgresql':
+			return super().filter_queryset(request, queryset, view)
+
+		if not term:
+			return queryset
+
+		query = SearchQuery(term, config=SEARCH_CONFIG, search_type=self.search_type)
+		condition = Q(search_vector=query)
+		if len(term) >= self.min_partial_length:
+			# LIKE na própria coluna, que o índice trigram atende; icontains
+			# compara UPPER(numero_processo) e não usaria o índice (o número
+			# do processo não tem letras, então maiúsculas não importam).
+			condition |= Q(numero_processo__contains=term)
+
+		return queryset.filter(condition).annotate(
+			search_rank=SearchRank(F('search_vector'), query)
+		)
+
+
+class PrecatorioOrderingFilter(filters.OrderingFilter):
+	"""
+	OrderingFilter que, numa busca sem `?ordering=` explícito,
+	ordena pela relevância calculada em PrecatorioSearchFilter.
+	"""
+
+	def get_ordering(self, request, queryset, view):
+		ordering = super().get_ordering(request, queryset, view)
+		if self.ordering_param not in request.query_params and 'search_rank' in queryset.query.annotations:
+			return ['-search_rank', *(ordering or [])]
+		return ordering
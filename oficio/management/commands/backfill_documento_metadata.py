@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from oficio.models import Documento
+
+
+class Command(BaseCommand):
+	"""
+	Preenche tamanho, extensão e content type de documentos enviados antes
+	desses metadados serem gravados no upload.
+
+	Este é o único ponto que consulta o storage; depois dele a listagem e o
+	admin leem os metadados direto da linha.
+	"""
+	help = 'Preenche os metadados de arquivo (tamanho, extensão, content type) dos documentos'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de documentos por lote')
+		parser.add_argument('--all', action='store_true', help='Recalcula os metadados de todos os documentos')
+
+	def handle(self, *args, **options):
+		batch_size = options['batch_size']
+		queryset = Documento.objects.exclude(arquivo='').order_by('pk')
+		if not options['all']:
+			queryset = queryset.filter(Q(tamanho_bytes__isnull=True) | Q(extensao='') | Q(content_type=''))
+
+		updated = 0
+		missing = 0
+		batch = []
+		for documento in queryset.only('pk', 'arquivo', 'sha256').iterator(chunk_size=batch_size):
+			try:
+				documento.fill_file_metadata()
+			except (FileNotFoundError, OSError):
+				missing += 1
+				self.stderr.write(f'Arquivo não encontrado: {documento.arquivo.name} ({documento.pk})')
+				continue
+			batch.append(documento)
+			if len(batch) >= batch_size:
+				updated += self.flush(batch)
+				batch = []
+		updated += self.flush(batch)
+
+		self.stdout.write(self.style.SUCCESS(
+			f'{updated} documento(s) atualizados, {missing} arquivo(s) não encontrados.'
+		))
+
+	def flush(self, batch):
+		if batch:
+			Documento.objects.bulk_update(batch, ['tamanho_bytes', 'extensao', 'content_type'])
+		return len(batch)
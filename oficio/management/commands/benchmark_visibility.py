@@ -0,0 +1,150 @@
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from auth.models import TypeUserChoices
+from oficio.models import (
+	EnteDevedor,
+	EsferaChoices,
+	NaturezaChoices,
+	Precatorio,
+	StatusPrecatorioChoices,
+	Tribunal,
+)
+
+
+class Rollback(Exception):
+	pass
+
+
+class Command(BaseCommand):
+	"""
+	Compara as duas estratégias de visibilidade de Broker/Advogado
+	(OR no WHERE x UNION ALL de ramos indexados) numa base semeada.
+
+	Os dados são criados dentro de uma transação que é desfeita no final,
+	então o comando pode rodar numa base de desenvolvimento sem deixar rastro.
+	"""
+	help = 'Benchmark da visibilidade de Broker/Advogado: OR x UNION ALL'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--rows', type=int, default=100000, help='Quantidade de precatórios semeados')
+		parser.add_argument('--own', type=int, default=200, help='Quantidade de precatórios do broker')
+		parser.add_argument('--available-ratio', type=float, default=0.3, help='Fração de precatórios disponíveis')
+		parser.add_argument('--runs', type=int, default=5, help='Execuções por cenário')
+		parser.add_argument('--show-plans', action='store_true', help='Mostra os planos EXPLAIN ANALYZE')
+
+	def handle(self, *args, **options):
+		if connection.vendor != 'postgresql':
+			raise CommandError('Este comando requer PostgreSQL.')
+
+		try:
+			with transaction.atomic():
+				broker = self.seed(options)
+				self.run(broker, options)
+				raise Rollback()
+		except Rollback:
+			self.stdout.write('Dados semeados removidos (rollback).')
+
+	def seed(self, options):
+		User = get_user_model()
+		suffix = uuid.uuid4().hex[:8]
+		broker = User.objects.create(
+			email=f'bench-broker-{suffix}@lexpay.local', username=f'bench-broker-{suffix}',
+			type_user=TypeUserChoices.BROKER,
+		)
+		cedente = User.objects.create(
+			email=f'bench-cedente-{suffix}@lexpay.local', username=f'bench-cedente-{suffix}',
+			type_user=TypeUserChoices.CEDENTE,
+		)
+		tribunal = Tribunal.objects.create(nome=f'Tribunal Bench {suffix}', sigla=f'B{suffix}')
+		ente = EnteDevedor.objects.create(nome=f'Ente Bench {suffix}', esfera=EsferaChoices.FEDERAL)
+
+		statuses = [choice for choice, _ in StatusPrecatorioChoices.CHOICES if choice != StatusPrecatorioChoices.DISPONIVEL]
+		rows = options['rows']
+		self.stdout.write(f'Semeando {rows} precatórios...')
+		batch = []
+		now = timezone.now()
+		for index in range(rows):
+			available = random.random() < options['available_ratio']
+			batch.append(Precatorio(
+				cedente=broker if index < options['own'] else cedente,
+				tribunal=tribunal,
+				ente_devedor=ente,
+				numero_processo=f'BENCH-{suffix}-{index}',
+				natureza=random.choice([NaturezaChoices.ALIMENTAR, NaturezaChoices.COMUM]),
+				valor_principal=Decimal(random.randint(10000, 5000000)),
+				data_expedicao=date(2020, 1, 1) + timedelta(days=random.randint(0, 1500)),
+				ano_orcamentario=random.randint(2020, 2030),
+				status=StatusPrecatorioChoices.DISPONIVEL if available else random.choice(statuses),
+			))
+			if len(batch) >= 5000:
+				self.bulk_insert(batch, now)
+				batch = []
+		self.bulk_insert(batch, now)
+
+		with connection.cursor() as cursor:
+			cursor.execute(f'ANALYZE {Precatorio._meta.db_table}')
+		return broker
+
+	def bulk_insert(self, batch, now):
+		created = Precatorio.objects.bulk_create(batch)
+		# auto_now_add grava o mesmo instante para o lote todo; espalha no tempo
+		# para a ordenação por created_at ter a seletividade de dados reais.
+		for precatorio in created:
+			precatorio.created_at = now - timedelta(seconds=random.randint(0, 86400 * 365 * 3))
+		Precatorio.objects.bulk_update(created, ['created_at'], batch_size=5000)
+
+	def get_querysets(self, broker):
+		base = Precatorio.objects.all()
+		own = Q(cedente=broker)
+		available = Q(status=StatusPrecatorioChoices.DISPONIVEL)
+		return {
+			'or': base.filter(own | available),
+			'union': base.union_visibility(own, available & ~own),
+		}
+
+	def run(self, broker, options):
+		page_size = api_settings.PAGE_SIZE
+		scenarios = {
+			'primeira página': lambda qs: qs.order_by('-created_at', '-id')[:page_size],
+			'página 50': lambda qs: qs.order_by('-created_at', '-id')[page_size * 49:page_size * 50],
+			'filtro natureza': lambda qs: qs.filter(natureza=NaturezaChoices.ALIMENTAR).order_by('-created_at', '-id')[:page_size],
+			'ordem valor': lambda qs: qs.order_by('-valor_principal')[:page_size],
+			'contagem': lambda qs: qs.count(),
+		}
+
+		self.stdout.write(f'\n{"cenário":<18} {"OR (ms)":>10} {"UNION (ms)":>12}')
+		for name, scenario in scenarios.items():
+			timings = {}
+			for strategy, queryset in self.get_querysets(broker).items():
+				samples = []
+				for _ in range(options['runs']):
+					start = time.perf_counter()
+					result = scenario(queryset)
+					if not isinstance(result, int):
+						list(result)
+					samples.append((time.perf_counter() - start) * 1000)
+				timings[strategy] = sorted(samples)[len(samples) // 2]
+
+				if options['show_plans'] and not isinstance(result, int):
+					self.show_plan(name, strategy, scenario(queryset))
+
+			self.stdout.write(f'{name:<18} {timings["or"]:>10.2f} {timings["union"]:>12.2f}')
+
+	def show_plan(self, name, strategy, queryset):
+		if hasattr(queryset, 'as_union') and queryset.visibility_querysets():
+			queryset = queryset.as_union()
+		plan = queryset.explain(analyze=True, format='json')
+		self.stdout.write(f'\n--- {name} / {strategy} ---')
+		self.stdout.write(json.dumps(json.loads(plan), indent=2))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from oficio.media_gc import MediaGarbageCollector, get_gc_settings
+
+
+class Command(BaseCommand):
+	"""
+	Remove (ou move para quarentena) os arquivos do MEDIA_ROOT que nenhum
+	registro referencia mais: documentos de precatórios apagados, avatares
+	substituídos e uploads abandonados. Ver oficio.media_gc.
+
+	A passada é incremental: com --max-files o comando processa só uma parte
+	e grava o ponto de parada; a próxima execução continua dali. Com --loop
+	ele fica rodando e processa uma parte a cada --interval segundos.
+
+	Sem --delete ou --quarantine nada é alterado (nem o ponto de parada); o
+	comando apenas lista os órfãos e o espaço que seria recuperado.
+	"""
+	help = 'Coleta arquivos órfãos de documentos e avatares e reporta os bytes recuperados'
+
+	def add_arguments(self, parser):
+		options = get_gc_settings()
+		action = parser.add_mutually_exclusive_group()
+		action.add_argument('--delete', action='store_true', help='Remove os arquivos órfãos')
+		action.add_argument('--quarantine', action='store_true', help='Move os arquivos órfãos para MEDIA_GC["QUARANTINE_DIR"]')
+		parser.add_argument('--max-files', type=int, default=None, help='Quantidade máxima de arquivos verificados nesta execução')
+		parser.add_argument('--restart', action='store_true', help='Ignora o ponto salvo e recomeça a passada')
+		parser.add_argument('--min-age', type=int, default=options['MIN_AGE'], help='Ignora arquivos modificados há menos de N segundos')
+		parser.add_argument('--rate', type=int, default=options['MAX_OPS_PER_SECOND'], help='Operações de disco por segundo (0 = sem limite)')
+		parser.add_argument('--skip-uploads', action='store_true', help='Não verifica os arquivos parciais de upload')
+		parser.add_argument('--loop', action='store_true', help='Executa continuamente, uma parte a cada --interval segundos')
+		parser.add_argument('--interval', type=int, default=3600, help='Intervalo entre as execuções com --loop')
+
+	def handle(self, *args, **options):
+		gc_options = {**get_gc_settings(), 'MIN_AGE': options['min_age'], 'MAX_OPS_PER_SECOND': options['rate']}
+		action = 'delete' if options['delete'] else 'quarantine' if options['quarantine'] else 'report'
+		restart = options['restart']
+
+		while True:
+			collector = MediaGarbageCollector(action=action, options=gc_options, stdout=self.stdout)
+			state, finished = collector.run(max_files=options['max_files'], restart=restart)
+			restart = False
+			self.report(action, state, finished)
+
+			if not options['skip_uploads']:
+				removed, reclaimed = collector.collect_uploads()
+				if removed:
+					verb = 'seriam removidos' if action == 'report' else 'removidos'
+					self.stdout.write(f'{removed} arquivo(s) parciais de upload {verb} ({reclaimed} bytes).')
+
+			if not options['loop']:
+				break
+			time.sleep(options['interval'])
+
+	def report(self, action, state, finished):
+		verb = {
+			'report': 'seriam recuperados',
+			'delete': 'recuperados',
+			'quarantine': 'movidos para a quarentena',
+		}[action]
+		progress = 'Passada concluída' if finished else f"Passada parcial, continua após {state['ultimo']}"
+		self.stdout.write(self.style.SUCCESS(
+			f"{progress}: {state['arquivos']} arquivo(s) verificados, {state['orfaos']} órfão(s). "
+			f"{state['bytes']} bytes ({state['bytes'] / (1024 * 1024):.2f} MB) {verb}."
+		))
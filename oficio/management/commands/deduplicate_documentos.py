@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from oficio.models import Documento, lock_stored_file
+from oficio.storage import ContentAddressedMixin
+
+
+class Command(BaseCommand):
+	"""
+	Move os arquivos de documentos antigos (precatorios/docs/%Y/%m/) para o
+	storage endereçado pelo conteúdo e remove as cópias duplicadas.
+
+	Cada arquivo é lido uma vez para calcular o SHA-256. Se o conteúdo ainda
+	não existe no storage ele é gravado, senão o documento passa a apontar
+	para o arquivo existente. O arquivo antigo é removido quando nenhum
+	documento o referencia mais. Com --dry-run nada é alterado e o comando
+	apenas reporta o espaço que seria recuperado.
+	"""
+	help = 'Deduplica os arquivos de documentos pelo SHA-256 e reporta os bytes recuperados'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de documentos lidos por lote')
+		parser.add_argument('--dry-run', action='store_true', help='Apenas reporta, sem alterar arquivos ou registros')
+
+	def handle(self, *args, **options):
+		storage = Documento._meta.get_field('arquivo').storage
+		if not isinstance(storage, ContentAddressedMixin):
+			self.stderr.write(self.style.WARNING('O storage de Documento.arquivo não é endereçado pelo conteúdo.'))
+			return
+
+		dry_run = options['dry_run']
+		stats = {'processados': 0, 'migrados': 0, 'duplicados': 0, 'faltando': 0, 'bytes': 0}
+		seen = set()
+
+		queryset = Documento.objects.exclude(arquivo='').only('pk', 'arquivo', 'sha256').order_by('pk')
+		for documento in queryset.iterator(chunk_size=options['batch_size']):
+			stats['processados'] += 1
+			name = documento.arquivo.name
+
+			digest = storage.digest_from_name(name)
+			if digest:
+				if documento.sha256 != digest and not dry_run:
+					Documento.objects.filter(pk=documento.pk).update(sha256=digest)
+				seen.add(name)
+				continue
+
+			try:
+				size = storage.size(name)
+				digest = documento.sha256 or documento.compute_sha256()
+			except (FileNotFoundError, OSError):
+				stats['faltando'] += 1
+				self.stderr.write(f'Arquivo não encontrado: {name} ({documento.pk})')
+				continue
+
+			target = storage.hashed_name(digest, name)
+			duplicate = target in seen or storage.exists(target)
+			seen.add(target)
+			if duplicate:
+				stats['duplicados'] += 1
+				stats['bytes'] += size
+			if dry_run:
+				continue
+
+			with transaction.atomic():
+				# Mesma trava da remoção do último Documento (oficio.signals)
+				lock_stored_file(digest)
+				if not storage.exists(target):
+					with storage.open(name, 'rb') as file:
+						storage.save(name, file)
+				Documento.objects.filter(pk=documento.pk).update(arquivo=target, sha256=digest)
+				if not Documento.objects.filter(arquivo=name).exists():
+					storage.delete(name)
+			stats['migrados'] += 1
+
+		verb = 'seriam recuperados' if dry_run else 'recuperados'
+		self.stdout.write(self.style.SUCCESS(
+			f"{stats['processados']} documento(s) processados, {stats['migrados']} migrados para o storage por SHA-256, "
+			f"{stats['duplicados']} duplicado(s), {stats['faltando']} arquivo(s) não encontrados. "
+			f"{stats['bytes']} bytes ({stats['bytes'] / (1024 * 1024):.2f} MB) {verb}."
+		))
@@ -0,0 +1,160 @@
+import json
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.settings import api_settings
+
+from oficio.filters import PrecatorioFilterSet
+from oficio.models import NaturezaChoices, Precatorio, StatusPrecatorioChoices
+
+
+INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+SAMPLE_VALUES = {
+	'status': StatusPrecatorioChoices.DISPONIVEL,
+	'tribunal': str(uuid.uuid4()),
+	'ente_devedor': str(uuid.uuid4()),
+	'natureza': NaturezaChoices.COMUM,
+	'ano_orcamentario': 2024,
+	'valor_principal': 100000,
+	'cnj_ano': 2023,
+	'cnj_segmento': '4',
+	'cnj_tribunal': '01',
+	'numero_cnj': '0' * 20,
+}
+
+
+def walk_plan(plan):
+	yield plan
+	for child in plan.get('Plans', []):
+		yield from walk_plan(child)
+
+
+class Command(BaseCommand):
+	"""
+	Roda EXPLAIN para cada filtro do PrecatorioFilterSet combinado com cada
+	formato de visibilidade do marketplace, com a ordenação e o limite da
+	listagem, e falha se alguma leitura da tabela precatorios não usar um
+	índice adequado ao formato.
+
+	Uma leitura passa se filtra pelo índice (Index Cond, Bitmap Index Scan ou
+	índice parcial) ou se percorre, em ordem, o índice esperado para o formato (ex: a vitrine
+	pelo índice parcial de disponíveis). Percorrer o índice geral de
+	created_at descartando linhas (Filter) só é aceito na listagem do admin.
+
+	Por padrão desliga enable_seqscan na transação, para verificar se existe
+	índice que atenda a consulta mesmo numa base pequena. Use --real-plans
+	para ver os planos que o planner escolheria com as estatísticas atuais.
+	"""
+	help = 'Verifica via EXPLAIN se as consultas da listagem de precatórios usam índices'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--real-plans', action='store_true', help='Não desliga enable_seqscan')
+		parser.add_argument('--verbose-plans', action='store_true', help='Mostra o plano completo de cada consulta')
+
+	def handle(self, *args, **options):
+		if connection.vendor != 'postgresql':
+			raise CommandError('Este comando requer PostgreSQL.')
+
+		failures = []
+		with transaction.atomic():
+			if not options['real_plans']:
+				with connection.cursor() as cursor:
+					cursor.execute('SET LOCAL enable_seqscan = off')
+
+			for visibility, (queryset, expected) in self.get_visibility_querysets().items():
+				for params in self.get_filter_combinations():
+					plan, nodes, wrong = self.check_listing(queryset, params, expected)
+
+					label = f'{visibility:<8} {", ".join(params) or "(sem filtro)"}'
+					indexes = ', '.join(sorted(self.get_index_names(nodes))) or '-'
+					if wrong:
+						failures.append(label)
+						scans = ', '.join(node.get('Index Name', node['Node Type']) for node in wrong)
+						self.stdout.write(self.style.ERROR(f'SEM ÍNDICE {label} -> {scans}'))
+					else:
+						self.stdout.write(self.style.SUCCESS(f'ÍNDICE     {label} -> {indexes}'))
+
+					if options['verbose_plans']:
+						self.stdout.write(json.dumps(plan['Plan'], indent=2))
+
+		if failures:
+			raise CommandError(f'{len(failures)} consulta(s) sem índice adequado: ' + '; '.join(failures))
+
+	def check_listing(self, queryset, params, expected):
+		"""
+		Roda EXPLAIN da listagem filtrada por params, com a ordenação e o limite
+		da view, e retorna o plano, os nós que leem precatorios e os que não
+		usam um índice adequado ao formato.
+		"""
+		queryset = PrecatorioFilterSet(params, queryset=queryset).qs
+		union = queryset.visibility_querysets() is not None
+		queryset = queryset.order_by('-created_at', '-id')[:api_settings.PAGE_SIZE]
+		if union:
+			# explain() não passa pelo _fetch_all: o UNION ALL é montado aqui
+			queryset = queryset.as_union()
+		plan = json.loads(queryset.explain(format='json'))
+		if isinstance(plan, list):
+			plan = plan[0]
+		nodes = self.get_precatorio_nodes(plan['Plan'])
+		wrong = [node for node in nodes if not self.uses_index(node, expected)]
+		return plan, nodes, wrong
+
+	@staticmethod
+	def get_index_names(nodes):
+		return {node['Index Name'] for node in nodes if 'Index Name' in node}
+
+	def get_visibility_querysets(self):
+		"""
+		Formatos de consulta gerados por MarketplaceViewPermission.filter_queryset,
+		com os índices que cada um deve percorrer na ordem da listagem.
+		"""
+		queryset = Precatorio.objects.all()
+		cedente = uuid.uuid4()
+		return {
+			'admin': (queryset, {'precatorios_created_idx'}),
+			'cedente': (queryset.filter(cedente_id=cedente), {'precatorios_ced_created_idx'}),
+			# Broker/Advogado: os seus + os disponíveis, um ramo do UNION ALL cada
+			'mercado': (
+				queryset.union_visibility(
+					Q(cedente_id=cedente),
+					Q(status=StatusPrecatorioChoices.DISPONIVEL) & ~Q(cedente_id=cedente),
+				),
+				{'precatorios_ced_created_idx', 'precatorios_disp_created_idx'},
+			),
+		}
+
+	@staticmethod
+	def uses_index(node, expected):
+		"""
+		Indica se a leitura usa um índice para filtrar (condição no índice ou
+		índice parcial), ou percorre um dos índices esperados para o formato.
+		"""
+		if node['Node Type'] == 'Seq Scan':
+			return False
+		if node['Node Type'] == 'Bitmap Index Scan' or 'Index Cond' in node or 'Recheck Cond' in node:
+			return True
+		partial = {index.name for index in Precatorio._meta.indexes if index.condition is not None}
+		return node.get('Index Name') in expected | partial
+
+	def get_filter_combinations(self):
+		combinations = [{}]
+		for field, lookups in PrecatorioFilterSet.Meta.fields.items():
+			for lookup in lookups:
+				name = field if lookup == 'exact' else f'{field}__{lookup}'
+				combinations.append({name: SAMPLE_VALUES[field]})
+		combinations.append({'numero_cnj': SAMPLE_VALUES['numero_cnj']})
+		return combinations
+
+	def get_precatorio_nodes(self, plan):
+		"""
+		Retorna os nós do plano que leem a tabela precatorios.
+		"""
+		table = Precatorio._meta.db_table
+		nodes = []
+		for node in walk_plan(plan):
+			if node.get('Relation Name') == table or (node['Node Type'] in INDEX_NODES and node.get('Index Name', '').startswith(table)):
+				nodes.append(node)
+		return nodes
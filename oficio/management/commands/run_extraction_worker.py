@@ -0,0 +1,105 @@
+import multiprocessing
+import time
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.storage import local_path
+from oficio.extraction import UnsupportedFormat, extract_document
+from oficio.extraction_queue import extraction_queue
+
+
+class Command(BaseCommand):
+	"""
+	Worker da fila de extração de texto dos documentos.
+
+	Reserva lotes de TextoDocumento pendentes no banco e extrai o texto dos
+	arquivos num pool de processos local (a extração de PDF é CPU-bound).
+	O resultado é gravado na tabela e indexado pela busca textual do Postgres
+	via trigger (ver migração 0009), então a busca não lê o filesystem.
+
+	Vários workers podem rodar ao mesmo tempo, inclusive em máquinas
+	diferentes que enxerguem o mesmo MEDIA_ROOT. Com o storage no S3 cada
+	arquivo do lote é baixado para um temporário enquanto é processado.
+	"""
+	help = 'Processa a fila de extração de texto dos documentos'
+
+	def add_arguments(self, parser):
+		options = getattr(settings, 'DOCUMENTO_EXTRACTION', {})
+		parser.add_argument('--workers', type=int, default=options.get('WORKERS', 2), help='Processos do pool de extração')
+		parser.add_argument('--batch-size', type=int, default=options.get('BATCH_SIZE', 10), help='Documentos reservados por lote')
+		parser.add_argument('--poll-interval', type=int, default=options.get('POLL_INTERVAL', 5), help='Segundos de espera quando a fila está vazia')
+		parser.add_argument('--once', action='store_true', help='Processa a fila até esvaziar e encerra')
+		parser.add_argument('--enqueue-missing', action='store_true', help='Enfileira antes os documentos ainda sem texto')
+
+	def handle(self, *args, **options):
+		if options['enqueue_missing']:
+			created = extraction_queue.enqueue_missing()
+			self.stdout.write(f'{created} documento(s) enfileirados.')
+
+		# forkserver: os processos não herdam a conexão com o banco do worker
+		context = multiprocessing.get_context('forkserver')
+		context.set_forkserver_preload(['oficio.extraction'])
+		executor = ProcessPoolExecutor(max_workers=max(options['workers'], 1), mp_context=context)
+		batch_size = max(options['batch_size'], options['workers'], 1)
+		processed = 0
+		try:
+			while True:
+				close_old_connections()
+				jobs = extraction_queue.claim(batch_size)
+				if not jobs:
+					if options['once']:
+						break
+					time.sleep(options['poll_interval'])
+					continue
+				try:
+					processed += self.process(executor, jobs)
+				except BrokenProcessPool:
+					# Um processo morreu (ex: falta de memória num PDF enorme); os
+					# documentos sem resultado voltam para a fila após STALE_AFTER,
+					# até MAX_ATTEMPTS reservas (depois viram Erro, ver claim).
+					self.stderr.write(self.style.WARNING('Pool de extração reiniciado.'))
+					executor.shutdown(wait=False, cancel_futures=True)
+					executor = ProcessPoolExecutor(max_workers=max(options['workers'], 1), mp_context=context)
+		except KeyboardInterrupt:
+			pass
+		finally:
+			executor.shutdown(cancel_futures=True)
+		self.stdout.write(self.style.SUCCESS(f'{processed} documento(s) processados.'))
+
+	def process(self, executor, jobs):
+		with ExitStack() as files:
+			return self.process_files(executor, jobs, files)
+
+	def process_files(self, executor, jobs, files):
+		futures = {}
+		for job in jobs:
+			documento = job.documento
+			if not documento.arquivo:
+				extraction_queue.skip(job, 'Documento sem arquivo.')
+				continue
+			try:
+				path = files.enter_context(local_path(documento.arquivo))
+			except FileNotFoundError as e:
+				extraction_queue.fail(job, e)
+				continue
+			futures[executor.submit(extract_document, path, documento.get_file_extension())] = job
+
+		for future in as_completed(futures):
+			job = futures[future]
+			try:
+				texto, identificadores = future.result()
+			except UnsupportedFormat as e:
+				extraction_queue.skip(job, str(e))
+			except BrokenProcessPool:
+				raise
+			except Exception as e:
+				extraction_queue.fail(job, e)
+				self.stderr.write(f'Falha na extração do documento {job.pk}: {e}')
+			else:
+				extraction_queue.complete(job, texto, identificadores)
+		return len(jobs)
@@ -0,0 +1,388 @@
+"""
+Coleta de arquivos órfãos do MEDIA_ROOT (comando collect_orphan_media).
+
+Arquivos de documentos e avatares não são apagados quando a linha que os
+referencia some (cascata de Precatorio, troca de avatar, uploads que
+falharam depois de gravar o arquivo). O coletor percorre as pastas de
+MEDIA_GC['ROOTS'] em ordem, em lotes, e compara cada arquivo com as
+referências do banco:
+
+- as referências são carregadas uma vez por execução num set, ou num filtro
+  de Bloom quando passam de MEDIA_GC['SET_LIMIT'] (memória fixa). Um falso
+  positivo do Bloom só faz um órfão sobreviver até a próxima passada;
+- os candidatos de cada lote são conferidos de novo no banco antes de sair,
+  pois podem ter sido referenciados depois da carga;
+- arquivos mais novos que MIN_AGE segundos são ignorados (upload em andamento).
+
+O progresso (último caminho visto e totais) fica num arquivo de estado, então
+uma execução interrompida ou limitada por --max-files continua de onde parou.
+
+Também são removidos os arquivos parciais de upload retomável (TEMP_DIR de
+DOCUMENTO_UPLOAD) sem sessão ativa, e as sessões paradas há mais de
+UPLOAD_EXPIRES segundos são canceladas.
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+def get_gc_settings():
+	options = getattr(settings, 'MEDIA_GC', {})
+	base = os.path.join(settings.BASE_DIR, 'cache')
+	return {
+		'ROOTS': options.get('ROOTS', ['avatars', 'precatorios/docs']),
+		'REFERENCES': options.get('REFERENCES', [
+			('oficio.Documento', 'arquivo'),
+			(settings.AUTH_USER_MODEL, 'avatar'),
+		]),
+		'STATE_FILE': str(options.get('STATE_FILE', os.path.join(base, 'media_gc.json'))),
+		'QUARANTINE_DIR': str(options.get('QUARANTINE_DIR', os.path.join(base, 'media_quarantine'))),
+		'MIN_AGE': options.get('MIN_AGE', 24 * 3600),
+		'SET_LIMIT': options.get('SET_LIMIT', 1000000),
+		'BATCH_SIZE': options.get('BATCH_SIZE', 500),
+		'MAX_OPS_PER_SECOND': options.get('MAX_OPS_PER_SECOND', 200),
+		'UPLOAD_EXPIRES': options.get('UPLOAD_EXPIRES', 7 * 24 * 3600),
+	}
+
+
+class BloomFilter:
+	"""
+	Filtro de Bloom simples (double hashing sobre blake2b). Nunca dá falso
+	negativo: um nome adicionado sempre é encontrado.
+	"""
+
+	def __init__(self, capacity, error_rate=0.001):
+		capacity = max(capacity, 1)
+		self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+		self.hashes = max(1, round(self.size / capacity * math.log(2)))
+		self.bits = bytearray((self.size + 7) // 8)
+
+	def positions(self, value):
+		digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+		first = int.from_bytes(digest[:8], 'big')
+		second = int.from_bytes(digest[8:], 'big') | 1
+		return ((first + index * second) % self.size for index in range(self.hashes))
+
+	def add(self, value):
+		for position in self.positions(value):
+			self.bits[position >> 3] |= 1 << (position & 7)
+
+	def __contains__(self, value):
+		return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class RateLimiter:
+	"""
+	Limita as operações de disco (stat, remoção, movimentação) por segundo.
+	"""
+
+	def __init__(self, per_second):
+		self.interval = 1 / per_second if per_second else 0
+		self.next_at = time.monotonic()
+
+	def wait(self):
+		if not self.interval:
+			return
+		now = time.monotonic()
+		if self.next_at > now:
+			time.sleep(self.next_at - now)
+		self.next_at = max(self.next_at, now) + self.interval
+
+
+def get_reference_fields(options):
+	for label, field_name in options['REFERENCES']:
+		model = apps.get_model(label)
+		yield model, model._meta.get_field(field_name)
+
+
+def load_references(options):
+	"""
+	Carrega os nomes de arquivo referenciados no banco num set ou, acima de
+	SET_LIMIT, num filtro de Bloom. Valores padrão dos campos (ex: o avatar
+	padrão) contam como referenciados.
+	"""
+	fields = list(get_reference_fields(options))
+	total = sum(model._default_manager.exclude(**{field.name: ''}).count() for model, field in fields)
+	references = BloomFilter(total + len(fields)) if total > options['SET_LIMIT'] else set()
+	for model, field in fields:
+		if isinstance(field.default, str) and field.default:
+			references.add(field.default)
+		names = (
+			model._default_manager.exclude(**{field.name: ''})
+			.exclude(**{f'{field.name}__isnull': True})
+			.values_list(field.name, flat=True)
+			.iterator(chunk_size=5000)
+		)
+		for name in names:
+			references.add(name)
+	return references
+
+
+def confirm_orphans(names, options):
+	"""
+	Confere no banco quais dos candidatos continuam sem referência.
+	"""
+	referenced = set()
+	for model, field in get_reference_fields(options):
+		if isinstance(field.default, str):
+			referenced.add(field.default)
+		referenced.update(
+			model._default_manager.filter(**{f'{field.name}__in': names}).values_list(field.name, flat=True)
+		)
+	return [name for name in names if name not in referenced]
+
+
+def iter_files(root, relative, after):
+	"""
+	Percorre os arquivos de `root` em ordem, retornando (nome relativo, caminho).
+	Com `after` (tupla de componentes do último nome visto), pula tudo que
+	vem antes dele sem listar as pastas já percorridas.
+	"""
+	try:
+		entries = sorted(os.scandir(os.path.join(root, *relative)), key=lambda entry: entry.name)
+	except FileNotFoundError:
+		return
+	for entry in entries:
+		parts = relative + (entry.name,)
+		if entry.is_dir(follow_symlinks=False):
+			if after is not None and parts < after[:len(parts)]:
+				continue
+			yield from iter_files(root, parts, after if after is not None and parts == after[:len(parts)] else None)
+		elif entry.is_file(follow_symlinks=False):
+			if after is not None and parts <= after:
+				continue
+			yield '/'.join(parts), entry.path
+
+
+class MediaGarbageCollector:
+	"""
+	Uma passada (ou parte dela, com max_files) do coletor.
+
+	action:
+	- 'report': só conta os órfãos;
+	- 'delete': remove os órfãos;
+	- 'quarantine': move os órfãos para QUARANTINE_DIR, mantendo o caminho.
+	"""
+
+	def __init__(self, action='report', options=None, stdout=None):
+		self.action = action
+		self.options = options or get_gc_settings()
+		self.stdout = stdout
+		self.limiter = RateLimiter(self.options['MAX_OPS_PER_SECOND'])
+		self.media_root = str(settings.MEDIA_ROOT)
+
+	def load_state(self):
+		if self.action == 'report':
+			return self.new_state()
+		try:
+			with open(self.options['STATE_FILE']) as file:
+				return json.load(file)
+		except (FileNotFoundError, ValueError):
+			return self.new_state()
+
+	def new_state(self):
+		return {
+			'iniciado_em': timezone.now().isoformat(),
+			'ultimo': None,
+			'arquivos': 0,
+			'orfaos': 0,
+			'bytes': 0,
+		}
+
+	def save_state(self, state):
+		"""
+		Grava o ponto de parada. Em 'report' nada é gravado, para um relatório
+		não pular arquivos da próxima limpeza.
+		"""
+		if self.action == 'report':
+			return
+		path = self.options['STATE_FILE']
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(f'{path}.tmp', 'w') as file:
+			json.dump(state, file)
+		os.replace(f'{path}.tmp', path)
+
+	def iter_media(self, last):
+		"""
+		Percorre as raízes em ordem, continuando depois de `last`.
+		"""
+		after = tuple(last.split('/')) if last else None
+		roots = sorted(tuple(root.strip('/').split('/')) for root in self.options['ROOTS'])
+		for prefix in roots:
+			if after is None or prefix > after[:len(prefix)]:
+				yield from iter_files(self.media_root, prefix, None)
+			elif prefix == after[:len(prefix)]:
+				yield from iter_files(self.media_root, prefix, after)
+
+	def dispose(self, name, path):
+		if self.action == 'delete':
+			os.remove(path)
+			self.remove_empty_dirs(os.path.dirname(path))
+		elif self.action == 'quarantine':
+			target = os.path.join(self.options['QUARANTINE_DIR'], name)
+			os.makedirs(os.path.dirname(target), exist_ok=True)
+			shutil.move(path, target)
+			self.remove_empty_dirs(os.path.dirname(path))
+
+	def dispose_orphan(self, name, path):
+		"""
+		Remove um órfão confirmado. Arquivos nomeados pelo SHA-256 podem voltar
+		a ser referenciados por um upload do mesmo conteúdo: a última conferência
+		é feita com a trava do SHA-256 (oficio.models.lock_stored_file).
+		Retorna se o arquivo saiu.
+		"""
+		from .models import lock_stored_file
+		from .storage import ContentAddressedMixin
+
+		digest = ContentAddressedMixin.digest_from_name(name)
+		if digest is None or self.action == 'report':
+			self.dispose(name, path)
+			return True
+		with transaction.atomic():
+			lock_stored_file(digest)
+			if not confirm_orphans([name], self.options):
+				return False
+			self.dispose(name, path)
+		return True
+
+	def remove_empty_dirs(self, directory):
+		"""
+		Remove as pastas que ficaram vazias, sem subir além das raízes.
+		"""
+		roots = {os.path.join(self.media_root, root.strip('/')) for root in self.options['ROOTS']}
+		while directory not in roots and directory.startswith(self.media_root):
+			try:
+				os.rmdir(directory)
+			except OSError:
+				return
+			directory = os.path.dirname(directory)
+
+	def process_batch(self, batch, state):
+		orphans = confirm_orphans([name for name, _, _ in batch], self.options)
+		orphans = set(orphans)
+		for name, path, size in batch:
+			if name not in orphans:
+				continue
+			self.limiter.wait()
+			try:
+				if not self.dispose_orphan(name, path):
+					continue
+			except FileNotFoundError:
+				continue
+			state['orfaos'] += 1
+			state['bytes'] += size
+			if self.stdout is not None and self.action == 'report':
+				self.stdout.write(f'Órfão: {name} ({size} bytes)')
+
+	def run(self, max_files=None, restart=False):
+		"""
+		Processa até `max_files` arquivos a partir do ponto salvo.
+		Retorna (estado, terminou) — terminou=True quando a passada chegou
+		ao fim das raízes; o estado é então reiniciado para a próxima.
+		"""
+		state = self.new_state() if restart else self.load_state()
+		references = load_references(self.options)
+		min_mtime = time.time() - self.options['MIN_AGE']
+		batch = []
+		seen = 0
+		finished = True
+
+		for name, path in self.iter_media(state['ultimo']):
+			if max_files is not None and seen >= max_files:
+				finished = False
+				break
+			seen += 1
+			state['arquivos'] += 1
+			state['ultimo'] = name
+			if name in references:
+				continue
+			self.limiter.wait()
+			try:
+				stat = os.stat(path)
+			except FileNotFoundError:
+				continue
+			if stat.st_mtime > min_mtime:
+				continue
+			batch.append((name, path, stat.st_size))
+			if len(batch) >= self.options['BATCH_SIZE'] or seen % self.options['BATCH_SIZE'] == 0:
+				if batch:
+					self.process_batch(batch, state)
+					batch = []
+				self.save_state(state)
+
+		if batch:
+			self.process_batch(batch, state)
+		if finished:
+			state['concluido_em'] = timezone.now().isoformat()
+			self.save_state(self.new_state())
+		else:
+			self.save_state(state)
+		return state, finished
+
+	def collect_uploads(self):
+		"""
+		Cancela sessões de upload abandonadas e remove arquivos parciais sem
+		sessão ativa. Retorna (arquivos, bytes).
+		"""
+		from .models import StatusUploadChoices, UploadDocumento
+		from .uploads import discard_direct_object, get_upload_settings
+
+		expired = UploadDocumento.objects.filter(
+			status=StatusUploadChoices.ATIVO,
+			updated_at__lt=timezone.now() - timedelta(seconds=self.options['UPLOAD_EXPIRES']),
+		)
+		if self.action != 'report':
+			# Objetos de uploads diretos nunca concluídos ficam no bucket, fora do MEDIA_ROOT
+			for session in expired.filter(direto=True).exclude(chave='').iterator():
+				discard_direct_object(session)
+			expired.update(status=StatusUploadChoices.CANCELADO, updated_at=timezone.now())
+
+		temp_dir = get_upload_settings()['TEMP_DIR']
+		min_mtime = time.time() - self.options['MIN_AGE']
+		try:
+			entries = [entry for entry in os.scandir(temp_dir) if entry.name.endswith('.part') and entry.is_file()]
+		except FileNotFoundError:
+			return 0, 0
+
+		active = set(
+			str(pk) for pk in UploadDocumento.objects.filter(
+				pk__in=[entry.name[:-len('.part')] for entry in entries if is_uuid(entry.name[:-len('.part')])],
+				status=StatusUploadChoices.ATIVO,
+			).values_list('pk', flat=True)
+		)
+		removed = 0
+		reclaimed = 0
+		for entry in entries:
+			if entry.name[:-len('.part')] in active:
+				continue
+			self.limiter.wait()
+			try:
+				stat = entry.stat()
+				if stat.st_mtime > min_mtime:
+					# Sessão concluída/cancelada há pouco: a view ainda pode estar usando o arquivo
+					continue
+				if self.action != 'report':
+					os.remove(entry.path)
+			except FileNotFoundError:
+				continue
+			removed += 1
+			reclaimed += stat.st_size
+		return removed, reclaimed
+
+
+def is_uuid(value):
+	try:
+		uuid.UUID(value)
+	except ValueError:
+		return False
+	return True
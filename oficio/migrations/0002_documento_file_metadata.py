@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-16 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='content_type',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Content-Type do arquivo, gravado no upload', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='extensao',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Extensão do arquivo, gravada no upload', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='tamanho_bytes',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Tamanho do arquivo em bytes, gravado no upload', null=True),
+        ),
+    ]
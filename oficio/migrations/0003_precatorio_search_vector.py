@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-16 22:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+SEARCH_CONFIG_SQL = """
+CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+"""
+
+SEARCH_TRIGGER_SQL = """
+CREATE FUNCTION precatorios_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.numero_processo, '')), 'A') ||
+        setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.descricao, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER precatorios_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON precatorios
+    FOR EACH ROW EXECUTE FUNCTION precatorios_search_vector_update();
+
+UPDATE precatorios SET search_vector =
+    setweight(to_tsvector('portuguese_unaccent', coalesce(numero_processo, '')), 'A') ||
+    setweight(to_tsvector('portuguese_unaccent', coalesce(descricao, '')), 'B');
+"""
+
+SEARCH_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS precatorios_search_vector_trigger ON precatorios;
+DROP FUNCTION IF EXISTS precatorios_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0002_documento_file_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(
+            SEARCH_CONFIG_SQL,
+            reverse_sql='DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent;',
+        ),
+        migrations.AddField(
+            model_name='precatorio',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Vetor de busca textual (numero_processo + descricao), mantido por trigger no banco', null=True),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, reverse_sql=SEARCH_TRIGGER_REVERSE_SQL),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='precatorios_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['numero_processo'], name='precatorios_numero_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
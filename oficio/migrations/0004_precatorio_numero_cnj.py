@@ -0,0 +1,99 @@
+# Generated by Django 6.0 on 2026-10-16 22:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+from oficio.cnj import normalize_cnj, parse_cnj
+
+
+CNJ_FIELDS = ['numero_cnj', 'cnj_ano', 'cnj_segmento', 'cnj_tribunal', 'cnj_origem']
+
+
+def fill_numero_cnj(apps, schema_editor):
+    Precatorio = apps.get_model('oficio', 'Precatorio')
+    batch = []
+    for precatorio in Precatorio.objects.only('pk', 'numero_processo').iterator(chunk_size=1000):
+        parts = parse_cnj(precatorio.numero_processo)
+        if parts is None:
+            continue
+        precatorio.numero_cnj = normalize_cnj(precatorio.numero_processo)
+        precatorio.cnj_ano = parts.ano
+        precatorio.cnj_segmento = parts.segmento
+        precatorio.cnj_tribunal = parts.tribunal
+        precatorio.cnj_origem = parts.origem
+        batch.append(precatorio)
+        if len(batch) >= 1000:
+            Precatorio.objects.bulk_update(batch, CNJ_FIELDS)
+            batch = []
+    if batch:
+        Precatorio.objects.bulk_update(batch, CNJ_FIELDS)
+
+
+def clear_duplicate_numero_cnj(apps, schema_editor):
+    """
+    Números legados que normalizam para o mesmo CNJ (ex: com e sem
+    pontuação): o mais antigo fica com o numero_cnj e os demais com NULL,
+    para a constraint única poder ser criada.
+    """
+    Precatorio = apps.get_model('oficio', 'Precatorio')
+    duplicates = (
+        Precatorio.objects.filter(numero_cnj__isnull=False)
+        .values('numero_cnj')
+        .annotate(total=models.Count('pk'))
+        .filter(total__gt=1)
+        .values_list('numero_cnj', flat=True)
+    )
+    for numero_cnj in duplicates.iterator():
+        rows = Precatorio.objects.filter(numero_cnj=numero_cnj)
+        first = rows.order_by('created_at', 'pk').values_list('pk', flat=True).first()
+        rows.exclude(pk=first).update(numero_cnj=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0003_precatorio_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='precatorio',
+            name='cnj_ano',
+            field=models.SmallIntegerField(blank=True, editable=False, help_text='Ano de ajuizamento (AAAA do número CNJ)', null=True),
+        ),
+        migrations.AddField(
+            model_name='precatorio',
+            name='cnj_origem',
+            field=models.CharField(blank=True, editable=False, help_text='Unidade de origem (OOOO do número CNJ)', max_length=4, null=True),
+        ),
+        migrations.AddField(
+            model_name='precatorio',
+            name='cnj_segmento',
+            field=models.CharField(blank=True, editable=False, help_text='Segmento do Judiciário (J do número CNJ)', max_length=1, null=True),
+        ),
+        migrations.AddField(
+            model_name='precatorio',
+            name='cnj_tribunal',
+            field=models.CharField(blank=True, editable=False, help_text='Tribunal (TR do número CNJ)', max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='precatorio',
+            name='numero_cnj',
+            field=models.CharField(blank=True, editable=False, help_text='Número CNJ apenas com dígitos, calculado a partir de numero_processo', max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=models.Index(fields=['cnj_segmento', 'cnj_tribunal', 'cnj_ano'], name='precatorios_cnj_partes_idx'),
+        ),
+        migrations.RunPython(fill_numero_cnj, migrations.RunPython.noop),
+        migrations.RunPython(clear_duplicate_numero_cnj, migrations.RunPython.noop),
+        # Dispara agora os checks de FK adiados pelos UPDATEs acima: o Postgres
+        # não altera uma tabela com eventos de trigger pendentes na transação.
+        migrations.RunSQL('SET CONSTRAINTS ALL IMMEDIATE', migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='precatorio',
+            name='numero_cnj',
+            field=models.CharField(blank=True, editable=False, help_text='Número CNJ apenas com dígitos, calculado a partir de numero_processo', max_length=20, null=True, unique=True),
+        ),
+    ]
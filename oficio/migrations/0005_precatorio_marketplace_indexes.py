@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-16 22:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0004_precatorio_numero_cnj'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='precatorio',
+            name='precatorios_status_2f6685_idx',
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=models.Index(fields=['status', '-created_at'], name='precatorios_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=models.Index(fields=['-created_at', '-id'], name='precatorios_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=models.Index(fields=['cedente', '-created_at', '-id'], name='precatorios_ced_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='precatorio',
+            index=models.Index(condition=models.Q(('status', 'Disponível')), fields=['-created_at', '-id'], name='precatorios_disp_created_idx'),
+        ),
+    ]
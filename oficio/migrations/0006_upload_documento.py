@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-16 22:46
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0005_precatorio_marketplace_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadDocumento',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('titulo', models.CharField(help_text='Título do documento que será criado', max_length=100)),
+                ('nome_arquivo', models.CharField(help_text='Nome original do arquivo', max_length=255)),
+                ('tamanho', models.BigIntegerField(help_text='Tamanho total do arquivo em bytes, declarado na abertura da sessão')),
+                ('offset', models.BigIntegerField(default=0, help_text='Bytes já recebidos')),
+                ('checksum', models.CharField(blank=True, default='', help_text='SHA-256 (hex) do arquivo completo, opcional', max_length=64)),
+                ('status', models.CharField(choices=[('Ativo', 'Ativo'), ('Concluído', 'Concluído'), ('Cancelado', 'Cancelado')], default='Ativo', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('documento', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='oficio.documento')),
+                ('precatorio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='oficio.precatorio')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads_documentos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload de Documento',
+                'verbose_name_plural': 'Uploads de Documentos',
+                'db_table': 'precatorios_documentos_uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
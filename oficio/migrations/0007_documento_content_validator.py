@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-16 22:48
+
+import oficio.content
+import oficio.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0006_upload_documento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documento',
+            name='arquivo',
+            field=models.FileField(help_text='Apenas arquivos PDF (.pdf) e Word (.doc, .docx) são aceitos. Tamanho máximo: 10MB', upload_to='precatorios/docs/%Y/%m/', validators=[oficio.models.validate_file_extension, oficio.models.validate_file_size, oficio.content.validate_file_content]),
+        ),
+    ]
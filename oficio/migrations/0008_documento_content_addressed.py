@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-16 22:52
+
+import oficio.content
+import oficio.models
+import oficio.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0007_documento_content_validator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='SHA-256 do conteúdo do arquivo', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='documento',
+            name='arquivo',
+            field=models.FileField(help_text='Apenas arquivos PDF (.pdf) e Word (.doc, .docx) são aceitos. Tamanho máximo: 10MB', storage=oficio.storage.get_documento_storage, upload_to='precatorios/docs/%Y/%m/', validators=[oficio.models.validate_file_extension, oficio.models.validate_file_size, oficio.content.validate_file_content]),
+        ),
+    ]
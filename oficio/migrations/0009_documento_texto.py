@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-16 22:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+SEARCH_TRIGGER_SQL = """
+CREATE FUNCTION precatorios_documentos_textos_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.identificadores, '')), 'A') ||
+        setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.texto, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER precatorios_documentos_textos_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF texto, identificadores ON precatorios_documentos_textos
+    FOR EACH ROW EXECUTE FUNCTION precatorios_documentos_textos_search_vector_update();
+"""
+
+SEARCH_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS precatorios_documentos_textos_search_vector_trigger ON precatorios_documentos_textos;
+DROP FUNCTION IF EXISTS precatorios_documentos_textos_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0008_documento_content_addressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextoDocumento',
+            fields=[
+                ('documento', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='texto', serialize=False, to='oficio.documento')),
+                ('status', models.CharField(choices=[('Pendente', 'Pendente'), ('Processando', 'Processando'), ('Concluído', 'Concluído'), ('Erro', 'Erro'), ('Ignorado', 'Ignorado')], default='Pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('texto', models.TextField(blank=True, default='')),
+                ('identificadores', models.TextField(blank=True, default='', help_text='CPFs, CNPJs e valores encontrados no texto, só com dígitos')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Vetor de busca textual, mantido por trigger no banco', null=True)),
+                ('agendado_em', models.DateTimeField(default=django.utils.timezone.now, help_text='Quando a extração pode ser (re)tentada')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Texto de Documento',
+                'verbose_name_plural': 'Textos de Documentos',
+                'db_table': 'precatorios_documentos_textos',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='documentos_textos_search_gin'), models.Index(condition=models.Q(('status__in', ['Pendente', 'Processando'])), fields=['agendado_em'], name='documentos_textos_fila_idx')],
+            },
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, reverse_sql=SEARCH_TRIGGER_REVERSE_SQL),
+    ]
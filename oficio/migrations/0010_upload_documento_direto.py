@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-16 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oficio', '0009_documento_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploaddocumento',
+            name='chave',
+            field=models.CharField(blank=True, default='', help_text='Nome do arquivo no storage (upload direto)', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='uploaddocumento',
+            name='direto',
+            field=models.BooleanField(default=False, help_text='Arquivo enviado direto ao storage por URL pré-assinada'),
+        ),
+    ]
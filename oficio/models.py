@@ -1,10 +1,18 @@
-from django.db import models
+from django.db import connection, models, transaction
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 import os
+import mimetypes
+import hashlib
 from auth.models import TypeUserChoices 
+from .cnj import normalize_cnj, parse_cnj
+from .content import validate_file_content
+from .storage import get_documento_storage
 
 class EsferaChoices:
     FEDERAL = 'Federal'
@@ -70,6 +78,141 @@ class EnteDevedor(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.esfera})"
 
+class PrecatorioQuerySet(models.QuerySet):
+    """
+    QuerySet de Precatorio com suporte a visibilidade via UNION ALL.
+
+    `union_visibility(*conditions)` guarda condições de visibilidade disjuntas
+    em vez de aplicar um OR. Filtros, anotações e ordenação continuam sendo
+    encadeados normalmente; na avaliação, cada condição vira um ramo
+    `WHERE condição AND filtros ORDER BY ... LIMIT n`, servido pelo seu próprio
+    índice, e os ramos são unidos com UNION ALL, reordenados e fatiados.
+    """
+    _visibility_branches = None
+
+    def union_visibility(self, *conditions):
+        clone = self._chain()
+        clone._visibility_branches = conditions
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._visibility_branches = self._visibility_branches
+        return clone
+
+    def _without_visibility(self):
+        clone = self._chain()
+        clone._visibility_branches = None
+        return clone
+
+    def visibility_querysets(self):
+        """
+        Retorna um queryset por ramo de visibilidade, ou None se o
+        queryset não usa UNION.
+        """
+        if not self._visibility_branches:
+            return None
+        base = self._without_visibility()
+        return [base.filter(condition) for condition in self._visibility_branches]
+
+    def as_union(self):
+        """
+        Monta o UNION ALL dos ramos, propagando ordenação e limite para cada ramo.
+        """
+        base = self._without_visibility()
+        low, high = base.query.low_mark, base.query.high_mark
+        base.query.clear_limits()
+        if high is not None and high <= low:
+            return base.none()
+        ordering = list(base.query.order_by or base.model._meta.ordering)
+        if ordering and not {'pk', '-pk', 'id', '-id'} & {str(field) for field in ordering}:
+            ordering.append('-pk')
+
+        branches = [base.filter(condition) for condition in self._visibility_branches]
+        if ordering:
+            branches = [branch.order_by(*ordering) for branch in branches]
+        if high is not None:
+            branches = [branch[:high] for branch in branches]
+
+        combined = branches[0].union(*branches[1:], all=True)
+        if ordering:
+            combined = combined.order_by(*ordering)
+        if low or high is not None:
+            combined = combined[low:high]
+        return combined
+
+    def as_subquery(self):
+        """
+        Retorna um queryset equivalente com os ramos de visibilidade unidos
+        por OR, para uso como subquery (`campo__in=...`), onde o UNION não
+        pode ser usado.
+        """
+        if not self._visibility_branches:
+            return self
+        condition = models.Q()
+        for branch in self._visibility_branches:
+            condition |= branch
+        return self._without_visibility().filter(condition)
+
+    def _fetch_all(self):
+        if self._visibility_branches and self._result_cache is None:
+            self._result_cache = list(self.as_union())
+            self._prefetch_done = True
+        super()._fetch_all()
+
+    def count(self):
+        if self._visibility_branches and self._result_cache is None:
+            return sum(branch.count() for branch in self.visibility_querysets())
+        return super().count()
+
+    def exists(self):
+        if self._visibility_branches and self._result_cache is None:
+            return any(branch.exists() for branch in self.visibility_querysets())
+        return super().exists()
+
+    def freshness(self, expand=()):
+        """
+        Resumo do estado do queryset, usado como ETag da listagem e na chave
+        do cache da vitrine: quantidade e maior updated_at dos precatórios e,
+        conforme `expand`, maior updated_at do cedente/advogado e quantidade e
+        maior enviado_em dos documentos.
+
+        Cada ramo de visibilidade é agregado no seu índice e os resultados são
+        somados (quantidades) ou comparados (datas); como os ramos são
+        disjuntos, o resumo é o mesmo do UNION inteiro.
+
+        Tribunal e ente devedor não têm timestamp próprio: alterá-los atualiza
+        o updated_at dos precatórios vinculados (ver oficio.signals).
+        """
+        aggregates = {'total': models.Count('pk'), 'ultimo': models.Max('updated_at')}
+        for relation in ('cedente', 'advogado'):
+            if relation in expand:
+                aggregates[f'ultimo_{relation}'] = models.Max(f'{relation}__updated_at')
+        if 'documentos' in expand:
+            aggregates['total'] = models.Count('pk', distinct=True)
+            aggregates['total_documentos'] = models.Count('documentos')
+            aggregates['ultimo_documento'] = models.Max('documentos__enviado_em')
+
+        summary = {}
+        for queryset in self.visibility_querysets() or [self]:
+            for name, value in queryset.order_by().aggregate(**aggregates).items():
+                if name in ('total', 'total_documentos'):
+                    summary[name] = summary.get(name, 0) + value
+                elif value is not None and (summary.get(name) is None or value > summary[name]):
+                    summary[name] = value
+                else:
+                    summary.setdefault(name, None)
+        return sorted(summary.items())
+
+
+class PrecatorioManager(models.Manager.from_queryset(PrecatorioQuerySet)):
+    """
+    Manager padrão de Precatorio.
+    Adia o search_vector, que só é usado dentro do banco pela busca textual.
+    """
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
 class Precatorio(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -91,6 +234,11 @@ class Precatorio(models.Model):
     tribunal = models.ForeignKey(Tribunal, on_delete=models.PROTECT)
     ente_devedor = models.ForeignKey(EnteDevedor, on_delete=models.PROTECT)
     numero_processo = models.CharField(max_length=50, unique=True, help_text="Número CNJ ou do Ofício Requisitório")
+    numero_cnj = models.CharField(max_length=20, unique=True, null=True, blank=True, editable=False, help_text="Número CNJ apenas com dígitos, calculado a partir de numero_processo")
+    cnj_ano = models.SmallIntegerField(null=True, blank=True, editable=False, help_text="Ano de ajuizamento (AAAA do número CNJ)")
+    cnj_segmento = models.CharField(max_length=1, null=True, blank=True, editable=False, help_text="Segmento do Judiciário (J do número CNJ)")
+    cnj_tribunal = models.CharField(max_length=2, null=True, blank=True, editable=False, help_text="Tribunal (TR do número CNJ)")
+    cnj_origem = models.CharField(max_length=4, null=True, blank=True, editable=False, help_text="Unidade de origem (OOOO do número CNJ)")
     natureza = models.CharField(max_length=20, choices=NaturezaChoices.CHOICES)
     valor_principal = models.DecimalField(max_digits=18, decimal_places=2, help_text="Valor de face do precatório")
     valor_venda = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True, help_text="Valor pretendido para venda")
@@ -105,6 +253,15 @@ class Precatorio(models.Model):
     descricao = models.TextField(null=True, blank=True, help_text="Observações gerais sobre o ativo")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Vetor de busca textual (numero_processo + descricao), mantido por trigger no banco"
+    )
+
+    objects = PrecatorioManager()
+
+    CNJ_FIELDS = ('numero_cnj', 'cnj_ano', 'cnj_segmento', 'cnj_tribunal', 'cnj_origem')
 
     class Meta:
         db_table = 'precatorios'
@@ -112,22 +269,67 @@ class Precatorio(models.Model):
         verbose_name_plural = 'Precatórios'
         indexes = [
             models.Index(fields=['numero_processo']),
-            models.Index(fields=['status']),
+            models.Index(fields=['status', '-created_at'], name='precatorios_status_created_idx'),
             models.Index(fields=['natureza']),
             models.Index(fields=['ano_orcamentario']),
+            GinIndex(fields=['search_vector'], name='precatorios_search_gin'),
+            GinIndex(fields=['numero_processo'], name='precatorios_numero_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['cnj_segmento', 'cnj_tribunal', 'cnj_ano'], name='precatorios_cnj_partes_idx'),
+            # Formatos das consultas do marketplace (ver MarketplaceViewPermission):
+            # listagem geral, "meus precatórios" e a vitrine de disponíveis,
+            # todas ordenadas por created_at com id como desempate do keyset.
+            models.Index(fields=['-created_at', '-id'], name='precatorios_created_idx'),
+            models.Index(fields=['cedente', '-created_at', '-id'], name='precatorios_ced_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='precatorios_disp_created_idx',
+                condition=models.Q(status=StatusPrecatorioChoices.DISPONIVEL),
+            ),
         ]
         ordering = ['-created_at']
 
     def __str__(self):
         return f"{self.numero_processo} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        """
+        Recalcula o número CNJ normalizado e suas partes a partir de numero_processo.
+        """
+        self.fill_cnj_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'numero_processo' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.CNJ_FIELDS}
+        return super().save(*args, **kwargs)
+
+    def fill_cnj_fields(self):
+        """
+        Preenche numero_cnj e as partes decompostas.
+        Números que não seguem o padrão CNJ (20 dígitos) ficam com os campos nulos.
+        """
+        parts = parse_cnj(self.numero_processo)
+        if parts is None:
+            self.numero_cnj = None
+            self.cnj_ano = self.cnj_segmento = self.cnj_tribunal = self.cnj_origem = None
+            return
+        numero_cnj = normalize_cnj(self.numero_processo)
+        if self.numero_cnj is None and not self._state.adding and Precatorio.objects.filter(numero_cnj=numero_cnj).exclude(pk=self.pk).exists():
+            # Duplicata legada (ver migração 0004): o número continua com o primeiro precatório.
+            numero_cnj = None
+        self.numero_cnj = numero_cnj
+        self.cnj_ano = parts.ano
+        self.cnj_segmento = parts.segmento
+        self.cnj_tribunal = parts.tribunal
+        self.cnj_origem = parts.origem
+
+ALLOWED_FILE_EXTENSIONS = ['.pdf', '.doc', '.docx']
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
 def validate_file_extension(value):
 	"""
 	Valida se o arquivo tem extensão permitida (PDF ou Word).
 	"""
 	ext = os.path.splitext(value.name)[1].lower()
-	allowed_extensions = ['.pdf', '.doc', '.docx']
-	if ext not in allowed_extensions:
+	if ext not in ALLOWED_FILE_EXTENSIONS:
 		raise ValidationError(
 			_('Formato de arquivo não permitido. Apenas arquivos PDF (.pdf) e Word (.doc, .docx) são aceitos.')
 		)
@@ -136,12 +338,25 @@ def validate_file_size(value):
 	"""
 	Valida o tamanho máximo do arquivo (10MB).
 	"""
-	max_size = 10 * 1024 * 1024
-	if value.size > max_size:
+	if value.size > MAX_FILE_SIZE:
 		raise ValidationError(
 			_('O arquivo é muito grande. Tamanho máximo permitido: 10MB.')
 		)
 
+def lock_stored_file(sha256):
+	"""
+	Trava, até o fim da transação, o arquivo com este SHA-256 (advisory lock
+	do Postgres). Quem passa a apontar para um arquivo já gravado
+	(reuse_stored_file, o storage endereçado pelo conteúdo, o upload direto) e
+	quem o apaga ao remover o último Documento (oficio.signals) seguram a
+	mesma trava, então a remoção nunca acontece entre a conferência de que o
+	arquivo existe e o commit do novo Documento.
+	"""
+	if not sha256 or connection.vendor != 'postgresql':
+		return
+	with connection.cursor() as cursor:
+		cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(sha256[:15], 16)])
+
 class Documento(models.Model):
 	"""
 	Tabela para armazenar os documentos (PDFs e Word) relacionados aos precatórios.
@@ -152,9 +367,14 @@ class Documento(models.Model):
 	titulo = models.CharField(max_length=100, help_text="Ex: Ofício Requisitório, Memória de Cálculo")
 	arquivo = models.FileField(
 		upload_to='precatorios/docs/%Y/%m/',
-		validators=[validate_file_extension, validate_file_size],
+		storage=get_documento_storage,
+		validators=[validate_file_extension, validate_file_size, validate_file_content],
 		help_text="Apenas arquivos PDF (.pdf) e Word (.doc, .docx) são aceitos. Tamanho máximo: 10MB"
 	)
+	tamanho_bytes = models.BigIntegerField(null=True, blank=True, editable=False, help_text="Tamanho do arquivo em bytes, gravado no upload")
+	extensao = models.CharField(max_length=10, blank=True, default='', editable=False, help_text="Extensão do arquivo, gravada no upload")
+	content_type = models.CharField(max_length=100, blank=True, default='', editable=False, help_text="Content-Type do arquivo, gravado no upload")
+	sha256 = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False, help_text="SHA-256 do conteúdo do arquivo")
 	enviado_em = models.DateTimeField(auto_now_add=True)
 
 	class Meta:
@@ -166,20 +386,85 @@ class Documento(models.Model):
 	def __str__(self):
 		return f"{self.titulo} - {self.precatorio.numero_processo}"
 
+	def save(self, *args, **kwargs):
+		"""
+		Grava os metadados do arquivo quando um novo upload é recebido,
+		para que serializers e admin não precisem consultar o storage.
+		"""
+		if self.arquivo and not self.arquivo._committed:
+			self.fill_file_metadata()
+			with transaction.atomic():
+				lock_stored_file(self.sha256)
+				self.reuse_stored_file()
+				return super().save(*args, **kwargs)
+		return super().save(*args, **kwargs)
+
+	def reuse_stored_file(self):
+		"""
+		Se outro Documento já tem o mesmo conteúdo (SHA-256), aponta para o
+		arquivo dele em vez de gravar uma cópia: o upload vira só um INSERT.
+		"""
+		name = (
+			Documento.objects.filter(sha256=self.sha256)
+			.exclude(pk=self.pk)
+			.values_list('arquivo', flat=True)
+			.first()
+		)
+		if name and self.arquivo.storage.exists(name):
+			self.arquivo.name = name
+			self.arquivo._committed = True
+
+	def fill_file_metadata(self):
+		"""
+		Preenche tamanho, extensão e content type a partir do arquivo.
+		Para uploads novos o tamanho vem do próprio upload, sem I/O no storage.
+		"""
+		upload = self.arquivo.file if not self.arquivo._committed else None
+		self.tamanho_bytes = upload.size if upload is not None else self.arquivo.size
+		if upload is not None and not self.sha256:
+			self.sha256 = self.compute_sha256()
+		self.extensao = os.path.splitext(self.arquivo.name)[1].lower()
+		self.content_type = (
+			getattr(upload, 'content_type', None)
+			or mimetypes.guess_type(self.arquivo.name)[0]
+			or 'application/octet-stream'
+		)
+
+	def compute_sha256(self):
+		"""
+		Calcula o SHA-256 do arquivo lendo em blocos.
+		"""
+		digest = hashlib.sha256()
+		if self.arquivo._committed:
+			with self.arquivo.open('rb') as file:
+				for chunk in file.chunks():
+					digest.update(chunk)
+			return digest.hexdigest()
+
+		upload = self.arquivo.file
+		upload.seek(0)
+		for chunk in upload.chunks():
+			digest.update(chunk)
+		upload.seek(0)
+		return digest.hexdigest()
+
 	def get_file_extension(self):
 		"""
 		Retorna a extensão do arquivo.
 		"""
+		if self.extensao:
+			return self.extensao
 		if self.arquivo:
 			return os.path.splitext(self.arquivo.name)[1].lower()
 		return None
 
 	def get_file_size_mb(self):
 		"""
-		Retorna o tamanho do arquivo em MB.
+		Retorna o tamanho do arquivo em MB, lido da coluna tamanho_bytes.
+		Documentos antigos ficam sem tamanho até rodar `backfill_documento_metadata`.
 		"""
-		if self.arquivo:
-			return round(self.arquivo.size / (1024 * 1024), 2)
+		if self.tamanho_bytes is not None:
+			return round(self.tamanho_bytes / (1024 * 1024), 2)
 		return None
 
 	def is_pdf(self):
@@ -192,4 +477,113 @@ class Documento(models.Model):
 		"""
 		Verifica se o arquivo é um documento Word.
 		"""
-		return self.get_file_extension() in ['.doc', '.docx']
\ No newline at end of file
+		return self.get_file_extension() in ['.doc', '.docx']
+
+
+class StatusUploadChoices:
+	ATIVO = 'Ativo'
+	CONCLUIDO = 'Concluído'
+	CANCELADO = 'Cancelado'
+
+	CHOICES = [
+		(ATIVO, 'Ativo'),
+		(CONCLUIDO, 'Concluído'),
+		(CANCELADO, 'Cancelado'),
+	]
+
+
+class UploadDocumento(models.Model):
+	"""
+	Sessão de upload retomável de um Documento.
+
+	Os bytes recebidos são gravados em um arquivo parcial (ver oficio.uploads)
+	e `offset` guarda quanto já foi recebido. Quando `offset` chega a `tamanho`
+	o arquivo é conferido pelo checksum e vira um Documento.
+
+	Em sessões `direto` o cliente envia o arquivo para o bucket, na `chave`
+	indicada, por uma URL pré-assinada; a sessão só é concluída depois que o
+	objeto é conferido no storage.
+	"""
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	precatorio = models.ForeignKey(Precatorio, on_delete=models.CASCADE, related_name='uploads')
+	usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploads_documentos')
+	titulo = models.CharField(max_length=100, help_text="Título do documento que será criado")
+	nome_arquivo = models.CharField(max_length=255, help_text="Nome original do arquivo")
+	tamanho = models.BigIntegerField(help_text="Tamanho total do arquivo em bytes, declarado na abertura da sessão")
+	offset = models.BigIntegerField(default=0, help_text="Bytes já recebidos")
+	checksum = models.CharField(max_length=64, blank=True, default='', help_text="SHA-256 (hex) do arquivo completo, opcional")
+	status = models.CharField(max_length=20, choices=StatusUploadChoices.CHOICES, default=StatusUploadChoices.ATIVO)
+	direto = models.BooleanField(default=False, help_text="Arquivo enviado direto ao storage por URL pré-assinada")
+	chave = models.CharField(max_length=255, blank=True, default='', help_text="Nome do arquivo no storage (upload direto)")
+	documento = models.OneToOneField(Documento, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		db_table = 'precatorios_documentos_uploads'
+		verbose_name = 'Upload de Documento'
+		verbose_name_plural = 'Uploads de Documentos'
+		ordering = ['-created_at']
+
+	def __str__(self):
+		return f"{self.nome_arquivo} ({self.offset}/{self.tamanho})"
+
+	@property
+	def is_complete(self):
+		return self.offset >= self.tamanho
+
+
+class StatusExtracaoChoices:
+	PENDENTE = 'Pendente'
+	PROCESSANDO = 'Processando'
+	CONCLUIDO = 'Concluído'
+	ERRO = 'Erro'
+	IGNORADO = 'Ignorado'
+
+	CHOICES = [
+		(PENDENTE, 'Pendente'),
+		(PROCESSANDO, 'Processando'),
+		(CONCLUIDO, 'Concluído'),
+		(ERRO, 'Erro'),
+		(IGNORADO, 'Ignorado'),
+	]
+
+
+class TextoDocumento(models.Model):
+	"""
+	Texto extraído de um Documento, indexado para busca textual.
+
+	A tabela também é a fila de extração (ver oficio.extraction_queue): cada
+	documento novo entra como Pendente e o worker `run_extraction_worker`
+	reserva lotes com SELECT ... FOR UPDATE SKIP LOCKED.
+
+	O `search_vector` é mantido por trigger no banco, a partir do texto
+	(portuguese_unaccent) e dos identificadores normalizados (CPF, CNPJ e
+	valores só com dígitos, configuração simple).
+	"""
+	documento = models.OneToOneField(Documento, on_delete=models.CASCADE, primary_key=True, related_name='texto')
+	status = models.CharField(max_length=20, choices=StatusExtracaoChoices.CHOICES, default=StatusExtracaoChoices.PENDENTE)
+	tentativas = models.PositiveSmallIntegerField(default=0)
+	erro = models.TextField(blank=True, default='')
+	texto = models.TextField(blank=True, default='')
+	identificadores = models.TextField(blank=True, default='', help_text="CPFs, CNPJs e valores encontrados no texto, só com dígitos")
+	search_vector = SearchVectorField(null=True, editable=False, help_text="Vetor de busca textual, mantido por trigger no banco")
+	agendado_em = models.DateTimeField(default=timezone.now, help_text="Quando a extração pode ser (re)tentada")
+	iniciado_em = models.DateTimeField(null=True, blank=True)
+	processado_em = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		db_table = 'precatorios_documentos_textos'
+		verbose_name = 'Texto de Documento'
+		verbose_name_plural = 'Textos de Documentos'
+		indexes = [
+			GinIndex(fields=['search_vector'], name='documentos_textos_search_gin'),
+			models.Index(
+				fields=['agendado_em'],
+				name='documentos_textos_fila_idx',
+				condition=models.Q(status__in=[StatusExtracaoChoices.PENDENTE, StatusExtracaoChoices.PROCESSANDO]),
+			),
+		]
+
+	def __str__(self):
+		return f"Texto de {self.documento_id} ({self.status})"
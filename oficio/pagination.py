@@ -0,0 +1,224 @@
+from collections import OrderedDict
+
+from django.core import signing
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import precatorio_counter
+
+
+class CountedPaginator(Paginator):
+	"""
+	Paginator do Django que recebe a contagem pronta em vez de executar COUNT(*).
+
+	Uma contagem estimada (exact=False) não limita as páginas, pois pode ser
+	menor que a real: a página pedida é buscada com uma linha a mais, que
+	indica se existe a próxima, e só é inválida se vier vazia.
+	"""
+	def __init__(self, object_list, per_page, count, exact=True, **kwargs):
+		super().__init__(object_list, per_page, **kwargs)
+		self.__dict__['count'] = count
+		self.exact = exact
+
+	def validate_number(self, number):
+		if self.exact:
+			return super().validate_number(number)
+		return self._validate_number(number, float('inf'))
+
+	def page(self, number):
+		if self.exact:
+			return super().page(number)
+		number = self.validate_number(number)
+		bottom = (number - 1) * self.per_page
+		rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+		if not rows and number > 1:
+			raise EmptyPage(self.error_messages['no_results'])
+		return ProbedPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class ProbedPage(Page):
+	"""
+	Página de um CountedPaginator com contagem estimada: has_next vem da
+	linha extra buscada, e não do número de páginas.
+	"""
+	def __init__(self, object_list, number, paginator, more):
+		super().__init__(object_list, number, paginator)
+		self.more = more
+
+	def has_next(self):
+		return self.more
+
+
+class PrecatorioPageNumberPagination(PageNumberPagination):
+	"""
+	Paginação por número de página cuja contagem vem do PrecatorioCounter
+	(cache por visibilidade/filtro e estimativa do planner em tabelas grandes).
+
+	A resposta inclui `count_exact`, indicando se `count` é exato ou estimado.
+	A contagem estimada só aparece no envelope: páginas além dela continuam
+	válidas e `next` vem da própria página (ver CountedPaginator).
+	"""
+
+	def paginate_queryset(self, queryset, request, view=None):
+		self.count_result = precatorio_counter.count(queryset, request)
+		return super().paginate_queryset(queryset, request, view)
+
+	def django_paginator_class(self, object_list, per_page):
+		return CountedPaginator(object_list, per_page, count=self.count_result.value, exact=self.count_result.exact)
+
+	def get_paginated_response(self, data):
+		response = super().get_paginated_response(data)
+		response.data['count_exact'] = self.count_result.exact
+		return response
+
+	def get_paginated_response_schema(self, schema):
+		response_schema = super().get_paginated_response_schema(schema)
+		response_schema['properties']['count_exact'] = {'type': 'boolean', 'example': True}
+		return response_schema
+
+
+class PrecatorioKeysetPagination(BasePagination):
+	"""
+	Paginação por cursor (keyset) para a listagem de precatórios.
+
+	Ao contrário da PageNumberPagination, não executa COUNT(*) e não usa OFFSET:
+	cada página é obtida com um filtro `(campo, id) < (valor, id)` sobre a
+	ordenação ativa, então o custo de uma página profunda é o mesmo da primeira.
+
+	O cursor é opaco e assinado (django.core.signing), então o cliente não
+	consegue forjar posições nem trocar a ordenação no meio da navegação.
+
+	É opt-in: ativado com `?paginacao=cursor` ou pela presença de `?cursor=`.
+	"""
+	cursor_query_param = 'cursor'
+	mode_query_param = 'paginacao'
+	mode_value = 'cursor'
+	page_size = api_settings.PAGE_SIZE
+	tiebreaker = 'id'
+	ordering_fields = ('created_at', 'valor_principal', 'ano_orcamentario')
+	default_ordering = '-created_at'
+	invalid_cursor_message = 'Cursor inválido'
+	salt = 'oficio.pagination.cursor'
+
+	@classmethod
+	def is_requested(cls, request):
+		"""
+		Indica se a requisição pediu o modo cursor.
+		"""
+		if request is None:
+			return False
+		params = request.query_params
+		return params.get(cls.mode_query_param) == cls.mode_value or cls.cursor_query_param in params
+
+	def paginate_queryset(self, queryset, request, view=None):
+		self.request = request
+		self.base_url = request.build_absolute_uri()
+		self.ordering = self.get_ordering(queryset)
+		self.field = self.ordering.lstrip('-')
+		self.model_field = queryset.model._meta.get_field(self.field)
+		self.pk_field = queryset.model._meta.get_field(self.tiebreaker)
+
+		cursor = self.decode_cursor(request)
+		reverse = bool(cursor and cursor['r'])
+		descending = self.ordering.startswith('-') != reverse
+		prefix = '-' if descending else ''
+
+		queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}{self.tiebreaker}')
+
+		if cursor is not None:
+			lookup = 'lt' if descending else 'gt'
+			try:
+				value = self.model_field.to_python(cursor['v'])
+				pk = self.pk_field.to_python(cursor['pk'])
+			except Exception:
+				raise NotFound(self.invalid_cursor_message)
+			queryset = queryset.filter(
+				Q(**{f'{self.field}__{lookup}': value}) |
+				Q(**{self.field: value, f'{self.tiebreaker}__{lookup}': pk})
+			)
+
+		results = list(queryset[:self.page_size + 1])
+		has_more = len(results) > self.page_size
+		results = results[:self.page_size]
+
+		if reverse:
+			results.reverse()
+			self.has_next = cursor is not None
+			self.has_previous = has_more
+		else:
+			self.has_next = has_more
+			self.has_previous = cursor is not None
+
+		self.page = results
+		return results
+
+	def get_ordering(self, queryset):
+		"""
+		Usa o primeiro campo da ordenação já aplicada pelo OrderingFilter,
+		desde que seja um dos campos suportados pelo keyset.
+		"""
+		for field in queryset.query.order_by:
+			if isinstance(field, str) and field.lstrip('-') in self.ordering_fields:
+				return field
+			break
+		return self.default_ordering
+
+	def decode_cursor(self, request):
+		encoded = request.query_params.get(self.cursor_query_param)
+		if not encoded:
+			return None
+		try:
+			cursor = signing.loads(encoded, salt=self.salt)
+		except signing.BadSignature:
+			raise NotFound(self.invalid_cursor_message)
+		if not isinstance(cursor, dict) or cursor.get('o') != self.ordering:
+			raise NotFound(self.invalid_cursor_message)
+		return cursor
+
+	def encode_cursor(self, obj, reverse):
+		payload = {
+			'o': self.ordering,
+			'v': self.model_field.value_to_string(obj),
+			'pk': str(getattr(obj, self.tiebreaker)),
+			'r': 1 if reverse else 0,
+		}
+		encoded = signing.dumps(payload, salt=self.salt, compress=True)
+		url = replace_query_param(self.base_url, self.mode_query_param, self.mode_value)
+		return replace_query_param(url, self.cursor_query_param, encoded)
+
+	def get_next_link(self):
+		if not self.has_next or not self.page:
+			return None
+		return self.encode_cursor(self.page[-1], reverse=False)
+
+	def get_previous_link(self):
+		if not self.has_previous:
+			return None
+		if not self.page:
+			return remove_query_param(self.base_url, self.cursor_query_param)
+		return self.encode_cursor(self.page[0], reverse=True)
+
+	def get_paginated_response(self, data):
+		return Response(OrderedDict([
+			('count', None),
+			('next', self.get_next_link()),
+			('previous', self.get_previous_link()),
+			('results', data),
+		]))
+
+	def get_paginated_response_schema(self, schema):
+		return {
+			'type': 'object',
+			'required': ['results'],
+			'properties': {
+				'count': {'type': 'integer', 'nullable': True},
+				'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+				'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+				'results': schema,
+			},
+		}
@@ -1,4 +1,6 @@
 from rest_framework import permissions
+from django.conf import settings
+from django.db import connections
 from django.db.models import Q
 from auth.models import TypeUserChoices
 from .models import Precatorio, StatusPrecatorioChoices
@@ -14,7 +16,19 @@ class IsOwnerOrAdmin(permissions.BasePermission):
 	def has_object_permission(self, request, view, obj):
 		if request.user.is_staff or request.user.type_user == TypeUserChoices.ADMINISTRADOR:
 			return True
-		return obj.cedente == request.user
+		return obj.cedente_id == request.user.pk
+
+
+class IsAdministrador(permissions.BasePermission):
+	"""
+	Permissão restrita a Admin/Administrador (ex: exportações em massa).
+	"""
+	def has_permission(self, request, view):
+		user = request.user
+		return bool(
+			user and user.is_authenticated
+			and (user.is_staff or user.type_user == TypeUserChoices.ADMINISTRADOR)
+		)
 
 
 class MarketplaceViewPermission(permissions.BasePermission):
@@ -29,6 +43,11 @@ class MarketplaceViewPermission(permissions.BasePermission):
 	
 	Esta permissão não bloqueia o acesso, mas fornece um método
 	para filtrar o queryset baseado nas regras de negócio.
+	
+	Para Broker/Advogado, com PRECATORIO_VISIBILITY_STRATEGY = 'union' (padrão)
+	no Postgres, o OR vira um UNION ALL de dois ramos disjuntos (os seus + os
+	disponíveis de terceiros), cada um servido pelo seu índice. Com 'or' é
+	usado o filtro `Q(cedente=user) | Q(status=DISPONIVEL)`.
 	"""
 	
 	def has_permission(self, request, view):
@@ -59,9 +78,37 @@ class MarketplaceViewPermission(permissions.BasePermission):
 			return queryset.filter(cedente=user)
 		
 		if user.type_user in [TypeUserChoices.BROKER, TypeUserChoices.ADVOGADO]:
+			if self.use_union(queryset):
+				return queryset.union_visibility(
+					Q(cedente=user),
+					Q(status=StatusPrecatorioChoices.DISPONIVEL) & ~Q(cedente=user)
+				)
 			return queryset.filter(
 				Q(cedente=user) | 
 				Q(status=StatusPrecatorioChoices.DISPONIVEL)
 			)
 		
 		return queryset.filter(cedente=user)
+	
+	def use_union(self, queryset):
+		"""
+		Indica se a visibilidade deve ser montada com UNION ALL.
+		"""
+		strategy = getattr(settings, 'PRECATORIO_VISIBILITY_STRATEGY', 'union')
+		return (
+			strategy == 'union'
+			and hasattr(queryset, 'union_visibility')
+			and connections[queryset.db].vendor == 'postgresql'
+		)
+
+
+class IsUploaderOrAdmin(permissions.BasePermission):
+	"""
+	Permissão das sessões de upload de documentos:
+	- Admin/Administrador: acesso total.
+	- Demais: apenas o usuário que abriu a sessão.
+	"""
+	def has_object_permission(self, request, view, obj):
+		if request.user.is_staff or request.user.type_user == TypeUserChoices.ADMINISTRADOR:
+			return True
+		return obj.usuario_id == request.user.pk
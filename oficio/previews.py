@@ -0,0 +1,410 @@
+"""
+Pré-visualizações (miniaturas) de documentos e avatares.
+
+- Documentos: primeira página do PDF, renderizada num processo à parte com
+  `pypdfium2` (opcional) ou com o `pdftoppm` do poppler, se instalado; sem
+  nenhum dos dois é gerada uma capa genérica com o tipo do arquivo. DOCX usa
+  a miniatura embutida pelo Word (docProps/thumbnail) quando existe.
+- Avatares: recorte quadrado do User.avatar redimensionado.
+
+As imagens ficam num cache em disco (PREVIEW_CACHE['ROOT'], fora do
+MEDIA_ROOT, pois a miniatura de um documento é tão sigilosa quanto ele) cuja
+chave inclui o SHA-256 do arquivo de origem: trocar o arquivo muda a chave,
+e a entrada antiga sai pelo LRU. O cache é limitado a MAX_BYTES; o acesso
+renova o mtime do arquivo e, quando o limite é ultrapassado, os menos usados
+são removidos até 90% do limite.
+
+A geração acontece após o upload, numa thread de fundo (EAGER), ou na
+primeira requisição, se ainda não existir. Uma vez no cache, a requisição só
+entrega o arquivo.
+"""
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont, ImageOps, UnidentifiedImageError
+
+from core.storage import local_path
+from .cache import get_cache
+
+try:
+	import pypdfium2
+except ImportError:
+	pypdfium2 = None
+
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FORMAT = 'WEBP'
+PREVIEW_EXTENSION = '.webp'
+PREVIEW_CONTENT_TYPE = 'image/webp'
+
+# Proporção de uma folha A4, usada na capa genérica
+PAGE_RATIO = 297 / 210
+
+# Só renova o mtime de uma entrada acessada depois deste intervalo (segundos)
+TOUCH_INTERVAL = 60
+
+LOCK_STRIPES = 64
+
+# Renderização da primeira página com o pypdfium2, no processo filho (PNG no stdout)
+PDFIUM_SCRIPT = '''
+import sys
+import pypdfium2
+document = pypdfium2.PdfDocument(sys.argv[1])
+page = document[0]
+page.render(scale=int(sys.argv[2]) / page.get_width()).to_pil().save(sys.stdout.buffer, 'PNG')
+'''
+
+
+class PreviewUnavailable(Exception):
+	pass
+
+
+class InvalidPreviewSize(ValueError):
+	pass
+
+
+def get_preview_settings():
+	options = getattr(settings, 'PREVIEW_CACHE', {})
+	return {
+		'ROOT': str(options.get('ROOT', settings.BASE_DIR / 'cache' / 'previews')),
+		'MAX_BYTES': options.get('MAX_BYTES', 256 * 1024 * 1024),
+		'SIZES': options.get('SIZES', {'pequeno': 160, 'medio': 480, 'grande': 1024}),
+		'QUALITY': options.get('QUALITY', 80),
+		'EAGER': options.get('EAGER', True),
+		'WORKERS': options.get('WORKERS', 1),
+		'RENDER_TIMEOUT': options.get('RENDER_TIMEOUT', 30),
+	}
+
+
+def get_width(tamanho):
+	"""
+	Largura em pixels de um tamanho nomeado (PREVIEW_CACHE['SIZES']).
+	Levanta InvalidPreviewSize para tamanhos desconhecidos.
+	"""
+	sizes = get_preview_settings()['SIZES']
+	if tamanho not in sizes:
+		raise InvalidPreviewSize(f"Tamanho inválido. Use: {', '.join(sizes)}.")
+	return sizes[tamanho]
+
+
+def get_pdf_renderer():
+	if pypdfium2 is not None:
+		return 'pdfium'
+	if shutil.which('pdftoppm'):
+		return 'pdftoppm'
+	return 'capa'
+
+
+def render_placeholder(label, width):
+	height = round(width * PAGE_RATIO)
+	image = Image.new('RGB', (width, height), 'white')
+	draw = ImageDraw.Draw(image)
+	draw.rectangle([0, 0, width - 1, height - 1], outline=(200, 200, 200), width=max(width // 80, 1))
+	font = ImageFont.load_default(size=max(width // 6, 10))
+	draw.text((width / 2, height / 2), label, fill=(120, 120, 120), font=font, anchor='mm')
+	return image
+
+
+def render_pdf(path, width, timeout):
+	"""
+	Primeira página do PDF. Os dois renderizadores rodam num processo à parte,
+	com RENDER_TIMEOUT: o pdfium não é thread-safe (as miniaturas são geradas
+	nas threads das requisições e na thread de fundo ao mesmo tempo) e um
+	arquivo malformado pode travar ou derrubar o processo que o renderiza.
+	"""
+	renderer = get_pdf_renderer()
+	if renderer == 'pdfium':
+		result = subprocess.run(
+			[sys.executable, '-c', PDFIUM_SCRIPT, path, str(width)],
+			capture_output=True,
+			timeout=timeout,
+			check=True,
+		)
+		return Image.open(io.BytesIO(result.stdout))
+	if renderer == 'pdftoppm':
+		result = subprocess.run(
+			['pdftoppm', '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to-x', str(width), '-scale-to-y', '-1', path],
+			capture_output=True,
+			timeout=timeout,
+			check=True,
+		)
+		return Image.open(io.BytesIO(result.stdout))
+	return render_placeholder('PDF', width)
+
+
+def render_docx(path, width):
+	with zipfile.ZipFile(path) as archive:
+		for name in archive.namelist():
+			if not name.lower().startswith('docprops/thumbnail.'):
+				continue
+			try:
+				image = Image.open(io.BytesIO(archive.read(name)))
+				image.load()
+				return image
+			except (UnidentifiedImageError, OSError):
+				# EMF/WMF: o Pillow identifica, mas não renderiza
+				continue
+	return render_placeholder('DOCX', width)
+
+
+def render_document(path, extension, width, timeout):
+	extension = extension.lower()
+	if extension == '.pdf':
+		return render_pdf(path, width, timeout)
+	if extension == '.docx':
+		return render_docx(path, width)
+	return render_placeholder(extension.lstrip('.').upper() or 'DOC', width)
+
+
+def render_avatar(file, width):
+	image = Image.open(file)
+	image.draft('RGB', (width, width))
+	image = ImageOps.exif_transpose(image)
+	side = min(width, *image.size)
+	return ImageOps.fit(image, (side, side))
+
+
+def fit_width(image, width):
+	"""
+	Reduz a imagem para a largura informada (sem ampliar), limitando a altura
+	a duas páginas para não gerar miniaturas gigantes de páginas compridas.
+	"""
+	image = image.copy()
+	image.thumbnail((width, round(width * PAGE_RATIO * 2)))
+	if image.mode not in ('RGB', 'RGBA'):
+		image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+	return image
+
+
+def file_sha256(file):
+	digest = hashlib.sha256()
+	for block in iter(lambda: file.read(64 * 1024), b''):
+		digest.update(block)
+	return digest.hexdigest()
+
+
+class PreviewCache:
+	"""
+	Cache em disco das miniaturas, limitado por tamanho (LRU pelo mtime).
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._key_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+		self._size = None
+		self._executor = None
+
+	@property
+	def options(self):
+		return get_preview_settings()
+
+	def path(self, key):
+		return os.path.join(self.options['ROOT'], key + PREVIEW_EXTENSION)
+
+	def get(self, key):
+		"""
+		Retorna o caminho da miniatura em cache (renovando seu uso), ou None.
+		"""
+		path = self.path(key)
+		try:
+			mtime = os.stat(path).st_mtime
+			if time.time() - mtime > TOUCH_INTERVAL:
+				os.utime(path)
+		except FileNotFoundError:
+			return None
+		return path
+
+	def put(self, key, image):
+		path = self.path(key)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as temp:
+			image.save(temp, PREVIEW_FORMAT, quality=self.options['QUALITY'])
+		size = os.path.getsize(temp.name)
+		os.replace(temp.name, path)
+		self.account(size)
+		return path
+
+	def get_or_create(self, key, render):
+		"""
+		Retorna a miniatura em cache ou a gera com `render()`. Requisições
+		simultâneas pela mesma chave geram a imagem uma única vez.
+		"""
+		path = self.get(key)
+		if path is not None:
+			return path
+		with self._key_locks[hash(key) % LOCK_STRIPES]:
+			path = self.get(key)
+			if path is not None:
+				return path
+			return self.put(key, render())
+
+	def account(self, size):
+		with self._lock:
+			if self._size is not None:
+				self._size += size
+			if self._size is None or self._size > self.options['MAX_BYTES']:
+				self._size = self.evict()
+
+	def evict(self):
+		"""
+		Remove as miniaturas menos usadas até o cache voltar a 90% do limite.
+		Retorna o tamanho total após a limpeza.
+		"""
+		options = self.options
+		now = time.time()
+		entries = []
+		total = 0
+		for directory, _, filenames in os.walk(options['ROOT']):
+			for filename in filenames:
+				path = os.path.join(directory, filename)
+				try:
+					stat = os.stat(path)
+					if filename.endswith('.tmp'):
+						# Temporários de gerações interrompidas
+						if now - stat.st_mtime > 3600:
+							os.remove(path)
+						continue
+				except FileNotFoundError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, path))
+				total += stat.st_size
+
+		if total <= options['MAX_BYTES']:
+			return total
+		target = options['MAX_BYTES'] * 0.9
+		for _, size, path in sorted(entries):
+			if total <= target:
+				break
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+			total -= size
+		return total
+
+	def documento_key(self, documento, width):
+		digest = documento.sha256 or documento.compute_sha256()
+		extension = (documento.get_file_extension() or '').lower()
+		variant = get_pdf_renderer() if extension == '.pdf' else extension.lstrip('.') or 'arquivo'
+		return f'documentos/{digest[:2]}/{digest}-{width}-{variant}', digest
+
+	def documento(self, documento, tamanho):
+		"""
+		Retorna (caminho, ETag) da miniatura do documento, gerando se preciso.
+		"""
+		if not documento.arquivo:
+			raise PreviewUnavailable('Documento sem arquivo.')
+		width = get_width(tamanho)
+		key, digest = self.documento_key(documento, width)
+
+		def render():
+			with local_path(documento.arquivo) as source:
+				return fit_width(
+					render_document(source, documento.get_file_extension() or '', width, self.options['RENDER_TIMEOUT']),
+					width,
+				)
+
+		path = self.get_or_create(key, render)
+		return path, f'"{os.path.basename(key)}"'
+
+	def avatar_digest(self, user):
+		"""
+		SHA-256 do avatar, memorizado no cache do Django pela combinação
+		nome/tamanho/mtime do arquivo para não reler a imagem a cada requisição.
+		"""
+		storage = user.avatar.storage
+		name = user.avatar.name
+		memo_key = 'previews:avatar:' + hashlib.sha1(
+			f'{name}:{storage.size(name)}:{storage.get_modified_time(name).timestamp()}'.encode('utf-8')
+		).hexdigest()
+		cache = get_cache()
+		digest = cache.get(memo_key)
+		if digest is None:
+			with storage.open(name, 'rb') as file:
+				digest = file_sha256(file)
+			cache.set(memo_key, digest, timeout=None)
+		return digest
+
+	def avatar(self, user, tamanho):
+		"""
+		Retorna (caminho, ETag) da miniatura do avatar, gerando se preciso.
+		"""
+		if not user.avatar:
+			raise PreviewUnavailable('Usuário sem avatar.')
+		width = get_width(tamanho)
+		try:
+			digest = self.avatar_digest(user)
+		except FileNotFoundError:
+			raise PreviewUnavailable('Arquivo do avatar não encontrado.')
+
+		def render():
+			with user.avatar.storage.open(user.avatar.name, 'rb') as file:
+				return fit_width(render_avatar(file, width), width)
+
+		key = f'avatares/{digest[:2]}/{digest}-{width}'
+		return self.get_or_create(key, render), f'"{os.path.basename(key)}"'
+
+	def generate_documento(self, documento):
+		"""
+		Gera todos os tamanhos do documento, renderizando a origem uma vez só
+		(na maior largura que falta) e reduzindo para as demais.
+		"""
+		if not documento.arquivo:
+			return
+		widths = sorted(set(self.options['SIZES'].values()), reverse=True)
+		missing = [(width, self.documento_key(documento, width)[0]) for width in widths]
+		missing = [(width, key) for width, key in missing if self.get(key) is None]
+		if not missing:
+			return
+		with local_path(documento.arquivo) as path:
+			source = render_document(
+				path, documento.get_file_extension() or '', missing[0][0], self.options['RENDER_TIMEOUT'],
+			)
+		for width, key in missing:
+			self.put(key, fit_width(source, width))
+
+	def generate_avatar(self, user):
+		for tamanho in self.options['SIZES']:
+			self.avatar(user, tamanho)
+
+	def get_executor(self):
+		with self._lock:
+			if self._executor is None:
+				self._executor = ThreadPoolExecutor(
+					max_workers=max(self.options['WORKERS'], 1),
+					thread_name_prefix='previews',
+				)
+			return self._executor
+
+	def schedule(self, function, instance):
+		"""
+		Agenda a geração antecipada numa thread de fundo. Falhas só são
+		registradas no log: a miniatura será gerada na primeira requisição.
+		"""
+		if not self.options['EAGER']:
+			return
+
+		def run():
+			try:
+				function(instance)
+			except PreviewUnavailable:
+				pass
+			except Exception:
+				logger.exception('Falha ao gerar miniatura de %r', instance)
+
+		self.get_executor().submit(run)
+
+
+preview_cache = PreviewCache()
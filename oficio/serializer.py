@@ -1,7 +1,74 @@
 from rest_framework import serializers
-from .models import Tribunal, EnteDevedor, Precatorio, Documento
+from rest_framework.permissions import SAFE_METHODS
+from .models import Tribunal, EnteDevedor, Precatorio, Documento, TextoDocumento, UploadDocumento, ALLOWED_FILE_EXTENSIONS, MAX_FILE_SIZE
+from .cnj import normalize_cnj, parse_cnj
 from auth.models import User
+import os
+import re
 from django.conf import settings
+from django.urls import reverse
+
+
+def parse_query_list(request, param):
+    """
+    Lê um parâmetro de query no formato `a,b,c` e retorna um set de nomes.
+    Retorna None quando o parâmetro não foi enviado.
+    """
+    if request is None or param not in request.query_params:
+        return None
+    values = request.query_params.get(param, '')
+    return {value.strip() for value in values.split(',') if value.strip()}
+
+
+def get_related_to_load(serializer):
+    """
+    Retorna (select_related, prefetch_related) necessários para renderizar
+    os campos de leitura do serializer. Campos representados apenas pela PK
+    não precisam de JOIN, pois usam a coluna `<campo>_id` da própria linha.
+    """
+    select_related, prefetch_related = [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            prefetch_related.append(field.source)
+        elif isinstance(field, serializers.BaseSerializer):
+            select_related.append(field.source)
+    return select_related, prefetch_related
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin de serializer que implementa sparse fieldsets em requisições de leitura:
+
+    - `?fields=id,numero_processo` limita os campos retornados;
+    - `?expand=tribunal,documentos` troca a representação por PK pela
+      representação aninhada dos campos listados em `Meta.expandable_fields`.
+
+    Os campos não solicitados também deixam de ser carregados do banco
+    (ver get_related_to_load e BasePrecatorioView.get_queryset).
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        expand = parse_query_list(request, self.expand_query_param) or set()
+        expandable_fields = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand & set(expandable_fields):
+            serializer_class, kwargs = expandable_fields[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        requested = parse_query_list(request, self.fields_query_param)
+        if requested:
+            for name in list(fields):
+                if name not in requested and not fields[name].write_only:
+                    fields.pop(name)
+        return fields
 
 
 class TribunalSerializer(serializers.ModelSerializer):
@@ -20,10 +87,11 @@ class UserLightSerializer(serializers.ModelSerializer):
     sem expor dados sensíveis do User.
     """
     avatar = serializers.SerializerMethodField()
+    avatar_preview_url = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'name', 'email', 'type_user', 'avatar']
+        fields = ['id', 'name', 'email', 'type_user', 'avatar', 'avatar_preview_url']
 
     def get_avatar(self, obj):
         if obj.avatar:
@@ -33,16 +101,126 @@ class UserLightSerializer(serializers.ModelSerializer):
             return f"{settings.MEDIA_URL}{obj.avatar}"
         return None
 
+    def get_avatar_preview_url(self, obj) -> str | None:
+        """
+        URL da miniatura do avatar (?tamanho=pequeno|medio|grande).
+        """
+        if not obj.avatar:
+            return None
+        url = reverse('user_avatar', kwargs={'user_id': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 class DocumentoSerializer(serializers.ModelSerializer):
     extension = serializers.ReadOnlyField(source='get_file_extension')
     size_mb = serializers.ReadOnlyField(source='get_file_size_mb')
+    arquivo = serializers.FileField(write_only=True)
+    download_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Documento
-        fields = ['id', 'precatorio', 'titulo', 'arquivo', 'enviado_em', 'extension', 'size_mb']
-        read_only_fields = ['enviado_em', 'extension', 'size_mb']
+        fields = ['id', 'precatorio', 'titulo', 'arquivo', 'download_url', 'preview_url', 'enviado_em', 'extension', 'size_mb', 'content_type']
+        read_only_fields = ['enviado_em', 'extension', 'size_mb', 'content_type']
+
+    def get_download_url(self, obj) -> str:
+        """
+        URL do download autorizado. O caminho no MEDIA_URL não é exposto,
+        pois não passa pela checagem de permissão.
+        """
+        url = reverse('documento-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_preview_url(self, obj) -> str:
+        """
+        URL da miniatura da primeira página (?tamanho=pequeno|medio|grande).
+        """
+        url = reverse('documento-preview', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class DocumentoMetadataSerializer(DocumentoSerializer):
+    """
+    Metadados dos documentos para listagens: só colunas da própria linha
+    (nenhum acesso ao storage) e as URLs de download e miniatura.
+    """
+
+    class Meta(DocumentoSerializer.Meta):
+        fields = [
+            'id', 'precatorio', 'titulo', 'extension', 'size_mb', 'tamanho_bytes',
+            'content_type', 'sha256', 'enviado_em', 'download_url', 'preview_url'
+        ]
+        read_only_fields = fields
+
+class DocumentoBuscaSerializer(serializers.ModelSerializer):
+    """
+    Resultado da busca no conteúdo dos documentos: o documento, o precatório
+    a que pertence, a relevância e um trecho do texto com os termos destacados.
+    """
+    id = serializers.UUIDField(source='documento_id', read_only=True)
+    titulo = serializers.CharField(source='documento.titulo', read_only=True)
+    precatorio = serializers.UUIDField(source='documento.precatorio_id', read_only=True)
+    numero_processo = serializers.CharField(source='documento.precatorio.numero_processo', read_only=True)
+    relevancia = serializers.FloatField(source='rank', read_only=True)
+    trecho = serializers.CharField(read_only=True)
+    download_url = serializers.SerializerMethodField()
 
-class PrecatorioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TextoDocumento
+        fields = ['id', 'titulo', 'precatorio', 'numero_processo', 'relevancia', 'trecho', 'download_url']
+
+    def get_download_url(self, obj) -> str:
+        return DocumentoSerializer(context=self.context).get_download_url(obj.documento)
+
+class UploadDocumentoSerializer(serializers.ModelSerializer):
+    """
+    Abertura e consulta de uma sessão de upload retomável.
+    Nome, extensão e tamanho são validados antes de qualquer byte ser enviado.
+    """
+    documento = DocumentoSerializer(read_only=True)
+
+    class Meta:
+        model = UploadDocumento
+        fields = [
+            'id', 'precatorio', 'titulo', 'nome_arquivo', 'tamanho', 'checksum',
+            'offset', 'status', 'direto', 'documento', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['precatorio', 'offset', 'status', 'direto', 'documento', 'created_at', 'updated_at']
+
+    def validate_nome_arquivo(self, value):
+        value = os.path.basename(value.replace('\\', '/')).strip()
+        if os.path.splitext(value)[1].lower() not in ALLOWED_FILE_EXTENSIONS:
+            raise serializers.ValidationError(
+                "Formato de arquivo não permitido. Apenas arquivos PDF (.pdf) e Word (.doc, .docx) são aceitos."
+            )
+        return value
+
+    def validate_tamanho(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O tamanho do arquivo deve ser maior que zero.")
+        if value > MAX_FILE_SIZE:
+            raise serializers.ValidationError("O arquivo é muito grande. Tamanho máximo permitido: 10MB.")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.strip().lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("O checksum deve ser o SHA-256 do arquivo em hexadecimal.")
+        return value
+
+
+class UploadDiretoDocumentoSerializer(UploadDocumentoSerializer):
+    """
+    Abertura de um upload direto ao storage. O SHA-256 é obrigatório: ele
+    entra na assinatura da URL de envio e, no storage endereçado pelo
+    conteúdo, no nome do arquivo.
+    """
+
+    class Meta(UploadDocumentoSerializer.Meta):
+        extra_kwargs = {'checksum': {'required': True, 'allow_blank': False}}
+
+class PrecatorioSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tribunal_id = serializers.PrimaryKeyRelatedField(
         queryset=Tribunal.objects.all(), source='tribunal', write_only=True
     )
@@ -80,6 +258,18 @@ class PrecatorioSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['cedente', 'created_at', 'updated_at']
 
+    def validate_numero_processo(self, value):
+        """
+        Impede o mesmo número CNJ com pontuação diferente.
+        """
+        if parse_cnj(value) is not None:
+            queryset = Precatorio.objects.filter(numero_cnj=normalize_cnj(value))
+            if self.instance:
+                queryset = queryset.exclude(pk=self.instance.pk)
+            if queryset.exists():
+                raise serializers.ValidationError('Já existe um precatório com este número CNJ.')
+        return value
+
     def validate(self, data):
         """
         Validações de Regra de Negócio.
@@ -115,6 +305,48 @@ class PrecatorioSerializer(serializers.ModelSerializer):
             
         return super().create(validated_data)
 
+class PrecatorioListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Representação enxuta para a listagem de precatórios.
+
+    Relacionamentos saem apenas como PK (sem JOIN) e a descrição e os
+    documentos ficam de fora. Use `?expand=` para obter os objetos aninhados.
+    """
+    tribunal = serializers.PrimaryKeyRelatedField(read_only=True)
+    ente_devedor = serializers.PrimaryKeyRelatedField(read_only=True)
+    cedente = serializers.PrimaryKeyRelatedField(read_only=True)
+    advogado = serializers.PrimaryKeyRelatedField(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    natureza_display = serializers.CharField(source='get_natureza_display', read_only=True)
+
+    class Meta:
+        model = Precatorio
+        fields = [
+            'id',
+            'numero_processo',
+            'natureza', 'natureza_display',
+            'valor_principal',
+            'valor_venda',
+            'percentual_honorarios',
+            'data_expedicao',
+            'ano_orcamentario',
+            'status', 'status_display',
+            'tribunal',
+            'ente_devedor',
+            'cedente',
+            'advogado',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
+        expandable_fields = {
+            'tribunal': (TribunalSerializer, {}),
+            'ente_devedor': (EnteDevedorSerializer, {}),
+            'cedente': (UserLightSerializer, {}),
+            'advogado': (UserLightSerializer, {}),
+            'documentos': (DocumentoSerializer, {'many': True}),
+        }
+
 class PrecatorioUpdateSerializer(serializers.ModelSerializer):
 	"""
 	Serializer específico para atualizações (PATCH/PUT), 
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import MARKETPLACE_GENERATION, bump_generation, marketplace_cache
+from .counting import COUNT_GENERATION
+from .extraction_queue import extraction_queue
+from .models import Documento, EnteDevedor, Precatorio, Tribunal, lock_stored_file
+from .previews import preview_cache
+from .storage import ContentAddressedMixin
+
+
+@receiver(post_save, sender=Precatorio)
+@receiver(post_delete, sender=Precatorio)
+def invalidate_precatorio_counts(sender, instance, **kwargs):
+	"""
+	Signal que invalida as contagens cacheadas da listagem de precatórios
+	sempre que um precatório é criado, alterado ou removido.
+	"""
+	bump_generation(COUNT_GENERATION)
+
+
+@receiver(post_save, sender=Precatorio)
+@receiver(post_delete, sender=Precatorio)
+@receiver(post_save, sender=Documento)
+@receiver(post_delete, sender=Documento)
+@receiver(post_save, sender=Tribunal)
+@receiver(post_delete, sender=Tribunal)
+@receiver(post_save, sender=EnteDevedor)
+@receiver(post_delete, sender=EnteDevedor)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_marketplace_cache(sender, instance, **kwargs):
+	"""
+	Signal que invalida as páginas cacheadas da vitrine de precatórios.
+	
+	Inclui os modelos que aparecem na resposta via ?expand= (tribunal,
+	ente devedor, documentos e o usuário cedente/advogado).
+	"""
+	bump_generation(MARKETPLACE_GENERATION, marketplace_cache.cache)
+
+
+@receiver(post_save, sender=Tribunal)
+@receiver(post_save, sender=EnteDevedor)
+def touch_related_precatorios(sender, instance, created, **kwargs):
+	"""
+	Signal que atualiza o updated_at dos precatórios de um tribunal ou ente
+	devedor alterado. Eles não têm timestamp próprio, e o ETag da listagem
+	(PrecatorioQuerySet.freshness) só enxerga o updated_at dos precatórios.
+	"""
+	if created:
+		return
+	field = 'tribunal' if sender is Tribunal else 'ente_devedor'
+	Precatorio.objects.filter(**{field: instance}).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Documento)
+def release_documento_file(sender, instance, **kwargs):
+	"""
+	Signal que remove o arquivo do storage quando o último Documento que o
+	referencia é apagado (o storage é endereçado pelo conteúdo, então um
+	arquivo pode ser compartilhado por vários documentos).
+
+	A conferência e a remoção acontecem com a trava do SHA-256
+	(lock_stored_file), a mesma de quem reaproveita o arquivo num Documento
+	novo.
+	"""
+	name = instance.arquivo.name
+	if not name:
+		return
+	digest = instance.sha256 or ContentAddressedMixin.digest_from_name(name)
+
+	def release():
+		with transaction.atomic():
+			lock_stored_file(digest)
+			if not Documento.objects.filter(arquivo=name).exists():
+				instance.arquivo.storage.delete(name)
+
+	transaction.on_commit(release)
+
+
+@receiver(post_save, sender=Documento)
+def enqueue_documento_extraction(sender, instance, created, **kwargs):
+	"""
+	Signal que coloca o documento novo na fila de extração de texto
+	(processada pelo comando run_extraction_worker) após o commit.
+	"""
+	if created:
+		transaction.on_commit(lambda: extraction_queue.enqueue(instance))
+
+
+@receiver(post_save, sender=Documento)
+def generate_documento_previews(sender, instance, created, **kwargs):
+	"""
+	Signal que gera as miniaturas do documento novo em segundo plano, após
+	o commit, para que a primeira requisição já as encontre no cache.
+	"""
+	if created:
+		transaction.on_commit(lambda: preview_cache.schedule(preview_cache.generate_documento, instance))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def generate_avatar_previews(sender, instance, update_fields=None, **kwargs):
+	"""
+	Signal que gera as miniaturas do avatar em segundo plano. Saves parciais
+	que não tocam no avatar (ex: last_login no login) são ignorados.
+	"""
+	if update_fields is not None and 'avatar' not in update_fields:
+		return
+	if instance.avatar:
+		transaction.on_commit(lambda: preview_cache.schedule(preview_cache.generate_avatar, instance))
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils.deconstruct import deconstructible
+
+from core.storage import S3Storage, content_sha256
+
+
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})(?:\.[^/]*)?$')
+
+
+class ContentAddressedMixin:
+	"""
+	Nomes derivados do SHA-256 do conteúdo
+	(`precatorios/docs/sha256/ab/cd/<sha256>.<ext>`), comuns aos storages
+	endereçados pelo conteúdo em disco e no S3.
+	"""
+	prefix = 'precatorios/docs/sha256'
+
+	def __init__(self, prefix=None, **kwargs):
+		super().__init__(**kwargs)
+		if prefix is not None:
+			self.prefix = prefix.strip('/')
+
+	def hashed_name(self, digest, name):
+		extension = os.path.splitext(name)[1].lower()
+		return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+	def get_available_name(self, name, max_length=None):
+		# O nome definitivo só é conhecido em _save, depois de calcular o hash.
+		return name
+
+	@staticmethod
+	def digest_from_name(name):
+		"""
+		Retorna o SHA-256 contido num nome gerado por este storage, ou None.
+		"""
+		match = HASHED_NAME.search(name or '')
+		return match.group(1) if match else None
+
+
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+	"""
+	Storage de documentos endereçado pelo conteúdo.
+
+	O nome gravado é derivado do SHA-256 do arquivo
+	(`precatorios/docs/sha256/ab/cd/<sha256>.<ext>`), e não do nome enviado.
+	Uploads com o mesmo conteúdo apontam para o mesmo arquivo: o conteúdo é
+	lido em blocos para um arquivo temporário enquanto o hash é calculado e,
+	se o arquivo final já existe, o temporário é descartado.
+
+	Como o arquivo pode ser compartilhado por vários Documentos, a remoção
+	só acontece quando a última referência é apagada (ver oficio.signals).
+	"""
+
+	def _save(self, name, content):
+		temp_dir = self.path(f'{self.prefix}/tmp')
+		os.makedirs(temp_dir, exist_ok=True)
+
+		digest = hashlib.sha256()
+		with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+			if hasattr(content, 'seek'):
+				content.seek(0)
+			for chunk in content.chunks():
+				digest.update(chunk)
+				temp.write(chunk)
+
+		final_name = self.hashed_name(digest.hexdigest(), name)
+		final_path = self.path(final_name)
+		if os.path.exists(final_path):
+			os.remove(temp.name)
+			return final_name
+
+		os.makedirs(os.path.dirname(final_path), exist_ok=True)
+		os.replace(temp.name, final_path)
+		if self.file_permissions_mode is not None:
+			os.chmod(final_path, self.file_permissions_mode)
+		return final_name
+
+
+@deconstructible(path='oficio.storage.ContentAddressedS3Storage')
+class ContentAddressedS3Storage(ContentAddressedMixin, S3Storage):
+	"""
+	Versão no S3 do ContentAddressedStorage: a chave do objeto é derivada do
+	SHA-256 e um conteúdo que já está no bucket não é enviado de novo.
+	"""
+
+	def _save(self, name, content):
+		digest = content_sha256(content)
+		final_name = self.hashed_name(digest, name)
+		if not self.exists(final_name):
+			self._put(final_name, content, digest)
+		return final_name
+
+
+def get_documento_storage():
+	"""
+	Storage do campo Documento.arquivo (alias 'documentos' em STORAGES).
+	"""
+	return storages['documentos']
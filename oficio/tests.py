@@ -1,3 +1,35 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .management.commands.explain_precatorio_filters import Command as ExplainPrecatorioFilters
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Os planos verificados são do PostgreSQL.')
+class PrecatorioListingIndexTests(TestCase):
+	"""
+	Mesma verificação do comando explain_precatorio_filters: cada formato de
+	visibilidade da listagem deve percorrer o índice esperado, e nenhum filtro
+	pode cair numa leitura sem índice.
+	"""
+
+	def setUp(self):
+		# Base de teste vazia: sem isso o planner sempre prefere o Seq Scan
+		with connection.cursor() as cursor:
+			cursor.execute('SET LOCAL enable_seqscan = off')
+		self.command = ExplainPrecatorioFilters()
+
+	def test_visibility_shapes_use_expected_indexes(self):
+		for visibility, (queryset, expected) in self.command.get_visibility_querysets().items():
+			with self.subTest(visibility=visibility):
+				_, nodes, wrong = self.command.check_listing(queryset, {}, expected)
+				self.assertEqual(wrong, [])
+				self.assertEqual(self.command.get_index_names(nodes), expected)
+
+	def test_filters_use_an_index_for_every_shape(self):
+		for visibility, (queryset, expected) in self.command.get_visibility_querysets().items():
+			for params in self.command.get_filter_combinations():
+				with self.subTest(visibility=visibility, params=params):
+					_, _, wrong = self.command.check_listing(queryset, params, expected)
+					self.assertEqual(wrong, [])
@@ -0,0 +1,317 @@
+"""
+Upload retomável de documentos, em partes (chunks).
+
+Cada sessão (UploadDocumento) tem um arquivo parcial em
+DOCUMENTO_UPLOAD['TEMP_DIR']. Cada PATCH informa em `Upload-Offset` a
+posição em que a parte começa. O corpo da requisição é lido do stream em
+blocos de DOCUMENTO_UPLOAD['CHUNK_SIZE'] e gravado direto no disco, então a
+memória do worker não depende do tamanho do arquivo nem do número de uploads
+simultâneos. Ao receber o último byte o arquivo é conferido e copiado, também
+em blocos, para o storage de Documento.
+
+Com um storage que gera URLs pré-assinadas (core.storage.S3Storage) a sessão
+pode ser `direto`: o cliente envia o arquivo ao bucket com a URL devolvida por
+issue_direct_upload e depois pede a conclusão (complete_direct_upload), que
+confere o objeto no storage sem que os bytes passem pelo Django.
+"""
+import hashlib
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.files import File
+from rest_framework import status
+
+from core.storage import content_sha256, supports_presigned_upload
+from .content import HEADER_SIZE, check_signature, content_inspector
+from .models import Documento, StatusUploadChoices, lock_stored_file
+from .storage import ContentAddressedMixin
+
+
+CHECKSUM_ALGORITHM = 'sha256'
+
+
+class UploadError(Exception):
+	"""
+	Erro de upload com o status HTTP a ser devolvido e o offset atual da sessão.
+	"""
+	def __init__(self, message, status_code, offset=None):
+		super().__init__(message)
+		self.message = message
+		self.status_code = status_code
+		self.offset = offset
+
+
+def get_upload_settings():
+	options = getattr(settings, 'DOCUMENTO_UPLOAD', {})
+	return {
+		'TEMP_DIR': str(options.get('TEMP_DIR', os.path.join(settings.BASE_DIR, 'tmp', 'uploads'))),
+		'CHUNK_SIZE': options.get('CHUNK_SIZE', 64 * 1024),
+	}
+
+
+def get_part_path(session):
+	"""
+	Caminho do arquivo parcial da sessão.
+	"""
+	return os.path.join(get_upload_settings()['TEMP_DIR'], f'{session.pk}.part')
+
+
+def parse_checksum_header(value):
+	"""
+	Lê o header `Upload-Checksum: sha256 <hex>`. Retorna o hex ou None.
+	"""
+	if not value:
+		return None
+	algorithm, _, digest = value.strip().partition(' ')
+	if algorithm.lower() != CHECKSUM_ALGORITHM or not digest:
+		raise UploadError('Upload-Checksum deve ter o formato "sha256 <hex>"', status.HTTP_400_BAD_REQUEST)
+	return digest.strip().lower()
+
+
+def append_chunk(session, stream, offset, length, checksum=None):
+	"""
+	Grava `length` bytes do stream no arquivo parcial a partir de `offset`.
+
+	- `offset` precisa ser igual ao offset da sessão (409 caso contrário);
+	- partes que passariam do tamanho declarado são recusadas antes de ler o corpo (413);
+	- com `checksum`, a parte só é aceita se chegar inteira e o SHA-256 conferir;
+	  sem ele, uma parte interrompida mantém os bytes já gravados e o cliente
+	  retoma do novo offset.
+
+	Retorna o novo offset da sessão (não salva a sessão).
+	"""
+	if session.status != StatusUploadChoices.ATIVO:
+		raise UploadError('Sessão de upload encerrada', status.HTTP_409_CONFLICT, session.offset)
+	if session.direto:
+		raise UploadError('Sessão de upload direto: envie o arquivo para a URL do storage', status.HTTP_409_CONFLICT, session.offset)
+	if offset != session.offset:
+		raise UploadError('Upload-Offset não confere com o offset da sessão', status.HTTP_409_CONFLICT, session.offset)
+	if length <= 0:
+		raise UploadError('A parte enviada está vazia', status.HTTP_400_BAD_REQUEST, session.offset)
+	if offset + length > session.tamanho:
+		raise UploadError('A parte ultrapassa o tamanho declarado do arquivo', status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, session.offset)
+
+	options = get_upload_settings()
+	path = get_part_path(session)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	stored = os.path.getsize(path) if os.path.exists(path) else 0
+	if stored < offset:
+		# O arquivo parcial perdeu bytes (ex: diretório temporário limpo):
+		# o cliente precisa retomar do que realmente está em disco.
+		raise UploadError('Arquivo parcial incompleto no servidor', status.HTTP_409_CONFLICT, stored)
+
+	digest = hashlib.sha256()
+	received = 0
+	with open(path, 'ab+') as part:
+		part.truncate(offset)
+		while received < length:
+			block = stream.read(min(options['CHUNK_SIZE'], length - received))
+			if not block:
+				break
+			part.write(block)
+			digest.update(block)
+			received += len(block)
+
+		if checksum is not None and (received != length or digest.hexdigest() != checksum):
+			part.truncate(offset)
+			raise UploadError('Checksum da parte não confere', status.HTTP_400_BAD_REQUEST, offset)
+
+	new_offset = offset + received
+	if offset < min(HEADER_SIZE, session.tamanho) <= new_offset:
+		check_part_header(session)
+	return new_offset
+
+
+def check_part_header(session):
+	"""
+	Confere a assinatura (magic bytes) assim que o começo do arquivo chega,
+	para recusar um arquivo com conteúdo errado sem esperar o resto do envio.
+	"""
+	with open(get_part_path(session), 'rb') as part:
+		header = part.read(HEADER_SIZE)
+	error = check_signature(session.nome_arquivo, header)
+	if error is not None:
+		discard_part(session)
+		raise UploadError(error, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, 0)
+
+
+def file_checksum(path):
+	digest = hashlib.sha256()
+	block_size = get_upload_settings()['CHUNK_SIZE']
+	with open(path, 'rb') as part:
+		for block in iter(lambda: part.read(block_size), b''):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+def complete_upload(session):
+	"""
+	Confere o arquivo completo e cria o Documento.
+
+	O arquivo parcial é entregue ao FileField como File, e o storage o copia
+	em blocos (ou reaproveita um arquivo com o mesmo SHA-256, ver oficio.storage). Se o checksum do arquivo não
+	conferir, ou se a verificação estrutural (oficio.content) recusar o
+	arquivo, o arquivo parcial é descartado e o erro leva o offset 0.
+	"""
+	path = get_part_path(session)
+	digest = file_checksum(path)
+	if session.checksum and digest != session.checksum:
+		discard_part(session)
+		raise UploadError('Checksum do arquivo não confere; reenvie o arquivo', status.HTTP_422_UNPROCESSABLE_ENTITY, 0)
+
+	error = content_inspector.inspect_path(path, session.nome_arquivo)
+	if error is not None:
+		discard_part(session)
+		raise UploadError(error, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, 0)
+
+	with open(path, 'rb') as part:
+		documento = Documento.objects.create(
+			precatorio=session.precatorio,
+			titulo=session.titulo,
+			arquivo=File(part, name=session.nome_arquivo),
+			sha256=digest,
+		)
+
+	discard_part(session)
+	session.documento = documento
+	session.status = StatusUploadChoices.CONCLUIDO
+	session.save(update_fields=['documento', 'status', 'updated_at'])
+	return documento
+
+
+def discard_part(session):
+	try:
+		os.remove(get_part_path(session))
+	except FileNotFoundError:
+		pass
+
+
+def get_direct_storage():
+	"""
+	Storage de Documento.arquivo, se ele aceita upload direto (501 caso contrário).
+	"""
+	storage = Documento._meta.get_field('arquivo').storage
+	if not supports_presigned_upload(storage):
+		raise UploadError(
+			'Upload direto indisponível: o storage de documentos não gera URLs pré-assinadas',
+			status.HTTP_501_NOT_IMPLEMENTED,
+		)
+	return storage
+
+
+def get_direct_name(storage, session):
+	"""
+	Nome em que o cliente envia o arquivo. Em storages endereçados pelo
+	conteúdo é uma chave própria da sessão (`<prefixo>/uploads/<id>.<ext>`):
+	o objeto só vai para o nome pelo SHA-256 depois de conferido, em
+	complete_direct_upload. Nos demais storages é o nome gerado pelo upload_to
+	do campo, que já é o definitivo.
+	"""
+	if isinstance(storage, ContentAddressedMixin):
+		extension = os.path.splitext(session.nome_arquivo)[1].lower()
+		return f'{storage.prefix}/uploads/{session.pk}{extension}'
+	name = Documento._meta.get_field('arquivo').generate_filename(None, session.nome_arquivo)
+	return storage.get_available_name(name)
+
+
+def issue_direct_upload(session):
+	"""
+	Prepara o envio direto ao storage e retorna os dados do PUT pré-assinado
+	(ver S3Storage.presigned_put). Define `session.chave` na primeira chamada
+	(não salva a sessão); chamadas seguintes renovam a URL.
+
+	A URL é sempre emitida, mesmo que o SHA-256 declarado já exista no
+	storage: o checksum é informado pelo cliente, e só os bytes enviados
+	provam que ele tem o arquivo.
+	"""
+	if session.status != StatusUploadChoices.ATIVO:
+		raise UploadError('Sessão de upload encerrada', status.HTTP_409_CONFLICT)
+	storage = get_direct_storage()
+	if not session.chave:
+		session.chave = get_direct_name(storage, session)
+	return storage.presigned_put(
+		session.chave,
+		session.tamanho,
+		session.checksum,
+		content_type=mimetypes.guess_type(session.nome_arquivo)[0],
+	)
+
+
+def complete_direct_upload(session):
+	"""
+	Confere o objeto enviado ao storage e cria o Documento apontando para ele.
+
+	Tamanho e SHA-256 vêm do HEAD (o PUT pré-assinado leva o checksum, e o
+	bucket recusa um corpo que não confere); se o bucket não devolver o
+	checksum, o objeto é lido em blocos e o SHA-256 calculado aqui. A
+	assinatura (magic bytes) vem de um GET com Range dos primeiros bytes. A
+	verificação estrutural de oficio.content, que precisa do arquivo inteiro,
+	não é feita aqui. Um objeto recusado é removido do storage.
+
+	Em storages endereçados pelo conteúdo o objeto conferido é promovido para
+	o nome pelo SHA-256 (ou descartado, se esse conteúdo já está no storage).
+	"""
+	storage = get_direct_storage()
+	info = storage.head(session.chave) if session.chave else None
+	if info is None:
+		raise UploadError('O arquivo ainda não foi enviado ao storage', status.HTTP_409_CONFLICT)
+
+	if info['size'] != session.tamanho:
+		discard_direct_object(session)
+		raise UploadError('O tamanho do arquivo no storage não confere com o declarado; reenvie o arquivo', status.HTTP_422_UNPROCESSABLE_ENTITY)
+	digest = info['sha256']
+	if digest is None:
+		with storage.open(session.chave, 'rb') as file:
+			digest = content_sha256(file)
+	if digest != session.checksum:
+		discard_direct_object(session)
+		raise UploadError('Checksum do arquivo não confere; reenvie o arquivo', status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+	header = storage.read_range(session.chave, 0, min(HEADER_SIZE, session.tamanho) - 1)
+	error = check_signature(session.nome_arquivo, header)
+	if error is not None:
+		discard_direct_object(session)
+		raise UploadError(error, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+	# O arquivo pelo SHA-256 não pode ser apagado (oficio.signals) até o commit
+	lock_stored_file(digest)
+	session.chave = promote_direct_object(storage, session, digest)
+	documento = Documento.objects.create(
+		precatorio=session.precatorio,
+		titulo=session.titulo,
+		arquivo=session.chave,
+		sha256=digest,
+		tamanho_bytes=info['size'],
+		extensao=os.path.splitext(session.chave)[1].lower(),
+		content_type=mimetypes.guess_type(session.nome_arquivo)[0] or 'application/octet-stream',
+	)
+
+	session.documento = documento
+	session.status = StatusUploadChoices.CONCLUIDO
+	session.save(update_fields=['documento', 'chave', 'status', 'updated_at'])
+	return documento
+
+
+def promote_direct_object(storage, session, digest):
+	"""
+	Move o objeto conferido da chave da sessão para o nome pelo SHA-256 em
+	storages endereçados pelo conteúdo; se o conteúdo já existe, a cópia da
+	sessão é descartada. Retorna o nome do arquivo do Documento.
+	"""
+	if not isinstance(storage, ContentAddressedMixin):
+		return session.chave
+	name = storage.hashed_name(digest, session.nome_arquivo)
+	if not storage.exists(name):
+		storage.copy(session.chave, name)
+	storage.delete(session.chave)
+	return name
+
+
+def discard_direct_object(session):
+	"""
+	Remove o objeto de um upload direto, se nenhum Documento aponta para ele.
+	"""
+	if not session.chave or Documento.objects.filter(arquivo=session.chave).exists():
+		return
+	Documento._meta.get_field('arquivo').storage.delete(session.chave)
@@ -3,14 +3,36 @@ from .views import (
     PrecatorioListView,
     PrecatorioCreateView,
     PrecatorioRetrieveView,
+    PrecatorioCNJLookupView,
     PrecatorioUpdateView,
-    PrecatorioDeleteView
+    PrecatorioDeleteView,
+    PrecatorioDocumentosZipView,
+    PrecatorioExportZipView,
+    DocumentoUploadCreateView,
+    DocumentoUploadView,
+    DocumentoDirectUploadCreateView,
+    DocumentoDirectUploadView,
+    DocumentoDownloadView,
+    DocumentoPreviewView,
+    DocumentoSearchView,
+    DocumentoMetadataView
 )
 
 urlpatterns = [
     path('precatorios/listar/', PrecatorioListView.as_view(), name='precatorio-list'),
     path('precatorios/criar/', PrecatorioCreateView.as_view(), name='precatorio-create'),
     path('precatorios/detalhes/<uuid:pk>', PrecatorioRetrieveView.as_view(), name='precatorio-detail'),
+    path('precatorios/cnj/<str:numero>', PrecatorioCNJLookupView.as_view(), name='precatorio-cnj-lookup'),
     path('precatorios/atualizar/<uuid:pk>', PrecatorioUpdateView.as_view(), name='precatorio-update'),
     path('precatorios/deletar/<uuid:pk>', PrecatorioDeleteView.as_view(), name='precatorio-delete'),
+    path('precatorios/exportar/zip', PrecatorioExportZipView.as_view(), name='precatorio-export-zip'),
+    path('precatorios/<uuid:pk>/documentos/zip', PrecatorioDocumentosZipView.as_view(), name='precatorio-documentos-zip'),
+    path('precatorios/<uuid:pk>/documentos/uploads', DocumentoUploadCreateView.as_view(), name='documento-upload-create'),
+    path('precatorios/<uuid:pk>/documentos/uploads/direto', DocumentoDirectUploadCreateView.as_view(), name='documento-upload-direct-create'),
+    path('documentos/uploads/<uuid:pk>', DocumentoUploadView.as_view(), name='documento-upload'),
+    path('documentos/uploads/<uuid:pk>/direto', DocumentoDirectUploadView.as_view(), name='documento-upload-direct'),
+    path('documentos/metadados/', DocumentoMetadataView.as_view(), name='documento-metadata'),
+    path('documentos/busca/', DocumentoSearchView.as_view(), name='documento-search'),
+    path('documentos/<uuid:pk>/download', DocumentoDownloadView.as_view(), name='documento-download'),
+    path('documentos/<uuid:pk>/preview', DocumentoPreviewView.as_view(), name='documento-preview'),
 ]
\ No newline at end of file
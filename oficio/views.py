@@ -1,7 +1,13 @@
+import uuid
+
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, NotFound, PermissionDenied
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
 from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse, Http404
+from django.urls import reverse
 from drf_spectacular.utils import (
 	extend_schema,
 	OpenApiParameter,
@@ -11,9 +17,19 @@ from drf_spectacular.utils import (
 from drf_spectacular.types import OpenApiTypes
 
 from .base import BasePrecatorioView
-from .permissions import IsOwnerOrAdmin, MarketplaceViewPermission
-from .models import Precatorio
-from .serializer import PrecatorioSerializer, PrecatorioUpdateSerializer
+from .cache import marketplace_cache
+from .conditional import get_not_modified, make_etag, row_version, set_validators
+from .downloads import build_download_response, get_document_etag
+from .exports import build_zip_response, get_export_queryset
+from .extraction import normalize_identifier
+from .filters import SEARCH_CONFIG
+from .previews import PREVIEW_CONTENT_TYPE, InvalidPreviewSize, PreviewUnavailable, preview_cache
+from .permissions import IsAdministrador, IsOwnerOrAdmin, IsUploaderOrAdmin, MarketplaceViewPermission
+from .models import Documento, Precatorio, StatusExtracaoChoices, StatusUploadChoices, TextoDocumento, UploadDocumento
+from .cnj import normalize_cnj
+from .pagination import PrecatorioKeysetPagination, PrecatorioPageNumberPagination
+from .serializer import DocumentoBuscaSerializer, DocumentoMetadataSerializer, PrecatorioSerializer, PrecatorioListSerializer, PrecatorioUpdateSerializer, UploadDiretoDocumentoSerializer, UploadDocumentoSerializer, parse_query_list
+from .uploads import UploadError, append_chunk, complete_direct_upload, complete_upload, discard_direct_object, discard_part, get_direct_storage, issue_direct_upload, parse_checksum_header
 
 
 class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
@@ -21,14 +37,52 @@ class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
 	View para listar precatórios com filtros e paginação.
 	
 	A lógica de marketplace é controlada pela permissão MarketplaceViewPermission.
+	Com `?paginacao=cursor` a listagem usa paginação keyset (sem COUNT/OFFSET).
 	"""
+	serializer_class = PrecatorioListSerializer
 	permission_classes = [MarketplaceViewPermission]
+	pagination_class = PrecatorioPageNumberPagination
+	
+	@property
+	def paginator(self):
+		"""
+		Troca a paginação global pela paginação keyset quando solicitada.
+		"""
+		if not hasattr(self, '_paginator') and PrecatorioKeysetPagination.is_requested(getattr(self, 'request', None)):
+			self._paginator = PrecatorioKeysetPagination()
+		return super().paginator
+	
+	def list_data(self, queryset):
+		"""
+		Monta o envelope da listagem (paginada ou não).
+		"""
+		page = self.paginate_queryset(queryset)
+		
+		if page is not None:
+			serializer = self.get_serializer(page, many=True)
+			paginated_response = self.get_paginated_response(serializer.data)
+			
+			return {
+				'message': 'Precatórios listados com sucesso',
+				'count': paginated_response.data.get('count'),
+				'count_exact': paginated_response.data.get('count_exact'),
+				'next': paginated_response.data.get('next'),
+				'previous': paginated_response.data.get('previous'),
+				'results': paginated_response.data.get('results', [])
+			}
+		
+		serializer = self.get_serializer(queryset, many=True)
+		return {
+			'message': 'Precatórios listados com sucesso',
+			'results': serializer.data
+		}
 	
 	@extend_schema(
 		tags=['Precatórios'],
 		summary="Listar Precatórios",
 		description=(
 			"Retorna lista paginada de precatórios com filtros e busca. "
+			"Os relacionamentos são retornados apenas pelo UUID; use 'expand' para obtê-los aninhados. "
 			"A visibilidade dos precatórios depende do tipo de usuário: "
 			"Administradores veem todos, Cedentes veem apenas os seus, "
 			"Brokers e Advogados veem os seus próprios mais os disponíveis no mercado."
@@ -76,17 +130,65 @@ class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
 				location=OpenApiParameter.QUERY,
 				description="Valor principal menor ou igual a",
 			),
+			OpenApiParameter(
+				name='numero_cnj',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Busca exata pelo número CNJ, com ou sem pontuação",
+			),
+			OpenApiParameter(
+				name='cnj_ano',
+				type=OpenApiTypes.INT,
+				location=OpenApiParameter.QUERY,
+				description="Filtrar pelo ano de ajuizamento do número CNJ (aceita __gte/__lte)",
+			),
+			OpenApiParameter(
+				name='cnj_segmento',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Filtrar pelo segmento do Judiciário do número CNJ (ex: 4 = Justiça Federal)",
+			),
+			OpenApiParameter(
+				name='cnj_tribunal',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Filtrar pelo código do tribunal no número CNJ (ex: 01)",
+			),
 			OpenApiParameter(
 				name='search',
 				type=OpenApiTypes.STR,
 				location=OpenApiParameter.QUERY,
-				description="Buscar por número do processo ou descrição",
+				description="Busca textual (sem acentos, com ranking) na descrição e no número do processo, inclusive parcial",
+			),
+			OpenApiParameter(
+				name='paginacao',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Use 'cursor' para paginação keyset (sem contagem; 'count' retorna null)",
+			),
+			OpenApiParameter(
+				name='cursor',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Cursor opaco retornado em 'next'/'previous' no modo cursor",
+			),
+			OpenApiParameter(
+				name='fields',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Campos a retornar, separados por vírgula (ex: id,numero_processo,status)",
+			),
+			OpenApiParameter(
+				name='expand',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Relacionamentos a expandir: tribunal, ente_devedor, cedente, advogado, documentos",
 			),
 		],
 		responses={
 			200: OpenApiResponse(
 				description="Lista de precatórios retornada com sucesso",
-				response=PrecatorioSerializer,
+				response=PrecatorioListSerializer,
 				examples=[
 					OpenApiExample(
 						name="Sucesso",
@@ -94,6 +196,7 @@ class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
 						value={
 							"message": "Precatórios listados com sucesso",
 							"count": 10,
+							"count_exact": True,
 							"next": "http://127.0.0.1:8000/api/v1/oficio/precatorios/listar/?page=2",
 							"previous": None,
 							"results": [
@@ -109,28 +212,10 @@ class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
 									"ano_orcamentario": 2024,
 									"status": "Disponível",
 									"status_display": "Disponível",
-									"descricao": "Precatório alimentar do estado de São Paulo",
-									"tribunal": {
-										"id": "660e8400-e29b-41d4-a716-446655440001",
-										"nome": "Tribunal Regional Federal da 1ª Região",
-										"sigla": "TRF1",
-										"uf": "DF"
-									},
-									"ente_devedor": {
-										"id": "770e8400-e29b-41d4-a716-446655440002",
-										"nome": "Fazenda Pública do Estado de São Paulo",
-										"cnpj": "12345678000190",
-										"esfera": "Estadual"
-									},
-									"cedente": {
-										"id": "880e8400-e29b-41d4-a716-446655440003",
-										"name": "João Silva",
-										"email": "joao@example.com",
-										"type_user": "Cedente",
-										"avatar": None
-									},
+									"tribunal": "660e8400-e29b-41d4-a716-446655440001",
+									"ente_devedor": "770e8400-e29b-41d4-a716-446655440002",
+									"cedente": "880e8400-e29b-41d4-a716-446655440003",
 									"advogado": None,
-									"documentos": [],
 									"created_at": "2023-01-15T10:00:00Z",
 									"updated_at": "2023-01-15T10:00:00Z"
 								}
@@ -139,35 +224,53 @@ class PrecatorioListView(BasePrecatorioView, generics.ListAPIView):
 					),
 				],
 			),
+			304: OpenApiResponse(description="Não modificado: o ETag enviado em If-None-Match ainda é válido"),
 			401: OpenApiResponse(description="Não autenticado"),
 		}
 	)
 	def get(self, request, *args, **kwargs):
 		"""
 		Método GET: Retorna lista paginada e filtrada de precatórios.
+		
+		A vitrine compartilhada por Brokers/Advogados é servida do cache
+		(ver MarketplaceResponseCache); o header X-Cache indica HIT/MISS.
+		
+		O ETag vem dos dados: quantidade e maior updated_at de cada ramo de
+		visibilidade do queryset filtrado (e dos relacionamentos pedidos em
+		?expand=), ver PrecatorioQuerySet.freshness. If-None-Match que bate
+		devolve 304 antes de paginar e serializar. O mesmo resumo entra na
+		chave do cache da vitrine, para o corpo nunca ser mais antigo que o ETag.
 		"""
 		try:
 			queryset = self.filter_queryset(self.get_queryset())
-			page = self.paginate_queryset(queryset)
+			expand = parse_query_list(request, 'expand') or set()
+			freshness = queryset.freshness(expand)
+			etag = make_etag(request, freshness)
+			not_modified = get_not_modified(request, etag)
+			if not_modified is not None:
+				return not_modified
 			
-			if page is not None:
-				serializer = self.get_serializer(page, many=True)
-				paginated_response = self.get_paginated_response(serializer.data)
-				
-				return Response({
-					'message': 'Precatórios listados com sucesso',
-					'count': paginated_response.data.get('count', 0),
-					'next': paginated_response.data.get('next'),
-					'previous': paginated_response.data.get('previous'),
-					'results': paginated_response.data.get('results', [])
-				}, status=status.HTTP_200_OK)
-			
-			serializer = self.get_serializer(queryset, many=True)
-			return Response({
-				'message': 'Precatórios listados com sucesso',
-				'results': serializer.data
-			}, status=status.HTTP_200_OK)
+			headers = {}
+			cache_key = marketplace_cache.get_key(request, freshness)
+			data = marketplace_cache.get(cache_key) if cache_key is not None else None
+			if data is not None:
+				headers['X-Cache'] = 'HIT'
+			else:
+				data = self.list_data(queryset)
+				if cache_key is not None:
+					marketplace_cache.set(cache_key, data)
+					headers['X-Cache'] = 'MISS'
 			
+			return set_validators(Response(data, status=status.HTTP_200_OK, headers=headers), etag)
+			
+		except NotFound as e:
+			return Response(
+				{
+					'message': 'Erro ao listar precatórios',
+					'error': str(e.detail)
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
 		except Exception as e:
 			return Response(
 				{
@@ -363,6 +466,12 @@ class PrecatorioRetrieveView(BasePrecatorioView, generics.RetrieveAPIView):
 				location=OpenApiParameter.PATH,
 				description="UUID do precatório",
 			),
+			OpenApiParameter(
+				name='fields',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Campos a retornar, separados por vírgula (ex: id,numero_processo,status)",
+			),
 		],
 		responses={
 			200: OpenApiResponse(
@@ -411,10 +520,11 @@ class PrecatorioRetrieveView(BasePrecatorioView, generics.RetrieveAPIView):
 									{
 										"id": "990e8400-e29b-41d4-a716-446655440004",
 										"titulo": "Ofício Requisitório",
-										"arquivo": "http://127.0.0.1:8000/media/precatorios/docs/2023/01/oficio.pdf",
+										"download_url": "http://127.0.0.1:8000/api/v1/oficio/documentos/990e8400-e29b-41d4-a716-446655440004/download",
 										"enviado_em": "2023-01-15T10:00:00Z",
 										"extension": ".pdf",
-										"size_mb": 2.5
+										"size_mb": 2.5,
+										"content_type": "application/pdf"
 									}
 								],
 								"created_at": "2023-01-15T10:00:00Z",
@@ -446,26 +556,54 @@ class PrecatorioRetrieveView(BasePrecatorioView, generics.RetrieveAPIView):
 					),
 				],
 			),
+			304: OpenApiResponse(description="Não modificado: o ETag enviado em If-None-Match ainda é válido"),
 			401: OpenApiResponse(description="Não autenticado"),
 		}
 	)
 	def get(self, request, *args, **kwargs):
 		"""
 		Método GET: Retorna os dados completos de um único precatório.
+		
+		O ETag vem do updated_at do precatório, dos documentos vinculados e das
+		linhas exibidas junto (cedente, advogado, tribunal e ente devedor), todas
+		já carregadas pelo get_object. Requisições condicionais que batem
+		recebem 304 sem serializar.
+		
+		Não há Last-Modified: remover um documento ou alterar o tribunal muda a
+		resposta sem avançar nenhum desses timestamps.
 		"""
 		try:
 			precatorio = self.get_object()
+			documentos = sorted(
+				(row_version(documento) for documento in precatorio.documentos.all()),
+				key=lambda values: str(values[0]),
+			)
+			usuarios = [user for user in (precatorio.cedente, precatorio.advogado) if user is not None]
+			etag = make_etag(
+				request,
+				str(precatorio.pk),
+				precatorio.updated_at,
+				documentos,
+				[(str(user.pk), user.updated_at) for user in usuarios],
+				row_version(precatorio.tribunal),
+				row_version(precatorio.ente_devedor),
+			)
+			not_modified = get_not_modified(request, etag)
+			if not_modified is not None:
+				return not_modified
+			
 			serializer = self.get_serializer(precatorio)
 			
-			return Response(
+			response = Response(
 				{
 					'message': 'Precatório encontrado com sucesso',
 					'result': serializer.data
 				},
 				status=status.HTTP_200_OK
 			)
+			return set_validators(response, etag)
 			
-		except NotFound:
+		except (NotFound, Http404):
 			return Response(
 				{
 					'message': 'Precatório não encontrado'
@@ -489,6 +627,86 @@ class PrecatorioRetrieveView(BasePrecatorioView, generics.RetrieveAPIView):
 			)
 
 
+class PrecatorioCNJLookupView(BasePrecatorioView, generics.RetrieveAPIView):
+	"""
+	View para buscar um precatório pelo número CNJ, com ou sem pontuação.
+	
+	A busca é exata no índice único de numero_cnj, então não passa pelo ILIKE.
+	A lógica de marketplace é controlada pela permissão MarketplaceViewPermission.
+	"""
+	permission_classes = [MarketplaceViewPermission]
+	lookup_field = 'numero_cnj'
+	lookup_url_kwarg = 'numero'
+	
+	@extend_schema(
+		tags=['Precatórios'],
+		summary="Buscar Precatório pelo Número CNJ",
+		description=(
+			"Retorna o precatório com o número CNJ informado. O número pode ser enviado "
+			"com ou sem pontuação (ex: 0000123-45.2023.4.01.0001 ou 00001234520234010001). "
+			"A visibilidade depende das permissões do usuário."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='numero',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.PATH,
+				description="Número CNJ do processo",
+			),
+		],
+		responses={
+			200: OpenApiResponse(
+				description="Precatório encontrado",
+				response=PrecatorioSerializer,
+			),
+			404: OpenApiResponse(
+				description="Precatório não encontrado",
+				examples=[
+					OpenApiExample(
+						name="Não encontrado",
+						value={
+							"message": "Precatório não encontrado"
+						},
+					),
+				],
+			),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Retorna o precatório pelo número CNJ normalizado.
+		"""
+		try:
+			self.kwargs[self.lookup_url_kwarg] = normalize_cnj(self.kwargs[self.lookup_url_kwarg])
+			precatorio = self.get_object()
+			serializer = self.get_serializer(precatorio)
+			
+			return Response(
+				{
+					'message': 'Precatório encontrado com sucesso',
+					'result': serializer.data
+				},
+				status=status.HTTP_200_OK
+			)
+			
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Precatório não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao obter precatório',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
 class PrecatorioUpdateView(BasePrecatorioView, generics.UpdateAPIView):
 	"""
 	View para atualizar um precatório existente.
@@ -786,3 +1004,1155 @@ class PrecatorioDeleteView(BasePrecatorioView, generics.DestroyAPIView):
 				},
 				status=status.HTTP_500_INTERNAL_SERVER_ERROR
 			)
+
+
+class PrecatorioDocumentosZipView(BasePrecatorioView):
+	"""
+	View que exporta todos os documentos de um precatório (dossiê) em ZIP.
+	
+	O ZIP é montado enquanto é enviado (ver oficio.exports): os arquivos
+	são lidos em blocos, sem arquivo temporário, e a memória não cresce com
+	o tamanho do dossiê.
+	"""
+	permission_classes = [MarketplaceViewPermission]
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Baixar Dossiê do Precatório (ZIP)",
+		description=(
+			"Baixa um ZIP com todos os documentos do precatório, numa pasta com o número do processo. "
+			"Requer que o precatório seja visível para o usuário: Admin vê todos, Cedente os seus e "
+			"Broker/Advogado os seus mais os disponíveis no marketplace. O ZIP é enviado em streaming, "
+			"sem Content-Length; arquivos ausentes no storage são listados em ARQUIVOS_NAO_ENCONTRADOS.txt."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='pk',
+				type=OpenApiTypes.UUID,
+				location=OpenApiParameter.PATH,
+				description="UUID do precatório",
+			),
+		],
+		responses={
+			(200, 'application/zip'): OpenApiResponse(description="ZIP com os documentos", response=OpenApiTypes.BINARY),
+			404: OpenApiResponse(description="Precatório não encontrado, não visível ou sem documentos"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Envia o ZIP com os documentos do precatório.
+		"""
+		try:
+			precatorio = self.get_object()
+			documentos = Documento.objects.filter(precatorio=precatorio).exclude(arquivo='')
+			if not documentos.exists():
+				return Response(
+					{
+						'message': 'O precatório não possui documentos'
+					},
+					status=status.HTTP_404_NOT_FOUND
+				)
+			return build_zip_response(get_export_queryset(documentos), f'dossie-{precatorio.numero_processo}')
+			
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Precatório não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao exportar documentos',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class PrecatorioExportZipView(BasePrecatorioView):
+	"""
+	View de exportação em massa dos documentos dos precatórios filtrados, em ZIP.
+	
+	Restrita a administradores. Aceita os mesmos filtros, busca e ordenação
+	da listagem; cada precatório vira uma pasta no ZIP.
+	"""
+	permission_classes = [IsAdministrador, MarketplaceViewPermission]
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Exportar Documentos de Precatórios (ZIP)",
+		description=(
+			"Baixa um ZIP com os documentos de todos os precatórios que atendem aos filtros "
+			"(os mesmos da listagem: status, natureza, tribunal, ente devedor, valores, search...). "
+			"Cada precatório vira uma pasta com o número do processo. Restrito a administradores. "
+			"O ZIP é enviado em streaming (ZIP64 acima de 4GB), sem Content-Length."
+		),
+		responses={
+			(200, 'application/zip'): OpenApiResponse(description="ZIP com os documentos", response=OpenApiTypes.BINARY),
+			404: OpenApiResponse(description="Nenhum documento encontrado para os filtros"),
+			401: OpenApiResponse(description="Não autenticado"),
+			403: OpenApiResponse(description="Apenas administradores podem exportar"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Envia o ZIP com os documentos dos precatórios filtrados.
+		"""
+		try:
+			precatorios = self.filter_queryset(self.get_queryset())
+			documentos = Documento.objects.filter(
+				precatorio__in=precatorios.as_subquery().order_by().values('pk')
+			).exclude(arquivo='')
+			if not documentos.exists():
+				return Response(
+					{
+						'message': 'Nenhum documento encontrado para os filtros informados'
+					},
+					status=status.HTTP_404_NOT_FOUND
+				)
+			return build_zip_response(get_export_queryset(documentos), 'precatorios-documentos')
+			
+		except ValidationError as e:
+			return Response(
+				{
+					'message': 'Erro ao exportar documentos',
+					'errors': e.detail
+				},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao exportar documentos',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+class DocumentoUploadCreateView(generics.CreateAPIView):
+	"""
+	View para abrir uma sessão de upload retomável de documento.
+	Requer permissão de dono ou administrador do precatório.
+	"""
+	serializer_class = UploadDocumentoSerializer
+	permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+	queryset = Precatorio.objects.all()
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Abrir Upload de Documento",
+		description=(
+			"Abre uma sessão de upload retomável para um documento do precatório. "
+			"Informe o nome do arquivo, o tamanho total em bytes e, opcionalmente, o SHA-256 "
+			"do arquivo. Extensão e tamanho (máximo 10MB) são validados antes do envio. "
+			"Os bytes são enviados depois em partes via PATCH na sessão."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='pk',
+				type=OpenApiTypes.UUID,
+				location=OpenApiParameter.PATH,
+				description="UUID do precatório",
+			),
+		],
+		request=UploadDocumentoSerializer,
+		responses={
+			201: OpenApiResponse(description="Sessão de upload criada", response=UploadDocumentoSerializer),
+			400: OpenApiResponse(description="Erro de validação"),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Precatório não encontrado"),
+			401: OpenApiResponse(description="Não autenticado"),
+		},
+		examples=[
+			OpenApiExample(
+				name="Abrir upload",
+				value={
+					"titulo": "Ofício Requisitório",
+					"nome_arquivo": "oficio.pdf",
+					"tamanho": 2457600,
+					"checksum": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+				},
+				request_only=True,
+			),
+		],
+	)
+	def post(self, request, *args, **kwargs):
+		"""
+		Método POST: Abre a sessão de upload.
+		"""
+		try:
+			precatorio = self.get_object()
+			serializer = self.get_serializer(data=request.data)
+			
+			if not serializer.is_valid():
+				return Response(
+					{
+						'message': 'Erro ao abrir upload de documento',
+						'errors': serializer.errors
+					},
+					status=status.HTTP_400_BAD_REQUEST
+				)
+			
+			upload = serializer.save(precatorio=precatorio, usuario=request.user)
+			
+			return Response(
+				{
+					'message': 'Upload de documento iniciado com sucesso',
+					'result': serializer.data
+				},
+				status=status.HTTP_201_CREATED,
+				headers={
+					'Location': reverse('documento-upload', kwargs={'pk': upload.pk}),
+					'Upload-Offset': str(upload.offset),
+					'Upload-Length': str(upload.tamanho),
+				}
+			)
+			
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Precatório não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except PermissionDenied:
+			return Response(
+				{
+					'message': 'Você não tem permissão para enviar documentos para este precatório'
+				},
+				status=status.HTTP_403_FORBIDDEN
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao abrir upload de documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class DocumentoUploadView(generics.GenericAPIView):
+	"""
+	View de uma sessão de upload retomável.
+	
+	- GET: estado da sessão (o `offset` indica de onde retomar);
+	- PATCH: envia a próxima parte do arquivo no corpo da requisição;
+	- DELETE: cancela a sessão e descarta o arquivo parcial.
+	
+	O corpo do PATCH é lido do stream em blocos e gravado direto no disco
+	(ver oficio.uploads), sem passar pelos parsers nem carregar o arquivo na memória.
+	"""
+	serializer_class = UploadDocumentoSerializer
+	permission_classes = [permissions.IsAuthenticated, IsUploaderOrAdmin]
+	queryset = UploadDocumento.objects.select_related('precatorio', 'documento')
+	
+	def upload_response(self, upload, message, status_code=status.HTTP_200_OK):
+		return Response(
+			{
+				'message': message,
+				'result': self.get_serializer(upload).data
+			},
+			status=status_code,
+			headers={
+				'Upload-Offset': str(upload.offset),
+				'Upload-Length': str(upload.tamanho),
+			}
+		)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Consultar Upload de Documento",
+		description="Retorna o estado da sessão de upload. Use `offset` (ou o header Upload-Offset) para retomar o envio.",
+		responses={
+			200: OpenApiResponse(description="Sessão de upload", response=UploadDocumentoSerializer),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Sessão não encontrada"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Retorna o estado da sessão de upload.
+		"""
+		try:
+			return self.upload_response(self.get_object(), 'Upload de documento encontrado com sucesso')
+		except (NotFound, Http404):
+			return Response({'message': 'Upload de documento não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+		except PermissionDenied:
+			return Response({'message': 'Você não tem permissão para acessar este upload'}, status=status.HTTP_403_FORBIDDEN)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao obter upload de documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Enviar Parte do Documento",
+		description=(
+			"Envia a próxima parte do arquivo como corpo binário da requisição "
+			"(Content-Type: application/offset+octet-stream). O header Upload-Offset deve ser "
+			"igual ao offset atual da sessão e Content-Length é obrigatório. Opcionalmente, "
+			"Upload-Checksum: sha256 <hex> confere a parte. Ao receber o último byte o documento "
+			"é criado e retornado em `result.documento`."
+		),
+		request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+		parameters=[
+			OpenApiParameter(name='Upload-Offset', type=OpenApiTypes.INT, location=OpenApiParameter.HEADER, required=True, description="Posição (em bytes) em que a parte começa"),
+			OpenApiParameter(name='Upload-Checksum', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description="sha256 <hex> da parte"),
+		],
+		responses={
+			200: OpenApiResponse(description="Parte recebida", response=UploadDocumentoSerializer),
+			201: OpenApiResponse(description="Última parte recebida; documento criado", response=UploadDocumentoSerializer),
+			400: OpenApiResponse(description="Parte vazia, headers inválidos ou checksum da parte não confere"),
+			409: OpenApiResponse(description="Upload-Offset diferente do offset da sessão, ou sessão encerrada"),
+			411: OpenApiResponse(description="Content-Length ausente"),
+			413: OpenApiResponse(description="A parte ultrapassa o tamanho declarado"),
+			422: OpenApiResponse(description="Checksum do arquivo completo não confere; a sessão volta ao offset 0"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def patch(self, request, *args, **kwargs):
+		"""
+		Método PATCH: Grava a próxima parte do arquivo.
+		"""
+		try:
+			try:
+				offset = int(request.headers['Upload-Offset'])
+			except (KeyError, ValueError):
+				raise UploadError('Header Upload-Offset ausente ou inválido', status.HTTP_400_BAD_REQUEST)
+			try:
+				length = int(request.headers['Content-Length'])
+			except (KeyError, ValueError):
+				raise UploadError('Header Content-Length é obrigatório', status.HTTP_411_LENGTH_REQUIRED)
+			checksum = parse_checksum_header(request.headers.get('Upload-Checksum'))
+			
+			with transaction.atomic():
+				upload = self.get_queryset().select_for_update(of=('self',)).get(pk=self.get_object().pk)
+				upload.offset = append_chunk(upload, request.stream, offset, length, checksum)
+				upload.save(update_fields=['offset', 'updated_at'])
+				
+				if not upload.is_complete:
+					return self.upload_response(upload, 'Parte do documento recebida com sucesso')
+				
+				complete_upload(upload)
+			
+			return self.upload_response(upload, 'Documento enviado com sucesso', status.HTTP_201_CREATED)
+			
+		except UploadError as e:
+			if e.offset is not None:
+				UploadDocumento.objects.filter(pk=kwargs['pk'], offset__gt=e.offset).update(offset=e.offset)
+			headers = {'Upload-Offset': str(e.offset)} if e.offset is not None else None
+			return Response(
+				{
+					'message': 'Erro ao enviar parte do documento',
+					'error': e.message
+				},
+				status=e.status_code,
+				headers=headers
+			)
+		except (NotFound, Http404):
+			return Response({'message': 'Upload de documento não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+		except PermissionDenied:
+			return Response({'message': 'Você não tem permissão para acessar este upload'}, status=status.HTTP_403_FORBIDDEN)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao enviar parte do documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Cancelar Upload de Documento",
+		description=(
+			"Cancela a sessão de upload e descarta o arquivo parcial (ou, no upload direto, o "
+			"arquivo já enviado ao storage). Sessões concluídas não podem ser canceladas."
+		),
+		responses={
+			204: OpenApiResponse(description="Upload cancelado"),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Sessão não encontrada"),
+			409: OpenApiResponse(description="Sessão já concluída"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def delete(self, request, *args, **kwargs):
+		"""
+		Método DELETE: Cancela a sessão de upload.
+		"""
+		try:
+			upload = self.get_object()
+			if upload.status == StatusUploadChoices.CONCLUIDO:
+				return Response({'message': 'Upload de documento já concluído'}, status=status.HTTP_409_CONFLICT)
+			
+			if upload.direto:
+				discard_direct_object(upload)
+			else:
+				discard_part(upload)
+			upload.status = StatusUploadChoices.CANCELADO
+			upload.save(update_fields=['status', 'updated_at'])
+			
+			return Response({'message': 'Upload de documento cancelado com sucesso'}, status=status.HTTP_204_NO_CONTENT)
+			
+		except (NotFound, Http404):
+			return Response({'message': 'Upload de documento não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+		except PermissionDenied:
+			return Response({'message': 'Você não tem permissão para acessar este upload'}, status=status.HTTP_403_FORBIDDEN)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao cancelar upload de documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class DocumentoDirectUploadCreateView(generics.CreateAPIView):
+	"""
+	View para abrir um upload direto de documento ao storage.
+	Requer permissão de dono ou administrador do precatório.
+	
+	A resposta traz a URL pré-assinada de PUT: o cliente envia o arquivo ao
+	bucket, sem passar pelo Django, e conclui em `documentos/uploads/<id>/direto`.
+	"""
+	serializer_class = UploadDiretoDocumentoSerializer
+	permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+	queryset = Precatorio.objects.all()
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Abrir Upload Direto de Documento",
+		description=(
+			"Abre uma sessão de upload direto ao storage (S3 ou compatível). Informe o nome do "
+			"arquivo, o tamanho em bytes e o SHA-256 (obrigatório). `result.envio` traz a URL "
+			"pré-assinada, o método (PUT) e os headers que devem ser enviados junto com o arquivo; "
+			"o storage recusa um corpo com outro tamanho ou outro SHA-256. O arquivo é sempre "
+			"enviado, mesmo que o conteúdo já exista no storage. "
+			"Depois do envio, conclua com POST em `documentos/uploads/{id}/direto`. "
+			"Retorna 501 se o storage de documentos não gera URLs pré-assinadas."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='pk',
+				type=OpenApiTypes.UUID,
+				location=OpenApiParameter.PATH,
+				description="UUID do precatório",
+			),
+		],
+		request=UploadDiretoDocumentoSerializer,
+		responses={
+			201: OpenApiResponse(description="Sessão de upload direto criada, com os dados de envio em `envio`", response=UploadDiretoDocumentoSerializer),
+			400: OpenApiResponse(description="Erro de validação"),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Precatório não encontrado"),
+			501: OpenApiResponse(description="Storage sem suporte a upload direto"),
+			401: OpenApiResponse(description="Não autenticado"),
+		},
+		examples=[
+			OpenApiExample(
+				name="Abrir upload direto",
+				value={
+					"titulo": "Ofício Requisitório",
+					"nome_arquivo": "oficio.pdf",
+					"tamanho": 2457600,
+					"checksum": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+				},
+				request_only=True,
+			),
+			OpenApiExample(
+				name="Dados de envio",
+				value={
+					"message": "Upload direto de documento iniciado com sucesso",
+					"result": {
+						"id": "5d2c3f0e-8a1b-4c7d-9e2f-1a2b3c4d5e6f",
+						"titulo": "Ofício Requisitório",
+						"nome_arquivo": "oficio.pdf",
+						"tamanho": 2457600,
+						"status": "Ativo",
+						"direto": True,
+						"envio": {
+							"method": "PUT",
+							"url": "http://127.0.0.1:9000/lexpay/precatorios/docs/sha256/9f/86/9f86...a08.pdf?X-Amz-Algorithm=AWS4-HMAC-SHA256&...",
+							"headers": {
+								"Content-Length": "2457600",
+								"Content-Type": "application/pdf",
+								"x-amz-checksum-sha256": "n4bQgYhMfWWaL+qgxVrQFaO/TxsrC4Is0V1sFbDwCgg="
+							},
+							"expires_at": "2026-01-15T11:30:00-03:00"
+						}
+					}
+				},
+				response_only=True,
+			),
+		],
+	)
+	def post(self, request, *args, **kwargs):
+		"""
+		Método POST: Abre a sessão de upload direto.
+		"""
+		try:
+			precatorio = self.get_object()
+			get_direct_storage()
+			serializer = self.get_serializer(data=request.data)
+			
+			if not serializer.is_valid():
+				return Response(
+					{
+						'message': 'Erro ao abrir upload direto de documento',
+						'errors': serializer.errors
+					},
+					status=status.HTTP_400_BAD_REQUEST
+				)
+			
+			with transaction.atomic():
+				upload = serializer.save(precatorio=precatorio, usuario=request.user, direto=True)
+				envio = issue_direct_upload(upload)
+				upload.save(update_fields=['chave'])
+			
+			return Response(
+				{
+					'message': 'Upload direto de documento iniciado com sucesso',
+					'result': {**serializer.data, 'envio': envio}
+				},
+				status=status.HTTP_201_CREATED,
+				headers={'Location': reverse('documento-upload-direct', kwargs={'pk': upload.pk})}
+			)
+			
+		except UploadError as e:
+			return Response(
+				{
+					'message': 'Erro ao abrir upload direto de documento',
+					'error': e.message
+				},
+				status=e.status_code
+			)
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Precatório não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except PermissionDenied:
+			return Response(
+				{
+					'message': 'Você não tem permissão para enviar documentos para este precatório'
+				},
+				status=status.HTTP_403_FORBIDDEN
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao abrir upload direto de documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class DocumentoDirectUploadView(generics.GenericAPIView):
+	"""
+	View de uma sessão de upload direto ao storage.
+	
+	- GET: renova a URL pré-assinada de envio (ex: a anterior expirou);
+	- POST: conclui a sessão depois do envio e cria o documento.
+	
+	A conclusão confere o objeto no storage pelo HEAD e pelos primeiros bytes
+	(ver oficio.uploads.complete_direct_upload); o arquivo não é baixado.
+	"""
+	serializer_class = UploadDocumentoSerializer
+	permission_classes = [permissions.IsAuthenticated, IsUploaderOrAdmin]
+	queryset = UploadDocumento.objects.select_related('precatorio', 'documento').filter(direto=True)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Renovar Envio Direto de Documento",
+		description=(
+			"Gera uma nova URL pré-assinada de envio para a sessão de upload direto."
+		),
+		responses={
+			200: OpenApiResponse(description="Sessão de upload direto, com os dados de envio em `envio`", response=UploadDocumentoSerializer),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Sessão não encontrada"),
+			409: OpenApiResponse(description="Sessão encerrada"),
+			501: OpenApiResponse(description="Storage sem suporte a upload direto"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Renova os dados de envio direto.
+		"""
+		try:
+			upload = self.get_object()
+			envio = issue_direct_upload(upload)
+			
+			return Response(
+				{
+					'message': 'Dados de envio gerados com sucesso',
+					'result': {**self.get_serializer(upload).data, 'envio': envio}
+				},
+				status=status.HTTP_200_OK
+			)
+			
+		except UploadError as e:
+			return Response(
+				{
+					'message': 'Erro ao gerar dados de envio',
+					'error': e.message
+				},
+				status=e.status_code
+			)
+		except (NotFound, Http404):
+			return Response({'message': 'Upload de documento não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+		except PermissionDenied:
+			return Response({'message': 'Você não tem permissão para acessar este upload'}, status=status.HTTP_403_FORBIDDEN)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao gerar dados de envio',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Concluir Upload Direto de Documento",
+		description=(
+			"Conclui a sessão depois que o arquivo foi enviado ao storage: confere tamanho, SHA-256 e "
+			"assinatura do arquivo e cria o documento, retornado em `result.documento`. "
+			"Um arquivo recusado é removido do storage e precisa ser reenviado. "
+			"Repetir a chamada numa sessão já concluída retorna a sessão sem alterações."
+		),
+		request=None,
+		responses={
+			200: OpenApiResponse(description="Sessão já concluída", response=UploadDocumentoSerializer),
+			201: OpenApiResponse(description="Documento criado", response=UploadDocumentoSerializer),
+			403: OpenApiResponse(description="Sem permissão"),
+			404: OpenApiResponse(description="Sessão não encontrada"),
+			409: OpenApiResponse(description="Arquivo ainda não enviado ao storage, ou sessão cancelada"),
+			415: OpenApiResponse(description="Conteúdo do arquivo não corresponde à extensão"),
+			422: OpenApiResponse(description="Tamanho ou SHA-256 do arquivo no storage não confere"),
+			501: OpenApiResponse(description="Storage sem suporte a upload direto"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def post(self, request, *args, **kwargs):
+		"""
+		Método POST: Conclui o upload direto.
+		"""
+		try:
+			with transaction.atomic():
+				upload = self.get_queryset().select_for_update(of=('self',)).get(pk=self.get_object().pk)
+				
+				if upload.status == StatusUploadChoices.CONCLUIDO:
+					return Response(
+						{
+							'message': 'Upload de documento já concluído',
+							'result': self.get_serializer(upload).data
+						},
+						status=status.HTTP_200_OK
+					)
+				if upload.status != StatusUploadChoices.ATIVO:
+					raise UploadError('Sessão de upload encerrada', status.HTTP_409_CONFLICT)
+				
+				complete_direct_upload(upload)
+			
+			return Response(
+				{
+					'message': 'Documento enviado com sucesso',
+					'result': self.get_serializer(upload).data
+				},
+				status=status.HTTP_201_CREATED
+			)
+			
+		except UploadError as e:
+			return Response(
+				{
+					'message': 'Erro ao concluir upload direto de documento',
+					'error': e.message
+				},
+				status=e.status_code
+			)
+		except (NotFound, Http404):
+			return Response({'message': 'Upload de documento não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+		except PermissionDenied:
+			return Response({'message': 'Você não tem permissão para acessar este upload'}, status=status.HTTP_403_FORBIDDEN)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao concluir upload direto de documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class DocumentoVisibilityMixin:
+	"""
+	Busca um documento e confere se o precatório dele é visível para o
+	usuário (mesmas regras da listagem, MarketplaceViewPermission).
+	"""
+	
+	def get_visible_documento(self):
+		documento = self.get_object()
+		
+		precatorios = Precatorio.objects.filter(pk=documento.precatorio_id)
+		for permission in self.get_permissions():
+			if hasattr(permission, 'filter_queryset'):
+				precatorios = permission.filter_queryset(self.request, precatorios, self)
+		if not precatorios.exists():
+			# 404 em vez de 403 para não revelar documentos de terceiros
+			raise NotFound()
+		return documento
+
+
+class DocumentoDownloadView(DocumentoVisibilityMixin, generics.GenericAPIView):
+	"""
+	View de download autorizado de um documento.
+	
+	O documento só é entregue se o precatório dele for visível para o usuário
+	(mesmas regras da listagem, MarketplaceViewPermission). O envio do arquivo
+	é delegado ao proxy (X-Accel-Redirect / X-Sendfile) ou feito em blocos
+	pelo Django com suporte a Range (ver oficio.downloads).
+	"""
+	permission_classes = [MarketplaceViewPermission]
+	queryset = Documento.objects.all()
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Baixar Documento",
+		description=(
+			"Baixa o arquivo do documento. Requer que o precatório do documento seja visível "
+			"para o usuário: Admin vê todos, Cedente os seus e Broker/Advogado os seus mais os "
+			"disponíveis no marketplace. Suporta Range (um intervalo), If-Range e If-None-Match "
+			"(o ETag é o SHA-256 do arquivo). Use `?inline=1` para exibir no navegador."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='pk',
+				type=OpenApiTypes.UUID,
+				location=OpenApiParameter.PATH,
+				description="UUID do documento",
+			),
+			OpenApiParameter(
+				name='inline',
+				type=OpenApiTypes.BOOL,
+				location=OpenApiParameter.QUERY,
+				description="Exibe o arquivo no navegador em vez de baixar",
+			),
+		],
+		responses={
+			(200, 'application/octet-stream'): OpenApiResponse(description="Arquivo do documento", response=OpenApiTypes.BINARY),
+			(206, 'application/octet-stream'): OpenApiResponse(description="Intervalo solicitado via Range", response=OpenApiTypes.BINARY),
+			304: OpenApiResponse(description="Não modificado"),
+			404: OpenApiResponse(description="Documento não encontrado ou não visível"),
+			416: OpenApiResponse(description="Intervalo fora do arquivo"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Entrega o arquivo do documento.
+		"""
+		try:
+			documento = self.get_visible_documento()
+			
+			etag = get_document_etag(documento)
+			if etag is not None:
+				not_modified = get_not_modified(request, etag, documento.enviado_em)
+				if not_modified is not None:
+					return not_modified
+			
+			response = build_download_response(
+				request,
+				documento,
+				as_attachment=request.query_params.get('inline') not in ('1', 'true'),
+			)
+			if etag is not None:
+				set_validators(response, etag, documento.enviado_em)
+			return response
+			
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Documento não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except FileNotFoundError:
+			return Response(
+				{
+					'message': 'Arquivo do documento não encontrado no storage'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao baixar documento',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+
+class DocumentoPreviewView(DocumentoVisibilityMixin, generics.GenericAPIView):
+	"""
+	View da miniatura (primeira página) de um documento.
+	
+	Segue a mesma regra de visibilidade do download. A miniatura vem do
+	cache em disco (ver oficio.previews) e só é gerada na requisição se
+	ainda não existir.
+	"""
+	permission_classes = [MarketplaceViewPermission]
+	queryset = Documento.objects.all()
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Miniatura do Documento",
+		description=(
+			"Retorna a miniatura da primeira página do documento em WebP. "
+			"Requer que o precatório do documento seja visível para o usuário. "
+			"O ETag muda quando o arquivo do documento muda (SHA-256)."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='pk',
+				type=OpenApiTypes.UUID,
+				location=OpenApiParameter.PATH,
+				description="UUID do documento",
+			),
+			OpenApiParameter(
+				name='tamanho',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				description="Tamanho da miniatura: pequeno, medio (padrão) ou grande",
+			),
+		],
+		responses={
+			(200, 'image/webp'): OpenApiResponse(description="Miniatura do documento", response=OpenApiTypes.BINARY),
+			304: OpenApiResponse(description="Não modificado"),
+			400: OpenApiResponse(description="Tamanho inválido"),
+			404: OpenApiResponse(description="Documento não encontrado, não visível ou sem arquivo"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Entrega a miniatura do documento.
+		"""
+		try:
+			documento = self.get_visible_documento()
+			path, etag = preview_cache.documento(documento, request.query_params.get('tamanho', 'medio'))
+			
+			not_modified = get_not_modified(request, etag)
+			if not_modified is not None:
+				return not_modified
+			return set_validators(FileResponse(open(path, 'rb'), content_type=PREVIEW_CONTENT_TYPE), etag)
+			
+		except InvalidPreviewSize as e:
+			return Response(
+				{
+					'message': 'Erro ao gerar miniatura',
+					'error': str(e)
+				},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+		except (NotFound, Http404):
+			return Response(
+				{
+					'message': 'Documento não encontrado'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except (PreviewUnavailable, FileNotFoundError):
+			return Response(
+				{
+					'message': 'Miniatura indisponível para este documento'
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao gerar miniatura',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+class DocumentoMetadataView(generics.ListAPIView):
+	"""
+	View com os metadados dos documentos de um ou vários precatórios.
+	
+	Alternativa leve ao detalhe do precatório para montar listas de
+	documentos: uma única consulta (`precatorio_id IN (...)` com a
+	visibilidade como subquery), sem JOIN e sem acesso ao storage.
+	"""
+	serializer_class = DocumentoMetadataSerializer
+	permission_classes = [MarketplaceViewPermission]
+	pagination_class = None
+	max_ids = 300
+	
+	def get_ids(self):
+		values = set()
+		for value in self.request.query_params.getlist('ids'):
+			values.update(item.strip() for item in value.split(',') if item.strip())
+		if not values:
+			raise ValidationError({'ids': 'Informe ao menos um UUID de precatório.'})
+		if len(values) > self.max_ids:
+			raise ValidationError({'ids': f'Informe no máximo {self.max_ids} precatórios por requisição.'})
+		try:
+			return {uuid.UUID(value) for value in values}
+		except ValueError:
+			raise ValidationError({'ids': 'Os ids devem ser UUIDs válidos.'})
+	
+	def get_queryset(self):
+		ids = self.get_ids()
+		
+		precatorios = Precatorio.objects.filter(pk__in=ids)
+		for permission in self.get_permissions():
+			if hasattr(permission, 'filter_queryset'):
+				precatorios = permission.filter_queryset(self.request, precatorios, self)
+		
+		return (
+			Documento.objects.filter(
+				precatorio_id__in=ids,
+				precatorio__in=precatorios.as_subquery().order_by().values('pk'),
+			)
+			.only(
+				'id', 'precatorio_id', 'titulo', 'arquivo', 'extensao', 'tamanho_bytes',
+				'content_type', 'sha256', 'enviado_em',
+			)
+			.order_by('precatorio_id', 'enviado_em', 'pk')
+		)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Metadados dos Documentos de Precatórios",
+		description=(
+			"Retorna os metadados (título, tamanho, extensão, SHA-256, data de envio e URLs de "
+			"download/miniatura) dos documentos de um ou vários precatórios, agrupados pelo UUID do "
+			"precatório. Os ids podem ser enviados separados por vírgula ou repetindo o parâmetro "
+			"(máximo de 300). Precatórios inexistentes, não visíveis para o usuário ou sem documentos "
+			"não aparecem no resultado."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='ids',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				required=True,
+				description="UUIDs dos precatórios, separados por vírgula",
+			),
+		],
+		responses={
+			200: OpenApiResponse(
+				description="Documentos agrupados por precatório",
+				examples=[
+					OpenApiExample(
+						name="Sucesso",
+						value={
+							'message': 'Documentos listados com sucesso',
+							'count': 1,
+							'result': {
+								'550e8400-e29b-41d4-a716-446655440000': [
+									{
+										'id': '660e8400-e29b-41d4-a716-446655440001',
+										'precatorio': '550e8400-e29b-41d4-a716-446655440000',
+										'titulo': 'Ofício Requisitório',
+										'extension': '.pdf',
+										'size_mb': 0.25,
+										'tamanho_bytes': 262144,
+										'content_type': 'application/pdf',
+										'sha256': 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855',
+										'enviado_em': '2025-12-18T12:00:00Z',
+										'download_url': 'http://127.0.0.1:8000/api/v1/oficio/documentos/660e8400-e29b-41d4-a716-446655440001/download',
+										'preview_url': 'http://127.0.0.1:8000/api/v1/oficio/documentos/660e8400-e29b-41d4-a716-446655440001/preview',
+									}
+								]
+							}
+						}
+					)
+				]
+			),
+			400: OpenApiResponse(description="ids ausentes, inválidos ou acima do limite"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Retorna os documentos agrupados por precatório.
+		"""
+		try:
+			serializer = self.get_serializer(self.get_queryset(), many=True)
+			result = {}
+			for documento in serializer.data:
+				result.setdefault(str(documento['precatorio']), []).append(documento)
+			return Response(
+				{
+					'message': 'Documentos listados com sucesso',
+					'count': len(serializer.data),
+					'result': result
+				},
+				status=status.HTTP_200_OK
+			)
+			
+		except ValidationError as e:
+			return Response(
+				{
+					'message': 'Erro ao listar documentos',
+					'errors': e.detail
+				},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro ao listar documentos',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)
+
+class DocumentoSearchView(generics.ListAPIView):
+	"""
+	View de busca no conteúdo dos documentos.
+	
+	Consulta apenas a tabela de textos extraídos (TextoDocumento) e o seu
+	índice GIN; os arquivos não são lidos. CPF, CNPJ e valores em reais são
+	buscados na forma normalizada (só dígitos), independente da formatação
+	usada no documento ou na busca.
+	"""
+	serializer_class = DocumentoBuscaSerializer
+	permission_classes = [MarketplaceViewPermission]
+	
+	def get_search_query(self):
+		term = (self.request.query_params.get('q') or '').strip()
+		if not term:
+			raise ValidationError({'q': 'Informe o termo de busca.'})
+		identifier = normalize_identifier(term)
+		if identifier is not None:
+			return SearchQuery(identifier, config='simple')
+		return SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+	
+	def get_queryset(self):
+		query = self.get_search_query()
+		
+		precatorios = Precatorio.objects.all()
+		for permission in self.get_permissions():
+			if hasattr(permission, 'filter_queryset'):
+				precatorios = permission.filter_queryset(self.request, precatorios, self)
+		
+		return (
+			TextoDocumento.objects.filter(
+				status=StatusExtracaoChoices.CONCLUIDO,
+				search_vector=query,
+				documento__precatorio__in=precatorios.as_subquery().values('pk'),
+			)
+			.select_related('documento__precatorio')
+			.defer('texto', 'identificadores', 'search_vector', 'documento__precatorio__search_vector')
+			.annotate(
+				rank=SearchRank(F('search_vector'), query),
+				trecho=SearchHeadline(
+					'texto',
+					query,
+					config=SEARCH_CONFIG,
+					start_sel='<b>',
+					stop_sel='</b>',
+					max_fragments=2,
+				),
+			)
+			.order_by('-rank', '-documento__enviado_em')
+		)
+	
+	@extend_schema(
+		tags=['Documentos'],
+		summary="Buscar no Conteúdo dos Documentos",
+		description=(
+			"Busca textual no conteúdo extraído dos documentos (PDF e DOCX), ordenada por relevância. "
+			"Aceita a sintaxe de busca web (\"frase exata\", OR, -termo). Quando o termo é um CPF, CNPJ "
+			"ou valor em reais (ex: 123.456.789-09, R$ 1.500,00), a busca ignora a formatação. "
+			"Só retorna documentos de precatórios visíveis para o usuário e cujo texto já foi extraído "
+			"pelo worker (`manage.py run_extraction_worker`)."
+		),
+		parameters=[
+			OpenApiParameter(
+				name='q',
+				type=OpenApiTypes.STR,
+				location=OpenApiParameter.QUERY,
+				required=True,
+				description="Termo de busca, CPF, CNPJ ou valor",
+			),
+		],
+		responses={
+			200: DocumentoBuscaSerializer(many=True),
+			400: OpenApiResponse(description="Termo de busca não informado"),
+			401: OpenApiResponse(description="Não autenticado"),
+		}
+	)
+	def get(self, request, *args, **kwargs):
+		"""
+		Método GET: Retorna os documentos que contêm o termo buscado.
+		"""
+		try:
+			queryset = self.get_queryset()
+			page = self.paginate_queryset(queryset)
+			serializer = self.get_serializer(page if page is not None else queryset, many=True)
+			if page is not None:
+				paginated_response = self.get_paginated_response(serializer.data)
+				return Response(
+					{
+						'message': 'Busca realizada com sucesso',
+						'count': paginated_response.data.get('count'),
+						'next': paginated_response.data.get('next'),
+						'previous': paginated_response.data.get('previous'),
+						'results': paginated_response.data.get('results', [])
+					},
+					status=status.HTTP_200_OK
+				)
+			return Response(
+				{
+					'message': 'Busca realizada com sucesso',
+					'results': serializer.data
+				},
+				status=status.HTTP_200_OK
+			)
+			
+		except ValidationError as e:
+			return Response(
+				{
+					'message': 'Erro na busca de documentos',
+					'errors': e.detail
+				},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+		except NotFound as e:
+			return Response(
+				{
+					'message': 'Erro na busca de documentos',
+					'error': str(e.detail)
+				},
+				status=status.HTTP_404_NOT_FOUND
+			)
+		except Exception as e:
+			return Response(
+				{
+					'message': 'Erro na busca de documentos',
+					'error': str(e)
+				},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR
+			)